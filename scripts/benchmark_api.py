@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+Load-testing and benchmark suite for the FastAPI backend
+Seeds a multi-tenant dataset (organizations x locations x months of readings) with
+create_demo_data.create_benchmark_data, counts the SQL queries each route issues by
+calling it in process one request at a time, then starts uvicorn on the seeded
+database and drives every route of main.py with concurrent clients, recording
+p50/p95/p99 latency, throughput and errors per route.
+
+Results are written to JSON (benchmark-results/api-<commit>.json by default).
+Pass --baseline with an earlier result to list the routes whose p95 latency or
+query count went up; the script then exits with status 1.
+
+Usage: python scripts/benchmark_api.py [--orgs 3] [--locations 8] [--months 3] [--readings-per-day 24]
+                                       [--requests 200] [--concurrency 8] [--workers 1] [--only REGEX]
+                                       [--database-url URL] [--output FILE] [--baseline FILE] [--threshold 1.25]
+"""
+import argparse
+import asyncio
+import base64
+import io
+import itertools
+import json
+import os
+import platform
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--orgs", type=int, default=3, help="benchmark organizations; requests rotate between them")
+parser.add_argument("--locations", type=int, default=8, help="monitored locations per organization")
+parser.add_argument("--months", type=int, default=3, help="months of history per organization")
+parser.add_argument("--readings-per-day", type=int, default=24, help="temperature readings per location per day")
+parser.add_argument("--requests", type=int, default=200, help="requests per route")
+parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients per route")
+parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+parser.add_argument("--warmup", type=int, default=3, help="unmeasured requests per route before the measured ones")
+parser.add_argument("--profile-requests", type=int, default=3, help="in-process requests per route used to count queries")
+parser.add_argument("--maintenance-requests", type=int, default=5,
+                    help="requests for rebuild/archive/retention jobs, which run last and one at a time")
+parser.add_argument("--only", help="regular expression; only routes whose 'METHOD /path' matches are driven")
+parser.add_argument("--database-url", help="default: a new SQLite database in a temporary directory")
+parser.add_argument("--output", help="default: benchmark-results/api-<commit>.json")
+parser.add_argument("--baseline", help="earlier result to compare with")
+parser.add_argument("--threshold", type=float, default=1.25, help="p95 ratio above which a route counts as regressed")
+args = parser.parse_args()
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND = os.path.join(ROOT, 'src', 'backend')
+WORKDIR = tempfile.mkdtemp(prefix="benchmark_api_")
+
+os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(WORKDIR, 'benchmark_api.db')}"
+os.environ["EXPIRY_SCHEDULER_INTERVAL"] = "0"
+os.environ["RETENTION_INTERVAL"] = "0"
+# Files written by imports, reports, image uploads and archiving stay out of the working tree
+for variable, directory in [("IMPORT_DIR", "imports"), ("REPORT_DIR", "reports"), ("IMAGE_STORE_ROOT", "images"),
+                            ("COLD_ARCHIVE_ROOT", "cold_archive"), ("COLD_ARCHIVE_CACHE_DIR", "cold_archive_cache"),
+                            ("VISION_CACHE_PATH", "vision_cache.db")]:
+    os.environ.setdefault(variable, os.path.join(WORKDIR, directory))
+
+sys.path.insert(0, BACKEND)
+
+import httpx
+from sqlalchemy import event
+
+from create_demo_data import create_demo_data, create_benchmark_data, benchmark_user_email, BENCHMARK_PASSWORD
+from database import engine, SessionLocal
+from models import TemperatureLog, CleaningPlan
+
+RUN = int(time.time())
+TODAY = date.today()
+CHAT_MESSAGES = ["are we compliant?", "list products", "add temperature of fridge 1 to 3 degrees",
+                 "Quel est notre statut de conformité ?"]
+
+# build(n, fixture) -> (url, request kwargs); requires names the fixture keys it reads
+Endpoint = namedtuple("Endpoint", "method route build requires maintenance")
+
+
+def endpoint(method, route, build, requires=(), maintenance=False):
+    return Endpoint(method, route, build, requires, maintenance)
+
+
+def room_center(f):
+    room = f["room"]
+    return {"x": room["x"] + room["width"] / 2, "y": room["y"] + room["height"] / 2}
+
+
+ENDPOINTS = [
+    endpoint("GET", "/health", lambda n, f: ("/health", {})),
+    endpoint("GET", "/help", lambda n, f: ("/help", {})),
+    endpoint("OPTIONS", "/{path:path}", lambda n, f: ("/temperature-logs", {})),
+    endpoint("POST", "/auth/login", lambda n, f: ("/auth/login", {"json": {"email": f["email"], "password": BENCHMARK_PASSWORD}})),
+    endpoint("POST", "/auth/sso", lambda n, f: ("/auth/sso", {"json": {"sso_token": "benchmark"}})),
+    endpoint("GET", "/debug/sso", lambda n, f: ("/debug/sso", {"params": {"token": f["token"]}})),
+    endpoint("POST", "/organizations", lambda n, f: ("/organizations", {"json": {"name": f"Load Org {RUN}-{n}", "type": "restaurant"}})),
+    endpoint("POST", "/users", lambda n, f: ("/users", {"json": {
+        "email": f"load-{RUN}-{n}@bench.example", "password": "password", "name": f"Load User {n}",
+        "role": "user", "organization_id": f["organization_id"]}})),
+
+    endpoint("POST", "/temperature-logs", lambda n, f: ("/temperature-logs", {"json": {
+        "location": f"Fridge {n % 8 + 1}", "temperature": round(1 + (n % 40) / 10, 1), "equipment_id": "LOAD"}})),
+    endpoint("GET", "/temperature-logs", lambda n, f: ("/temperature-logs", {"params": {"limit": 100}})),
+    endpoint("GET", "/temperature-logs/daily", lambda n, f: ("/temperature-logs/daily", {"params": {
+        "start_date": (TODAY - timedelta(days=30)).isoformat(), "end_date": TODAY.isoformat()}})),
+    endpoint("GET", "/temperature-locations", lambda n, f: ("/temperature-locations", {})),
+    endpoint("PUT", "/temperature-logs/{log_id}", lambda n, f: (f"/temperature-logs/{f['log_id']}", {"json": {
+        "location": f["log_location"], "temperature": 3.0}}), ("log_id",)),
+    endpoint("DELETE", "/temperature-logs/{log_id}", lambda n, f: (f"/temperature-logs/{f['deletable_logs'].pop()}", {}),
+             ("deletable_logs",)),
+    endpoint("GET", "/temperature-ranges", lambda n, f: ("/temperature-ranges", {})),
+    endpoint("PUT", "/temperature-ranges", lambda n, f: ("/temperature-ranges", {"json": {}})),
+
+    endpoint("POST", "/products", lambda n, f: ("/products", {"json": {
+        "name": f"Load Product {RUN}-{n}", "category": "Dairy", "allergens": ["milk"], "shelf_life_days": 10}})),
+    endpoint("GET", "/products", lambda n, f: ("/products", {})),
+    endpoint("PATCH", "/products/{product_id}", lambda n, f: (f"/products/{f['product']['id']}", {"json": {
+        key: f["product"][key] for key in ("name", "category", "allergens", "shelf_life_days")}}), ("product",)),
+    endpoint("POST", "/suppliers", lambda n, f: ("/suppliers", {"json": {"name": f"Load Supplier {RUN}-{n}"}})),
+    endpoint("GET", "/suppliers", lambda n, f: ("/suppliers", {})),
+    endpoint("GET", "/usage-report", lambda n, f: ("/usage-report", {})),
+
+    endpoint("POST", "/cleaning-plans", lambda n, f: ("/cleaning-plans", {"json": {
+        "name": f"Load Plan {RUN}-{n}", "cleaning_frequency": "daily", "rooms": [f["room"]]}}), ("room",)),
+    endpoint("GET", "/cleaning-plans", lambda n, f: ("/cleaning-plans", {})),
+    endpoint("GET", "/cleaning-plans/archived", lambda n, f: ("/cleaning-plans/archived", {})),
+    endpoint("GET", "/cleaning-plans/{plan_id}/history", lambda n, f: (f"/cleaning-plans/{f['plan_id']}/history", {"params": {
+        "start": (datetime.utcnow() - timedelta(days=30)).isoformat()}}), ("plan_id",)),
+    endpoint("GET", "/cleaning-plans/{plan_id}/status", lambda n, f: (f"/cleaning-plans/{f['plan_id']}/status", {}), ("plan_id",)),
+    endpoint("GET", "/cleaning-tasks", lambda n, f: ("/cleaning-tasks", {})),
+    endpoint("GET", "/cleaning-plans/{plan_id}/rooms/at", lambda n, f: (f"/cleaning-plans/{f['plan_id']}/rooms/at", {
+        "params": room_center(f)}), ("plan_id", "room")),
+    endpoint("GET", "/cleaning-plans/{plan_id}/rooms/in", lambda n, f: (f"/cleaning-plans/{f['plan_id']}/rooms/in", {
+        "params": {key: f["room"][key] for key in ("x", "y", "width", "height")}}), ("plan_id", "room")),
+    endpoint("POST", "/cleaning-plans/{plan_id}/clean-region", lambda n, f: (f"/cleaning-plans/{f['plan_id']}/clean-region", {
+        "json": room_center(f)}), ("plan_id", "room")),
+    endpoint("POST", "/room-cleaning", lambda n, f: ("/room-cleaning", {"json": {
+        "room_name": f["room"]["name"], "cleaning_plan_id": f["plan_id"]}}), ("plan_id", "room")),
+    endpoint("GET", "/room-cleanings/{plan_id}", lambda n, f: (f"/room-cleanings/{f['plan_id']}", {}), ("plan_id",)),
+    endpoint("POST", "/cleaning-records", lambda n, f: ("/cleaning-records", {"json": {
+        "area": "Kitchen", "cleaning_type": "daily", "products_used": ["detergent"]}})),
+    endpoint("GET", "/cleaning-records", lambda n, f: ("/cleaning-records", {})),
+
+    endpoint("POST", "/material-reception", lambda n, f: ("/material-reception", {"json": dict(
+        f["reception"], batch_number=f"LR-{RUN}-{n}")}), ("reception",)),
+    endpoint("GET", "/material-receptions", lambda n, f: ("/material-receptions", {})),
+    endpoint("PATCH", "/material-receptions/{reception_id}", lambda n, f: (f"/material-receptions/{f['reception_id']}", {
+        "json": f["reception"]}), ("reception_id", "reception")),
+    endpoint("GET", "/gtin/{barcode}", lambda n, f: (f"/gtin/{f['reception']['barcode']}", {}), ("reception",)),
+    endpoint("POST", "/analyze-reception-image", lambda n, f: ("/analyze-reception-image", {"json": {"image": f["image"]}}),
+             ("image",)),
+    endpoint("POST", "/analyze-reception-images", lambda n, f: ("/analyze-reception-images", {"json": {
+        "images": [f["image"]] * 4}}), ("image",)),
+    endpoint("GET", "/images/{digest}/{name}", lambda n, f: (f"/images/{f['image_key']}", {}), ("image_key",)),
+    endpoint("POST", "/batch-tracking", lambda n, f: ("/batch-tracking", {"json": {
+        "batch_number": f"LB-{RUN}-{n}", "product_id": f["product"]["id"], "supplier_id": f["reception"]["supplier_id"],
+        "expiry_date": (TODAY + timedelta(days=5)).isoformat(), "location": "Fridge 1"}}), ("product", "reception")),
+    endpoint("GET", "/batch-tracking", lambda n, f: ("/batch-tracking", {})),
+    endpoint("GET", "/trace/{batch_number}", lambda n, f: (f"/trace/{f['reception']['batch_number']}", {}), ("reception",)),
+    endpoint("GET", "/expiring", lambda n, f: ("/expiring", {"params": {"within": 7}})),
+    endpoint("GET", "/expiry-alerts", lambda n, f: ("/expiry-alerts", {})),
+    endpoint("POST", "/expiry-alerts/{alert_id}/acknowledge", lambda n, f: (f"/expiry-alerts/{f['alert_id']}/acknowledge", {}),
+             ("alert_id",)),
+
+    endpoint("POST", "/incidents", lambda n, f: ("/incidents", {"json": {
+        "title": f"Load incident {n}", "severity": ("low", "medium", "high")[n % 3], "category": "hygiene"}})),
+    endpoint("GET", "/incidents", lambda n, f: ("/incidents", {})),
+    endpoint("GET", "/incidents/stats", lambda n, f: ("/incidents/stats", {})),
+    endpoint("PATCH", "/incidents/{incident_id}", lambda n, f: (f"/incidents/{f['incident_id']}", {"json": {
+        "corrective_actions": f"Reviewed ({n})"}}), ("incident_id",)),
+    endpoint("GET", "/compliance/status", lambda n, f: ("/compliance/status", {})),
+    endpoint("POST", "/chat/command", lambda n, f: ("/chat/command", {"json": {"message": CHAT_MESSAGES[n % len(CHAT_MESSAGES)]}})),
+
+    endpoint("GET", "/configuration", lambda n, f: ("/configuration", {})),
+    endpoint("PUT", "/configuration/{param_id}", lambda n, f: (f"/configuration/{f['configuration']['id']}", {"json": {
+        "value": f["configuration"]["value"]}}), ("configuration",)),
+    endpoint("GET", "/retention/policies", lambda n, f: ("/retention/policies", {})),
+    endpoint("POST", "/imports/{kind}", lambda n, f: ("/imports/products", {"files": {"file": (
+        "products.csv", f"name,category\nLoad Import {RUN}-{n},Dairy\n".encode())}})),
+    endpoint("GET", "/imports", lambda n, f: ("/imports", {})),
+    endpoint("GET", "/imports/{import_id}", lambda n, f: (f"/imports/{f['import_id']}", {}), ("import_id",)),
+    endpoint("POST", "/reports", lambda n, f: ("/reports", {"json": {
+        "format": "csv", "start_date": (TODAY - timedelta(days=7)).isoformat(), "end_date": TODAY.isoformat()}})),
+    endpoint("GET", "/reports", lambda n, f: ("/reports", {})),
+    endpoint("GET", "/reports/{report_id}", lambda n, f: (f"/reports/{f['report_id']}", {}), ("report_id",)),
+    endpoint("GET", "/reports/{report_id}/download", lambda n, f: (f"/reports/{f['report_id']}/download", {}), ("report_id",)),
+    endpoint("POST", "/api-keys", lambda n, f: ("/api-keys", {"json": {"name": f"load-{n}"}})),
+    endpoint("GET", "/api-keys", lambda n, f: ("/api-keys", {})),
+    endpoint("DELETE", "/api-keys/{key_id}", lambda n, f: (f"/api-keys/{f['api_key_id']}", {}), ("api_key_id",)),
+    endpoint("GET", "/archive/files", lambda n, f: ("/archive/files", {})),
+    endpoint("GET", "/archive/{table}/records", lambda n, f: ("/archive/temperature_logs/records", {"params": {
+        "start_date": (TODAY - timedelta(days=800)).isoformat(), "end_date": TODAY.isoformat()}})),
+
+    # Maintenance jobs change the dataset, so they run last
+    endpoint("POST", "/gtin/rebuild", lambda n, f: ("/gtin/rebuild", {}), maintenance=True),
+    endpoint("POST", "/trace/rebuild", lambda n, f: ("/trace/rebuild", {}), maintenance=True),
+    endpoint("POST", "/expiry-alerts/run", lambda n, f: ("/expiry-alerts/run", {}), maintenance=True),
+    endpoint("POST", "/cleaning-plans/{plan_id}/archive", lambda n, f: (f"/cleaning-plans/{f['archivable_plans'].pop()}/archive", {}),
+             ("archivable_plans",), maintenance=True),
+    endpoint("POST", "/cleaning-plans/check-archive", lambda n, f: ("/cleaning-plans/check-archive", {}), maintenance=True),
+    endpoint("POST", "/retention/run", lambda n, f: ("/retention/run", {}), maintenance=True),
+]
+
+
+def endpoint_name(item):
+    return f"{item.method} {item.route}"
+
+
+def request_count(item):
+    return min(args.requests, args.maintenance_requests) if item.maintenance else args.requests
+
+
+def png_base64():
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (200, 40, 40)).save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def login(client, fixture):
+    response = client.post("/auth/login", json={"email": fixture["email"], "password": BENCHMARK_PASSWORD})
+    response.raise_for_status()
+    body = response.json()
+    fixture["token"], fixture["organization_id"] = body["access_token"], body["user"]["organization_id"]
+    fixture["headers"] = {"Authorization": f"Bearer {fixture['token']}"}
+
+
+def create_fixtures(client):
+    """Per organization: a token and the ids the parameterised routes need"""
+    pool_size = args.profile_requests + args.warmup + args.requests
+    fixtures = []
+    for index in range(1, args.orgs + 1):
+        fixture = {"email": benchmark_user_email(index)}
+        login(client, fixture)
+
+        def get(path, **params):
+            response = client.get(path, headers=fixture["headers"], params=params)
+            response.raise_for_status()
+            return response.json()
+
+        def post(path, **kwargs):
+            response = client.post(path, headers=fixture["headers"], **kwargs)
+            response.raise_for_status()
+            return response.json()
+
+        plan = get("/cleaning-plans")[0]
+        fixture["plan_id"], fixture["room"] = plan["id"], plan["rooms"][0]
+        log = get("/temperature-logs", limit=1)[0]
+        fixture["log_id"], fixture["log_location"] = log["id"], log["location"]
+        fixture["product"] = get("/products", limit=1)[0]
+        fixture["incident_id"] = get("/incidents", limit=1)[0]["id"]
+        reception = get("/material-receptions")[0]
+        fixture["reception_id"] = reception["id"]
+        fixture["reception"] = {key: reception[key] for key in (
+            "supplier_id", "product_name", "category", "barcode", "quantity", "unit", "expiry_date", "batch_number",
+            "temperature_on_arrival", "quality_notes")}
+        alerts = get("/expiry-alerts")
+        if alerts:
+            fixture["alert_id"] = alerts[0]["id"]
+        configuration = get("/configuration")
+        if configuration:
+            fixture["configuration"] = configuration[0]
+        fixture["api_key_id"] = post("/api-keys", json={"name": "benchmark"})["id"]
+        fixture["report_id"] = post("/reports", json={"format": "csv", "start_date": (TODAY - timedelta(days=7)).isoformat(),
+                                                      "end_date": TODAY.isoformat()})["id"]
+        fixture["import_id"] = post("/imports/suppliers", files={"file": ("suppliers.csv", b"name\nImported Supplier\n")})["id"]
+        try:
+            fixture["image"] = png_base64()
+            image_path = post("/material-reception", json=dict(fixture["reception"], image_data=fixture["image"]))["image_path"]
+            fixture["image_key"] = "/".join(image_path.split("/")[-2:])
+        except ImportError:
+            pass
+
+        # Rows consumed one per request by the DELETE and archive routes
+        db = SessionLocal()
+        try:
+            logs = [TemperatureLog(organization_id=fixture["organization_id"], location="Load Delete", temperature=3,
+                                   is_within_limits=True) for _ in range(pool_size)]
+            plans = [CleaningPlan(organization_id=fixture["organization_id"], name=f"Archivable {n}",
+                                  rooms=[fixture["room"]], cleaning_frequency="daily") for n in range(pool_size)]
+            db.add_all(logs + plans)
+            db.commit()
+            fixture["deletable_logs"] = [log.id for log in logs]
+            fixture["archivable_plans"] = [plan.id for plan in plans]
+        finally:
+            db.close()
+        fixtures.append(fixture)
+    return fixtures
+
+
+def count_queries(client, endpoints, fixtures):
+    """Average SQL statements per request, one request at a time"""
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        result = {}
+        for item in endpoints:
+            before = statements[0]
+            for n in range(args.profile_requests):
+                fixture = fixtures[n % len(fixtures)]
+                url, kwargs = item.build(n, fixture)
+                client.request(item.method, url, headers=fixture["headers"], **kwargs)
+            result[endpoint_name(item)] = round((statements[0] - before) / args.profile_requests, 1)
+        return result
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+async def drive(base_url, item, fixtures):
+    requests = request_count(item)
+    concurrency = 1 if item.maintenance else args.concurrency
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies, statuses = [], {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        for n in range(args.warmup if not item.maintenance else 0):
+            fixture = fixtures[n % len(fixtures)]
+            url, kwargs = item.build(n, fixture)
+            try:
+                await client.request(item.method, url, headers=fixture["headers"], **kwargs)
+            except httpx.HTTPError:
+                pass
+
+        counter = itertools.count()
+
+        async def worker():
+            while True:
+                n = next(counter)
+                if n >= requests:
+                    return
+                fixture = fixtures[n % len(fixtures)]
+                url, kwargs = item.build(n, fixture)
+                start = time.perf_counter()
+                try:
+                    status = (await client.request(item.method, url, headers=fixture["headers"], **kwargs)).status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    errors = sum(count for status, count in statuses.items() if not (isinstance(status, int) and status < 400))
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "throughput_rps": round(requests / elapsed, 2),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+    }
+
+
+def start_server():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND, env=os.environ.copy()
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(300):
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return server, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 30s")
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def compare(results, baseline):
+    """Routes whose p95 grew by more than the threshold (and 1 ms) or that issue more queries"""
+    regressions = []
+    for name, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if not previous:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * args.threshold and current["p95_ms"] - previous["p95_ms"] > 1:
+            regressions.append(f"{name}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        if (current.get("queries_per_request") or 0) > (previous.get("queries_per_request") or 0):
+            regressions.append(f"{name}: queries {previous.get('queries_per_request')} -> {current['queries_per_request']}")
+    return regressions
+
+
+def main():
+    from fastapi.routing import APIRoute
+    from fastapi.testclient import TestClient
+    import main as backend
+
+    commit, dirty = git_commit()
+    pattern = re.compile(args.only) if args.only else None
+
+    start = time.perf_counter()
+    create_demo_data()
+    seeded = create_benchmark_data(args.orgs, args.locations, args.months, args.readings_per_day)
+    seed_seconds = time.perf_counter() - start
+
+    routes = {f"{method} {route.path}" for route in backend.app.routes if isinstance(route, APIRoute) for method in route.methods}
+    skipped = {name: "not in the benchmark table" for name in sorted(routes - {endpoint_name(item) for item in ENDPOINTS})}
+
+    with TestClient(backend.app, raise_server_exceptions=False) as client:
+        fixtures = create_fixtures(client)
+        endpoints = []
+        for item in ENDPOINTS:
+            name = endpoint_name(item)
+            if pattern and not pattern.search(name):
+                continue
+            missing = [key for key in item.requires if key not in fixtures[0]]
+            if missing:
+                skipped[name] = f"no {', '.join(missing)} in the seeded data"
+                continue
+            endpoints.append(item)
+        queries = count_queries(client, endpoints, fixtures)
+
+    results = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "config": {key: getattr(args, key) for key in ("orgs", "locations", "months", "readings_per_day", "requests",
+                                                        "concurrency", "workers", "warmup", "maintenance_requests")},
+        "seed": dict(seeded, seconds=round(seed_seconds, 2)),
+        "endpoints": {},
+        "skipped": skipped,
+    }
+
+    server, base_url = start_server()
+    try:
+        print(f"{len(endpoints)} routes, {args.requests} requests each, {args.concurrency} concurrent clients, "
+              f"{args.orgs} organizations ({engine.dialect.name})")
+        print(f"  {'route':<48} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'errors':>7}")
+        for item in endpoints:
+            with httpx.Client(base_url=base_url) as client:
+                for fixture in fixtures:
+                    login(client, fixture)  # tokens expire after 30 minutes
+            name = endpoint_name(item)
+            stats = asyncio.run(drive(base_url, item, fixtures))
+            stats["queries_per_request"] = queries[name]
+            results["endpoints"][name] = stats
+            print(f"  {name:<48} {stats['throughput_rps']:8.1f} {stats['p50_ms']:8.1f} {stats['p95_ms']:8.1f} "
+                  f"{stats['p99_ms']:8.1f} {stats['queries_per_request']:8.1f} {stats['errors']:7d}")
+    finally:
+        server.terminate()
+        server.wait()
+
+    for name, reason in skipped.items():
+        print(f"  skipped {name}: {reason}")
+
+    output = args.output or os.path.join(ROOT, "benchmark-results", f"api-{(commit or 'unknown')[:12]}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file))
+        for regression in regressions:
+            print(f"  REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the AI chat command grammar
+Parses a generated corpus of English and French chat utterances with the compiled
+grammar in chat_commands.py (utterances/s and intent accuracy), then runs them
+end to end through POST /chat/command against a temporary SQLite database. The
+status question is also answered the previous way, with the two requests the
+browser used to make, for comparison.
+
+Usage: python scripts/benchmark_chat_commands.py [--size 50000] [--requests 2000] [--seed 42]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--size", type=int, default=50000, help="utterances parsed")
+parser.add_argument("--requests", type=int, default=2000, help="utterances sent through POST /chat/command")
+parser.add_argument("--seed", type=int, default=42)
+args = parser.parse_args()
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'benchmark_chat.db')}"
+os.environ.setdefault("EXPIRY_SCHEDULER_INTERVAL", "0")
+os.environ.setdefault("RETENTION_INTERVAL", "0")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+from chat_commands import parse_command
+
+LOCATIONS = {"en": ["fridge1", "freezer", "walk-in cooler", "Fridge 2", "dessert fridge"],
+             "fr": ["frigo1", "congélateur", "chambre froide", "frigo 2", "vitrine"]}
+PRODUCTS = {"en": ["fresh salmon", "chicken breast", "greek yogurt", "sourdough bread"],
+            "fr": ["saumon frais", "blanc de poulet", "yaourt grec", "pain au levain"]}
+ALLERGENS = {"en": ["fish", "milk", "gluten", "eggs and milk"], "fr": ["poisson", "lait", "gluten", "œufs et lait"]}
+ROOMS = {"en": ["Kitchen", "prep area", "Storage"], "fr": ["Kitchen", "Storage", "zone de préparation"]}
+
+# (intent, template) per language; {t} is a temperature
+TEMPLATES = {
+    "en": [
+        ("log_temperature", "add temperature of {location} to {t} degrees"),
+        ("log_temperature", "Log the {location} temperature as {t} degrees"),
+        ("log_temperature", "record temp {t}°C in {location}"),
+        ("add_product", "add product {product} with allergens {allergens}"),
+        ("add_product", "create product {product}"),
+        ("clean_room", "clean {room}"),
+        ("clean_room", "mark the {room} as cleaned"),
+        ("report_incident", "report high incident door seal broken on {location}"),
+        ("list_products", "list products"),
+        ("compliance_status", "Are we compliant?"),
+        ("compliance_status", "what's our compliance status"),
+        ("usage_report", "show me the usage report"),
+        ("help", "help"),
+        ("unknown", "what time is it"),
+    ],
+    "fr": [
+        ("log_temperature", "ajouter température de {location} à {t} degrés"),
+        ("log_temperature", "Enregistrer température de {t} degrés dans {location}"),
+        ("add_product", "Ajouter produit {product} avec allergènes {allergens}"),
+        ("clean_room", "Nettoyer {room}"),
+        ("clean_room", "Marquer {room} comme nettoyée"),
+        ("report_incident", "Signaler incident de température dans {location}"),
+        ("list_products", "lister les produits"),
+        ("compliance_status", "Quel est notre statut de conformité ?"),
+        ("usage_report", "Afficher rapport d'utilisation"),
+        ("help", "aide"),
+        ("unknown", "bonjour"),
+    ],
+}
+
+
+def generate_corpus(size, seed):
+    rnd = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        language = rnd.choice(("en", "fr"))
+        intent, template = rnd.choice(TEMPLATES[language])
+        temperature = rnd.choice([rnd.randint(-22, 9), round(rnd.uniform(-3, 8), 1)])
+        if language == "fr":
+            temperature = str(temperature).replace(".", ",")
+        message = template.format(
+            location=rnd.choice(LOCATIONS[language]),
+            t=temperature,
+            product=rnd.choice(PRODUCTS[language]),
+            allergens=rnd.choice(ALLERGENS[language]),
+            room=rnd.choice(ROOMS[language])
+        )
+        corpus.append((language, intent, message))
+    return corpus
+
+
+def bench_parse(corpus):
+    misses = 0
+    start = time.perf_counter()
+    for language, intent, message in corpus:
+        if parse_command(message, language)["intent"] != intent:
+            misses += 1
+    elapsed = time.perf_counter() - start
+    print(f"  parse            {len(corpus) / elapsed:12,.0f} utterances/s   {elapsed / len(corpus) * 1e6:6.1f} µs each"
+          f"   intent accuracy {100 * (1 - misses / len(corpus)):.2f}%")
+
+
+def bench_endpoint(corpus):
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    client.__enter__()
+    token = client.post("/auth/login", json={"email": "admin@ai-automorph.com", "password": "password"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/cleaning-plans", headers=headers, json={
+        "name": "Benchmark plan", "cleaning_frequency": "daily",
+        "rooms": [{"name": name, "x": i * 100, "y": 0, "width": 100, "height": 100}
+                  for i, name in enumerate(["Kitchen", "Prep area", "Storage", "Zone de préparation"])]
+    })
+
+    start = time.perf_counter()
+    for language, _, message in corpus:
+        response = client.post("/chat/command", headers=headers, json={"message": message, "language": language})
+        response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    print(f"  /chat/command    {len(corpus) / elapsed:12,.0f} commands/s     {elapsed / len(corpus) * 1000:6.2f} ms each"
+          f"   (1 request per command)")
+
+    status_requests = max(len(corpus) // 10, 1)
+    start = time.perf_counter()
+    for _ in range(status_requests):
+        # Previous status answer: every recent log plus the usage report, computed in the browser
+        client.get("/temperature-logs", headers=headers).raise_for_status()
+        client.get("/usage-report", headers=headers).raise_for_status()
+    previous = (time.perf_counter() - start) / status_requests
+    start = time.perf_counter()
+    for _ in range(status_requests):
+        client.post("/chat/command", headers=headers, json={"message": "compliance status"}).raise_for_status()
+    current = (time.perf_counter() - start) / status_requests
+    print(f"  status question  previous {previous * 1000:6.2f} ms (2 requests)   /chat/command {current * 1000:6.2f} ms (1 request)")
+
+
+if __name__ == "__main__":
+    corpus = generate_corpus(args.size, args.seed)
+    print(f"{len(corpus):,} utterances ({sum(1 for item in corpus if item[0] == 'fr'):,} French)")
+    bench_parse(corpus)
+    bench_endpoint(corpus[:args.requests])
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark for concurrent MCP tool calls
+Fires a burst of slow tool calls mixed with quick ones at HACCPMCPServer through its
+MCP call_tool handler and compares them with the previous behaviour, where each
+handler ran its synchronous queries directly on the event loop. Reports wall time
+for the burst, the slowest quick call, and the largest event-loop stall seen by a
+5 ms heartbeat task.
+
+The default slow call is an uncached get_temperature_logs page of 200 rows filtered on an
+equipment id no reading has, so it scans all of the organization's logs (get_compliance_status
+is cached, so repeated calls would only measure the cache).
+
+Usage: python scripts/benchmark_mcp_tools.py [--rows 300000] [--calls 16] [--tool get_temperature_logs]
+       [--tool-args '{"limit": 200, "equipment_id": "EQ-UNUSED"}'] [--quick-tool get_products]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--rows", type=int, default=300000, help="temperature logs to seed")
+parser.add_argument("--calls", type=int, default=16, help="concurrent tool calls per burst")
+parser.add_argument("--tool", default="get_temperature_logs", help="slow tool (must not be cached)")
+parser.add_argument("--tool-args", type=json.loads, default={"limit": 200, "equipment_id": "EQ-UNUSED"},
+                    help="JSON arguments for the slow tool")
+parser.add_argument("--quick-tool", default="get_products", help="quick tool called alongside the slow ones")
+parser.add_argument("--database-url", help="default: a temporary SQLite database")
+args = parser.parse_args()
+
+if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+else:
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'benchmark_mcp.db')}"
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+from mcp.types import CallToolRequest, CallToolRequestParams
+
+from mcp_server import HACCPMCPServer, registry
+from mcp_auth import ToolContext
+from database import SessionLocal
+from models import TemperatureLog
+
+
+def seed(rows):
+    db = SessionLocal()
+    try:
+        existing = db.query(TemperatureLog).count()
+        if existing >= rows:
+            return existing
+        now = datetime.utcnow()
+        db.execute(TemperatureLog.__table__.insert(), [
+            {
+                "organization_id": 1,
+                "location": f"Fridge {i % 20}",
+                "temperature": (i % 9) - 1,
+                "recorded_by": 1,
+                "is_within_limits": i % 9 < 6,
+                "created_at": now - timedelta(minutes=i),
+            }
+            for i in range(rows - existing)
+        ])
+        db.commit()
+        return rows
+    finally:
+        db.close()
+
+
+async def heartbeat(stop, stalls):
+    """Record how late a 5 ms sleep wakes up; a blocked loop shows up as a large stall"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        stalls.append(time.perf_counter() - start - 0.005)
+
+
+async def burst(label, call, calls):
+    stop = asyncio.Event()
+    stalls = []
+    quick_latencies = []
+
+    async def quick():
+        # Measured from the start of the burst: a quick call queued behind blocking ones waits for them
+        await call(args.quick_tool, {})
+        quick_latencies.append(time.perf_counter() - start)
+
+    ticker = asyncio.create_task(heartbeat(stop, stalls))
+    await asyncio.sleep(0.02)
+    start = time.perf_counter()
+    await asyncio.gather(*(coroutine for _ in range(calls) for coroutine in (call(args.tool, args.tool_args), quick())))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    print(f"  {label:<20} {elapsed * 1000:8.1f} ms total   slowest {args.quick_tool} {max(quick_latencies) * 1000:8.1f} ms"
+          f"   max loop stall {max(stalls) * 1000:8.1f} ms")
+    return elapsed
+
+
+async def main():
+    server = HACCPMCPServer(context=ToolContext(user_id=1, organization_id=1))
+    print(f"Seeded {seed(args.rows):,} temperature logs")
+    handler = server.server.request_handlers[CallToolRequest]
+
+    async def via_mcp(name, arguments):
+        request = CallToolRequest(method="tools/call", params=CallToolRequestParams(name=name, arguments=arguments))
+        await handler(request)
+
+    async def blocking(name, arguments):
+        # Previous behaviour: the synchronous queries run on the event loop itself
+        server.invoke(registry.get(name), server.context, arguments)
+
+    await via_mcp(args.tool, args.tool_args)
+    print(f"\n{args.calls} x {args.tool} + {args.calls} x {args.quick_tool}")
+    await burst("blocking (previous)", blocking, args.calls)
+    await burst("executor", via_mcp, args.calls)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the label normalisation engine
+Compares the precompiled recognisers in normalization.py with the previous
+per-call implementation on a generated corpus of label strings.
+
+Usage: python scripts/benchmark_normalization.py [--size 100000] [--seed 42]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+import normalization
+
+PRODUCTS = [
+    "Fresh Chicken Breast", "Organic Salmon Fillet", "Mixed Vegetables", "Ground Beef",
+    "Whole Milk", "Cheddar Cheese", "Orange Juice", "Sourdough Bread", "Frozen Peas",
+    "Turkey Slices", "Tuna Steak", "Cherry Tomatoes", "Greek Yogurt", "Butter Croissant",
+    "Sparkling Water", "Lamb Shoulder", "Strawberry Tart", "Rice Flour", "Olive Oil"
+]
+UNITS = ["kg", "Kilograms", "g", "grams", "lb", "L", "ml", "pcs", "box", "packs", "oz"]
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%Y%m%d", "%d.%m.%Y"]
+
+
+def generate_corpus(size, seed):
+    rnd = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        expiry = datetime(2024, rnd.randint(1, 12), rnd.randint(1, 28))
+        corpus.append({
+            "name": rnd.choice(PRODUCTS),
+            "unit": rnd.choice(UNITS),
+            "date": expiry.strftime(rnd.choice(DATE_FORMATS)),
+        })
+    for item in corpus:
+        item["label"] = f"{item['name']} {rnd.randint(1, 50)} {item['unit']} EXP {item['date']} LOT {rnd.randint(100000, 999999)}"
+    return corpus
+
+
+# Previous implementation, kept here as the baseline
+def legacy_parse_date(date_str):
+    formats = ["%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%Y%m%d", "%d.%m.%Y", "%m.%d.%Y"]
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def legacy_guess_category(product_name):
+    name_lower = product_name.lower()
+    category_keywords = {
+        "meat": ["beef", "pork", "lamb", "veal", "steak", "ground"],
+        "poultry": ["chicken", "turkey", "duck", "goose", "poultry"],
+        "seafood": ["fish", "salmon", "tuna", "shrimp", "crab", "lobster", "seafood"],
+        "dairy": ["milk", "cheese", "butter", "yogurt", "cream", "dairy"],
+        "vegetables": ["carrot", "potato", "onion", "tomato", "lettuce", "vegetable"],
+        "fruits": ["apple", "banana", "orange", "berry", "fruit"],
+        "bakery": ["bread", "roll", "bun", "pastry", "cake", "bakery"],
+        "frozen": ["frozen", "ice"],
+        "beverages": ["juice", "soda", "water", "drink", "beverage"]
+    }
+    for category, keywords in category_keywords.items():
+        if any(keyword in name_lower for keyword in keywords):
+            return category
+    return "other"
+
+
+def legacy_normalize_unit(unit):
+    unit = unit.lower().strip()
+    unit_mapping = {
+        "kg": "kg", "kilogram": "kg", "kilograms": "kg",
+        "g": "g", "gram": "g", "grams": "g",
+        "lb": "lb", "pound": "lb", "pounds": "lb",
+        "oz": "oz", "ounce": "oz", "ounces": "oz",
+        "l": "l", "liter": "l", "liters": "l",
+        "ml": "ml", "milliliter": "ml", "milliliters": "ml",
+        "pcs": "pieces", "piece": "pieces", "pieces": "pieces",
+        "box": "boxes", "boxes": "boxes",
+        "pack": "packs", "packs": "packs"
+    }
+    return unit_mapping.get(unit, unit)
+
+
+def timed(label, func, values):
+    start = time.perf_counter()
+    results = [func(value) for value in values]
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed * 1000:9.1f} ms  ({len(values) / elapsed:,.0f} items/s)")
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.size, args.seed)
+    names = [item["name"] for item in corpus]
+    dates = [item["date"] for item in corpus]
+    units = [item["unit"] for item in corpus]
+    labels = [item["label"] for item in corpus]
+    print(f"Corpus: {len(corpus):,} label strings (seed {args.seed})\n")
+
+    mismatches = 0
+    for title, legacy, current, values in [
+        ("Dates", legacy_parse_date, normalization.parse_date, dates),
+        ("Categories", legacy_guess_category, normalization.guess_category, names),
+        ("Units", legacy_normalize_unit, normalization.normalize_unit, units),
+    ]:
+        print(title)
+        expected, legacy_time = timed("legacy", legacy, values)
+        actual, current_time = timed("precompiled", current, values)
+        mismatches += sum(1 for a, b in zip(expected, actual) if a != b)
+        print(f"  speedup                      {legacy_time / current_time:9.1f}x\n")
+
+    print("Full label lines")
+    timed("parse_label", normalization.parse_label, labels)
+
+    print(f"\nResult mismatches vs legacy: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
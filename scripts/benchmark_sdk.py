@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the async Python SDK against a running server
+Logs the same temperature readings the way api_examples.HACCPAPIClient used to
+(one requests call per reading, a new connection each time) and with
+haccp_sdk.HACCPClient.log_temperatures (pooled connections, bounded concurrency),
+then reads them back page by page with the SDK iterator.
+Point it at a local server; it writes to the logged-in user's organization.
+
+Usage: python scripts/benchmark_sdk.py [--url http://localhost:9001] [--count 1000] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from haccp_sdk import HACCPClient
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--url", default=os.getenv("HACCP_API_URL", "http://localhost:9001"))
+parser.add_argument("--email", default="admin@ai-automorph.com")
+parser.add_argument("--password", default="password")
+parser.add_argument("--count", type=int, default=1000, help="readings logged by each client")
+parser.add_argument("--concurrency", type=int, default=20, help="SDK requests in flight")
+parser.add_argument("--page-size", type=int, default=500)
+args = parser.parse_args()
+
+
+def readings(prefix):
+    return [{"location": f"{prefix} {i % 10}", "temperature": round(-20 + (i % 300) / 10, 1)} for i in range(args.count)]
+
+
+def bench_previous():
+    """The previous client: a module-level requests call per reading"""
+    token = requests.post(f"{args.url}/auth/login", json={"email": args.email, "password": args.password}).json()["access_token"]
+    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+    failed = 0
+    start = time.perf_counter()
+    for reading in readings("Benchmark previous"):
+        if requests.post(f"{args.url}/temperature-logs", json=reading, headers=headers).status_code != 200:
+            failed += 1
+    return time.perf_counter() - start, failed
+
+
+async def bench_sdk(started_at):
+    async with HACCPClient(args.url, email=args.email, password=args.password,
+                           max_connections=args.concurrency) as client:
+        start = time.perf_counter()
+        result = await client.log_temperatures(readings("Benchmark SDK"))
+        write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        read = 0
+        async for log in client.temperature_logs(since=started_at, page_size=args.page_size):
+            read += 1
+        return write, len(result.errors), time.perf_counter() - start, read
+
+
+def report(name, count, elapsed, failed):
+    print(f"  {name:<28} {count / elapsed:10,.0f} readings/s   {elapsed / count * 1000:6.2f} ms each   {failed} failed")
+
+
+if __name__ == "__main__":
+    started_at = datetime.utcnow()
+    print(f"{args.count:,} readings per client against {args.url}")
+    elapsed, failed = bench_previous()
+    report("previous (requests, 1 by 1)", args.count, elapsed, failed)
+    write, failed, read_time, read = asyncio.run(bench_sdk(started_at))
+    report(f"SDK batch ({args.concurrency} in flight)", args.count, write, failed)
+    print(f"  {'SDK paginated read':<28} {read / read_time:10,.0f} logs/s       {read:,} logs in {read_time:.2f}s")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Generate the SDK's typed models from the API schemas
+Reads every Pydantic model in src/backend/schemas.py and writes the same classes
+(fields, types and defaults) to src/haccp_sdk/models.py, so the SDK never drifts
+from what the server accepts and returns. Run it after changing schemas.py.
+
+Usage: python scripts/generate_sdk_models.py [--check]
+"""
+import argparse
+import inspect
+import os
+import sys
+import typing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src', 'backend'))
+
+from pydantic import BaseModel, EmailStr
+
+import schemas
+
+OUTPUT = os.path.join(ROOT, 'src', 'haccp_sdk', 'models.py')
+HEADER = '''"""
+Typed models for the AI-HACCP API
+Generated from src/backend/schemas.py by scripts/generate_sdk_models.py; do not edit.
+"""
+
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel
+'''
+
+
+def render(annotation) -> str:
+    origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+    if origin is typing.Union:
+        members = [arg for arg in args if arg is not type(None)]
+        if len(members) == 1 and len(args) == 2:
+            return f"Optional[{render(members[0])}]"
+        return f"Union[{', '.join(render(arg) for arg in args)}]"
+    if origin in (list, typing.List):
+        return f"List[{render(args[0])}]" if args else "list"
+    if origin in (dict, typing.Dict):
+        return f"Dict[{render(args[0])}, {render(args[1])}]" if args else "dict"
+    if annotation is typing.Any:
+        return "Any"
+    if annotation is EmailStr:
+        return "str"
+    if inspect.isclass(annotation):
+        return annotation.__name__
+    raise ValueError(f"Unsupported annotation: {annotation!r}")
+
+
+def model_source(model) -> str:
+    base = next((cls for cls in model.__bases__ if issubclass(cls, BaseModel) and cls is not BaseModel), None)
+    inherited = base.model_fields if base else {}
+    lines = [f"class {model.__name__}({base.__name__ if base else 'BaseModel'}):"]
+    for name, field in model.model_fields.items():
+        if name in inherited:
+            continue
+        line = f"    {name}: {render(field.annotation)}"
+        if not field.is_required():
+            line += f" = {field.default!r}"
+        lines.append(line)
+    if len(lines) == 1:
+        lines.append("    pass")
+    return "\n".join(lines)
+
+
+def generate() -> str:
+    models = [
+        model for _, model in inspect.getmembers(schemas, inspect.isclass)
+        if issubclass(model, BaseModel) and model.__module__ == schemas.__name__
+    ]
+    # Definition order, so base classes and nested models come first
+    models.sort(key=lambda model: inspect.getsourcelines(model)[1])
+    return HEADER.rstrip("\n") + "".join(f"\n\n\n{model_source(model)}" for model in models) + "\n"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if models.py is out of date")
+    args = parser.parse_args()
+
+    source = generate()
+    if args.check:
+        with open(OUTPUT, encoding="utf-8") as file:
+            current = file.read()
+        if current != source:
+            print(f"{OUTPUT} is out of date; run scripts/generate_sdk_models.py")
+            sys.exit(1)
+        print("SDK models are up to date")
+    else:
+        with open(OUTPUT, "w", encoding="utf-8") as file:
+            file.write(source)
+        print(f"Wrote {source.count('class ')} models to {OUTPUT}")
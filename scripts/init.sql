@@ -22,15 +22,18 @@ CREATE TABLE users (
 );
 
 -- Cost Management
+-- Partitioned by month; retention.py creates upcoming partitions and drops expired ones
 CREATE TABLE usage_logs (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     user_id INTEGER REFERENCES users(id),
     organization_id INTEGER REFERENCES organizations(id),
     action_type VARCHAR(100) NOT NULL, -- api_call, storage, computation
     resource_used DECIMAL(10,6) NOT NULL, -- cost in USD
     metadata JSONB,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+CREATE TABLE usage_logs_default PARTITION OF usage_logs DEFAULT;
 
 -- HACCP Core Tables
 CREATE TABLE hazard_categories (
@@ -76,16 +79,19 @@ CREATE TABLE critical_control_points (
 );
 
 -- Monitoring and Records
+-- Partitioned by month; retention.py creates upcoming partitions and drops expired ones
 CREATE TABLE temperature_logs (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     organization_id INTEGER REFERENCES organizations(id),
     location VARCHAR(255) NOT NULL,
     temperature DECIMAL(5,2) NOT NULL,
     recorded_by INTEGER REFERENCES users(id),
     equipment_id VARCHAR(100),
     is_within_limits BOOLEAN,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+CREATE TABLE temperature_logs_default PARTITION OF temperature_logs DEFAULT;
 
 CREATE TABLE cleaning_records (
     id SERIAL PRIMARY KEY,
@@ -183,6 +189,7 @@ CREATE TABLE cleaning_plans (
     rooms JSONB,
     cleaning_frequency VARCHAR(50) NOT NULL,
     estimated_duration INTEGER,
+    archived_at TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -197,6 +204,31 @@ CREATE TABLE room_cleanings (
     cleaned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Last-cleaned index, maintained on every room cleaning
+CREATE TABLE room_cleaning_status (
+    id SERIAL PRIMARY KEY,
+    organization_id INTEGER NOT NULL REFERENCES organizations(id),
+    cleaning_plan_id INTEGER NOT NULL REFERENCES cleaning_plans(id),
+    room_name VARCHAR(255) NOT NULL,
+    last_cleaned_at TIMESTAMP,
+    last_cleaned_by INTEGER REFERENCES users(id),
+    last_cleaning_id INTEGER REFERENCES room_cleanings(id),
+    CONSTRAINT uq_room_cleaning_status_plan_room UNIQUE (cleaning_plan_id, room_name)
+);
+
+-- Compacted room cleaning history (zlib-compressed JSON per plan and month)
+CREATE TABLE cleaning_archive_segments (
+    id SERIAL PRIMARY KEY,
+    organization_id INTEGER NOT NULL REFERENCES organizations(id),
+    cleaning_plan_id INTEGER NOT NULL REFERENCES cleaning_plans(id),
+    period_start DATE NOT NULL,
+    period_end DATE NOT NULL,
+    record_count INTEGER NOT NULL,
+    payload BYTEA NOT NULL,
+    checksum VARCHAR(64) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Material Reception
 CREATE TABLE material_receptions (
     id SERIAL PRIMARY KEY,
@@ -217,6 +249,168 @@ CREATE TABLE material_receptions (
     received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Barcode index for reception autofill (one row per organization and GTIN-14)
+CREATE TABLE gtin_index (
+    id SERIAL PRIMARY KEY,
+    organization_id INTEGER NOT NULL REFERENCES organizations(id),
+    gtin VARCHAR(14) NOT NULL,
+    product_name VARCHAR(255),
+    category VARCHAR(100),
+    unit VARCHAR(50),
+    supplier_id INTEGER REFERENCES suppliers(id),
+    recent_quantities JSONB,
+    reception_count INTEGER DEFAULT 0,
+    last_received_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_gtin_index_org_gtin UNIQUE (organization_id, gtin)
+);
+
+-- Lot traceability adjacency list
+CREATE TABLE trace_edges (
+    id SERIAL PRIMARY KEY,
+    organization_id INTEGER REFERENCES organizations(id) NOT NULL,
+    src_node VARCHAR(300) NOT NULL,
+    dst_node VARCHAR(300) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Near-expiry and expired alerts raised by the expiry scheduler
+CREATE TABLE expiry_alerts (
+    id SERIAL PRIMARY KEY,
+    organization_id INTEGER REFERENCES organizations(id) NOT NULL,
+    source_type VARCHAR(20) NOT NULL,
+    source_id INTEGER NOT NULL,
+    product_name VARCHAR(255),
+    batch_number VARCHAR(255),
+    expiry_date DATE NOT NULL,
+    level VARCHAR(20) NOT NULL,
+    acknowledged_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_expiry_alerts_source_level UNIQUE (source_type, source_id, level)
+);
+
+-- Running incident counters per organization, severity and category
+CREATE TABLE incident_stats (
+    id SERIAL PRIMARY KEY,
+    organization_id INTEGER REFERENCES organizations(id) NOT NULL,
+    severity VARCHAR(50) NOT NULL,
+    category VARCHAR(100) NOT NULL DEFAULT '',
+    total_count INTEGER NOT NULL DEFAULT 0,
+    open_count INTEGER NOT NULL DEFAULT 0,
+    resolved_count INTEGER NOT NULL DEFAULT 0,
+    resolution_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_incident_stats_org_severity_category UNIQUE (organization_id, severity, category)
+);
+
+-- Background compliance report jobs
+CREATE TABLE report_jobs (
+    id SERIAL PRIMARY KEY,
+    organization_id INTEGER REFERENCES organizations(id) NOT NULL,
+    requested_by INTEGER REFERENCES users(id),
+    format VARCHAR(10) NOT NULL,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    sections JSONB,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    progress DOUBLE PRECISION DEFAULT 0,
+    artifact_path VARCHAR(500),
+    row_count INTEGER,
+    size_bytes INTEGER,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- Background bulk imports
+CREATE TABLE import_jobs (
+    id SERIAL PRIMARY KEY,
+    organization_id INTEGER REFERENCES organizations(id) NOT NULL,
+    requested_by INTEGER REFERENCES users(id),
+    kind VARCHAR(50) NOT NULL,
+    filename VARCHAR(255),
+    upload_path VARCHAR(500),
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    progress DOUBLE PRECISION DEFAULT 0,
+    processed_rows INTEGER DEFAULT 0,
+    inserted_rows INTEGER DEFAULT 0,
+    duplicate_rows INTEGER DEFAULT 0,
+    error_rows INTEGER DEFAULT 0,
+    errors JSONB,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- Aggregates kept after raw rows pass their retention window
+CREATE TABLE temperature_log_rollups (
+    id SERIAL PRIMARY KEY,
+    organization_id INTEGER REFERENCES organizations(id) NOT NULL,
+    day DATE NOT NULL,
+    location VARCHAR(255) NOT NULL,
+    equipment_id VARCHAR(100) NOT NULL DEFAULT '',
+    reading_count INTEGER NOT NULL,
+    out_of_limits_count INTEGER NOT NULL DEFAULT 0,
+    min_temperature DECIMAL(5,2),
+    max_temperature DECIMAL(5,2),
+    avg_temperature DOUBLE PRECISION,
+    CONSTRAINT uq_temperature_rollups_key UNIQUE (organization_id, day, location, equipment_id)
+);
+
+CREATE TABLE usage_log_rollups (
+    id SERIAL PRIMARY KEY,
+    organization_id INTEGER REFERENCES organizations(id) NOT NULL,
+    month DATE NOT NULL,
+    action_type VARCHAR(100) NOT NULL,
+    action_count INTEGER NOT NULL,
+    total_cost DECIMAL(14,6) NOT NULL DEFAULT 0,
+    total_execution_time DOUBLE PRECISION NOT NULL DEFAULT 0,
+    timed_count INTEGER NOT NULL DEFAULT 0,
+    CONSTRAINT uq_usage_rollups_key UNIQUE (organization_id, month, action_type)
+);
+
+-- Cold storage manifest: one Parquet file of aged records per organization, table and month
+CREATE TABLE cold_archive_files (
+    id SERIAL PRIMARY KEY,
+    organization_id INTEGER NOT NULL REFERENCES organizations(id),
+    table_name VARCHAR(50) NOT NULL,
+    period_start DATE NOT NULL,
+    period_end DATE NOT NULL,
+    storage_key VARCHAR(500) NOT NULL UNIQUE,
+    record_count INTEGER NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    checksum VARCHAR(64) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Organizations whose derived tables have been backfilled from existing records
+CREATE TABLE backfill_markers (
+    name VARCHAR(100) NOT NULL,
+    organization_id INTEGER NOT NULL REFERENCES organizations(id),
+    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (name, organization_id)
+);
+
+-- Scheduled job leases (PostgreSQL deployments use advisory locks instead)
+CREATE TABLE job_locks (
+    name VARCHAR(100) PRIMARY KEY,
+    holder VARCHAR(255) NOT NULL,
+    expires_at TIMESTAMP NOT NULL
+);
+
+-- API keys for MCP clients (SHA-256 of the key only)
+CREATE TABLE api_keys (
+    id SERIAL PRIMARY KEY,
+    organization_id INTEGER NOT NULL REFERENCES organizations(id),
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    name VARCHAR(255) NOT NULL,
+    key_prefix VARCHAR(16) NOT NULL,
+    key_hash VARCHAR(64) NOT NULL UNIQUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP,
+    revoked_at TIMESTAMP
+);
+
 -- Insert default configuration parameters
 INSERT INTO configuration (parameter, value) VALUES
 ('temperature_alert_threshold', '5.0'),
@@ -241,5 +435,23 @@ CREATE INDEX idx_usage_logs_org_date ON usage_logs(organization_id, created_at);
 CREATE INDEX idx_temperature_logs_org_date ON temperature_logs(organization_id, created_at);
 CREATE INDEX idx_batch_tracking_batch ON batch_tracking(batch_number);
 CREATE INDEX idx_incidents_org_status ON incidents(organization_id, status);
+CREATE INDEX idx_incidents_org_status_created ON incidents(organization_id, status, created_at);
+CREATE INDEX idx_incidents_org_created ON incidents(organization_id, created_at);
 CREATE INDEX idx_configuration_parameter ON configuration(parameter);
-CREATE INDEX idx_material_receptions_org_date ON material_receptions(organization_id, received_at);
\ No newline at end of file
+CREATE INDEX idx_material_receptions_org_date ON material_receptions(organization_id, received_at);
+CREATE INDEX idx_room_cleanings_plan_room ON room_cleanings(cleaning_plan_id, room_name, cleaned_at);
+CREATE INDEX idx_material_receptions_org_batch ON material_receptions(organization_id, batch_number);
+CREATE INDEX idx_batch_tracking_org_expiry ON batch_tracking(organization_id, expiry_date);
+CREATE INDEX idx_material_receptions_org_expiry ON material_receptions(organization_id, expiry_date);
+CREATE INDEX idx_expiry_alerts_org_created ON expiry_alerts(organization_id, created_at);
+CREATE INDEX idx_cleaning_records_org_date ON cleaning_records(organization_id, created_at);
+CREATE INDEX idx_room_cleanings_org_date ON room_cleanings(organization_id, cleaned_at);
+CREATE INDEX idx_products_org_name ON products(organization_id, name);
+CREATE INDEX idx_suppliers_org_name ON suppliers(organization_id, name);
+CREATE INDEX idx_temperature_logs_org_location_date ON temperature_logs(organization_id, location, created_at);
+CREATE INDEX idx_import_jobs_org_created ON import_jobs(organization_id, created_at);
+CREATE INDEX idx_report_jobs_org_created ON report_jobs(organization_id, created_at);
+CREATE INDEX idx_trace_edges_src ON trace_edges(organization_id, src_node);
+CREATE INDEX idx_trace_edges_dst ON trace_edges(organization_id, dst_node);
+CREATE INDEX idx_cleaning_archive_plan_period ON cleaning_archive_segments(cleaning_plan_id, period_start);
+CREATE INDEX idx_cold_archive_org_table_period ON cold_archive_files(organization_id, table_name, period_start);
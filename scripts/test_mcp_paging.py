@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for MCP keyset paging
+Seeds a temporary SQLite database with temperature logs written in the same second,
+both through the server default (stored without microseconds) and with explicit
+timestamps, then pages through get_temperature_logs and checks every log comes
+back exactly once, newest first, and that paging terminates.
+
+Usage: python scripts/test_mcp_paging.py
+"""
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test_mcp_paging.db')}"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+from database import SessionLocal, init_database
+from models import TemperatureLog
+from mcp_auth import ToolContext
+from mcp_tools import registry
+
+SAME_SECOND_ROWS = 25
+TIMESTAMPED_ROWS = 15
+
+
+def seed(db):
+    # One multi-row INSERT: every row gets the same CURRENT_TIMESTAMP
+    db.execute(TemperatureLog.__table__.insert(), [
+        {"organization_id": 1, "location": f"Fridge {i % 3}", "temperature": 3, "recorded_by": 1, "is_within_limits": True}
+        for i in range(SAME_SECOND_ROWS)
+    ])
+    moment = datetime.utcnow().replace(microsecond=0) - timedelta(minutes=5)
+    db.add_all([
+        TemperatureLog(organization_id=1, location="Freezer", temperature=-18, recorded_by=1,
+                       is_within_limits=True, created_at=moment)
+        for _ in range(TIMESTAMPED_ROWS)
+    ])
+    db.commit()
+    return [log_id for (log_id,) in db.query(TemperatureLog.id).order_by(
+        TemperatureLog.created_at.desc(), TemperatureLog.id.desc()
+    )]
+
+
+def page_through(db, limit):
+    spec = registry.get("get_temperature_logs")
+    context = ToolContext(user_id=1, organization_id=1)
+    seen = []
+    cursor = None
+    # More pages than rows means the cursor stopped advancing
+    for _ in range(SAME_SECOND_ROWS + TIMESTAMPED_ROWS + 2):
+        arguments = {"limit": limit}
+        if cursor:
+            arguments["cursor"] = cursor
+        page = json.loads(spec.handler(db, context, arguments))
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return seen
+    raise AssertionError(f"paging with limit={limit} did not terminate after {len(seen)} items")
+
+
+def test_same_second_paging():
+    """Every page size returns each log exactly once, in the same order as one query"""
+    init_database()
+    db = SessionLocal()
+    try:
+        expected = seed(db)
+        for limit in (1, 2, 7, 10, 100):
+            seen = page_through(db, limit)
+            if seen != expected:
+                print(f"✗ limit={limit}: got {len(seen)} ids, expected {len(expected)}")
+                return False
+            print(f"✓ limit={limit}: {len(seen)} logs, each once")
+        return True
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    try:
+        success = test_same_second_paging()
+    except AssertionError as e:
+        print(f"✗ {e}")
+        success = False
+    print(f"\nMCP paging: {'✅ PASS' if success else '❌ FAIL'}")
+    sys.exit(0 if success else 1)
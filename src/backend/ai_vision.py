@@ -6,19 +6,21 @@ Analyzes images to extract product information
 import base64
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
-from typing import Dict, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 import logging
 
+from vision_cache import create_vision_cache, image_content_key, decode_image_data, image_bytes_key
+import normalization
+from gtin_index import is_valid_gtin
+
 logger = logging.getLogger(__name__)
 
 class AIVisionService:
-    def __init__(self):
-        self.food_categories = [
-            "meat", "poultry", "seafood", "dairy", "vegetables", "fruits",
-            "grains", "bakery", "frozen", "canned", "beverages", "spices",
-            "oils", "condiments", "snacks", "desserts"
-        ]
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.food_categories = normalization.FOOD_CATEGORIES
     
     def analyze_reception_image(self, image_data: str) -> Dict[str, Any]:
         """
@@ -26,18 +28,17 @@ class AIVisionService:
         This is a mock implementation - in production, integrate with OpenAI Vision API or similar
         """
         try:
+            cache_key = None
+            if self.cache is not None:
+                cache_key = image_content_key(image_data)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    cached["cached"] = True
+                    return cached
+            
             # Mock AI analysis - replace with actual AI service
             analysis = self._mock_ai_analysis(image_data)
-            
-            # Process and validate results
-            processed_analysis = self._process_analysis_results(analysis)
-            
-            return {
-                "success": True,
-                "analysis": processed_analysis,
-                "confidence": analysis.get("confidence", 0.8),
-                "timestamp": datetime.utcnow().isoformat()
-            }
+            return self._build_result(analysis, cache_key)
             
         except Exception as e:
             logger.error(f"AI vision analysis failed: {e}")
@@ -47,6 +48,92 @@ class AIVisionService:
                 "timestamp": datetime.utcnow().isoformat()
             }
     
+    def analyze_batch(self, images: List[str], max_workers: int = 4, batch_size: int = 8) -> Iterator[Dict[str, Any]]:
+        """
+        Analyze many reception images, yielding one result per image as soon as it is ready.
+        Decoding and hashing run concurrently in a thread pool; uncached images are sent to
+        the analysis backend in micro-batches of batch_size. Every result carries the
+        "index" of its input image, and a failing image never fails the rest of the batch.
+        """
+        pending = []
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # pool.map keeps input order while decoding ahead of the consumer
+            for index, prepared in enumerate(pool.map(self._prepare_image, images)):
+                if "error" in prepared:
+                    yield self._error_result(index, prepared["error"])
+                    continue
+                if self.cache is not None:
+                    cached = self.cache.get(prepared["cache_key"])
+                    if cached is not None:
+                        cached["cached"] = True
+                        cached["index"] = index
+                        yield cached
+                        continue
+                pending.append((index, images[index], prepared["cache_key"]))
+                if len(pending) >= batch_size:
+                    yield from self._analyze_micro_batch(pending)
+                    pending = []
+        if pending:
+            yield from self._analyze_micro_batch(pending)
+    
+    def _prepare_image(self, image_data: str) -> Dict[str, Any]:
+        """Decode and fingerprint one image; runs in a worker thread"""
+        try:
+            raw = decode_image_data(image_data)
+            if not raw:
+                return {"error": "Empty image"}
+            return {"cache_key": image_bytes_key(raw)}
+        except Exception as e:
+            return {"error": f"Invalid image data: {e}"}
+    
+    def _analyze_micro_batch(self, items: List[tuple]) -> Iterator[Dict[str, Any]]:
+        try:
+            analyses = self._mock_ai_analysis_batch([image_data for _, image_data, _ in items])
+        except Exception as e:
+            logger.error(f"AI vision batch analysis failed: {e}")
+            for index, _, _ in items:
+                yield self._error_result(index, str(e))
+            return
+        
+        for (index, _, cache_key), analysis in zip(items, analyses):
+            try:
+                result = self._build_result(analysis, cache_key)
+            except Exception as e:
+                logger.error(f"AI vision analysis failed for image {index}: {e}")
+                result = self._error_result(index, str(e))
+            result["index"] = index
+            yield result
+    
+    def _build_result(self, analysis: Dict[str, Any], cache_key: Optional[str]) -> Dict[str, Any]:
+        # Process and validate results
+        processed_analysis = self._process_analysis_results(analysis)
+        
+        result = {
+            "success": True,
+            "analysis": processed_analysis,
+            "confidence": analysis.get("confidence", 0.8),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        if cache_key is not None and self.cache is not None:
+            self.cache.put(cache_key, result)
+        result["cached"] = False
+        return result
+    
+    def _error_result(self, index: int, error: str) -> Dict[str, Any]:
+        return {
+            "index": index,
+            "success": False,
+            "error": error,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    
+    def _mock_ai_analysis_batch(self, images: List[str]) -> List[Dict[str, Any]]:
+        """
+        Mock batched AI analysis - one backend call for several images
+        In production, send the images in a single multi-image request
+        """
+        return [self._mock_ai_analysis(image_data) for image_data in images]
+    
     def _mock_ai_analysis(self, image_data: str) -> Dict[str, Any]:
         """
         Mock AI analysis - replace with actual AI service call
@@ -57,7 +144,7 @@ class AIVisionService:
             {
                 "product_name": "Fresh Chicken Breast",
                 "category": "poultry",
-                "barcode": "1234567890123",
+                "barcode": "1234567890128",
                 "quantity": "2.5",
                 "unit": "kg",
                 "expiry_date": "2024-02-15",
@@ -67,7 +154,7 @@ class AIVisionService:
             {
                 "product_name": "Organic Salmon Fillet",
                 "category": "seafood",
-                "barcode": "9876543210987",
+                "barcode": "9876543210982",
                 "quantity": "1.8",
                 "unit": "kg",
                 "expiry_date": "2024-02-10",
@@ -77,7 +164,7 @@ class AIVisionService:
             {
                 "product_name": "Mixed Vegetables",
                 "category": "vegetables",
-                "barcode": "5555666677778",
+                "barcode": "5555666677776",
                 "quantity": "5",
                 "unit": "kg",
                 "expiry_date": "2024-02-20",
@@ -134,9 +221,7 @@ class AIVisionService:
     
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text"""
-        if not text:
-            return ""
-        return re.sub(r'\s+', ' ', text.strip())
+        return normalization.clean_text(text)
     
     def _clean_barcode(self, barcode: str) -> str:
         """Clean barcode - remove non-numeric characters"""
@@ -146,75 +231,24 @@ class AIVisionService:
     
     def _is_valid_barcode(self, barcode: str) -> bool:
         """Validate barcode format"""
-        if not barcode:
-            return False
-        # Check common barcode lengths (UPC, EAN, etc.)
-        return len(barcode) in [8, 12, 13, 14]
+        # Length and GS1 check digit (UPC, EAN, GTIN-14)
+        return is_valid_gtin(barcode)
     
     def _normalize_unit(self, unit: str) -> str:
         """Normalize unit of measurement"""
-        if not unit:
-            return "pieces"
-        
-        unit = unit.lower().strip()
-        unit_mapping = {
-            "kg": "kg", "kilogram": "kg", "kilograms": "kg",
-            "g": "g", "gram": "g", "grams": "g",
-            "lb": "lb", "pound": "lb", "pounds": "lb",
-            "oz": "oz", "ounce": "oz", "ounces": "oz",
-            "l": "l", "liter": "l", "liters": "l",
-            "ml": "ml", "milliliter": "ml", "milliliters": "ml",
-            "pcs": "pieces", "piece": "pieces", "pieces": "pieces",
-            "box": "boxes", "boxes": "boxes",
-            "pack": "packs", "packs": "packs"
-        }
-        
-        return unit_mapping.get(unit, unit)
+        return normalization.normalize_unit(unit)
     
     def _parse_date(self, date_str: str) -> Optional[date]:
         """Parse date from various formats"""
-        if not date_str:
-            return None
-        
-        # Common date formats
-        formats = [
-            "%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y",
-            "%Y%m%d", "%d.%m.%Y", "%m.%d.%Y"
-        ]
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt).date()
-            except ValueError:
-                continue
-        
-        return None
+        return normalization.parse_date(date_str)
     
     def _guess_category(self, product_name: str) -> str:
         """Guess food category from product name"""
-        if not product_name:
-            return "other"
-        
-        name_lower = product_name.lower()
-        
-        # Category keywords
-        category_keywords = {
-            "meat": ["beef", "pork", "lamb", "veal", "steak", "ground"],
-            "poultry": ["chicken", "turkey", "duck", "goose", "poultry"],
-            "seafood": ["fish", "salmon", "tuna", "shrimp", "crab", "lobster", "seafood"],
-            "dairy": ["milk", "cheese", "butter", "yogurt", "cream", "dairy"],
-            "vegetables": ["carrot", "potato", "onion", "tomato", "lettuce", "vegetable"],
-            "fruits": ["apple", "banana", "orange", "berry", "fruit"],
-            "bakery": ["bread", "roll", "bun", "pastry", "cake", "bakery"],
-            "frozen": ["frozen", "ice"],
-            "beverages": ["juice", "soda", "water", "drink", "beverage"]
-        }
-        
-        for category, keywords in category_keywords.items():
-            if any(keyword in name_lower for keyword in keywords):
-                return category
-        
-        return "other"
+        return normalization.guess_category(product_name)
+    
+    def normalize_labels(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Extract category, quantity/unit and expiry date from a batch of OCR'd label lines"""
+        return normalization.parse_labels(texts)
 
 # Global instance
-ai_vision_service = AIVisionService()
\ No newline at end of file
+ai_vision_service = AIVisionService(cache=create_vision_cache())
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""
+Per-Organization Backfill Markers
+Derived tables (incident counters, the GTIN index, last-cleaned rows, trace
+edges) are maintained as records are written, but organizations with history
+from before a table existed need one full build first. A marker row records
+that the build ran, so it happens exactly once per organization even when the
+derived table already holds rows written since the upgrade.
+"""
+
+import logging
+from typing import Any, Callable, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import insert_missing
+from models import BackfillMarker
+
+logger = logging.getLogger(__name__)
+
+
+class BackfillMarkers:
+    def __init__(self):
+        # Markers are never removed, so a marker seen once can be trusted for the process lifetime
+        self._done: Set[Tuple[str, int]] = set()
+
+    def done(self, db: Session, name: str, organization_id: int) -> bool:
+        if (name, organization_id) in self._done:
+            return True
+        if db.query(BackfillMarker.name).filter(
+            BackfillMarker.name == name,
+            BackfillMarker.organization_id == organization_id
+        ).first() is None:
+            return False
+        self._done.add((name, organization_id))
+        return True
+
+    def ensure(self, db: Session, name: str, organization_id: int, build: Callable[[], Any]) -> bool:
+        """Run build() (which commits) unless the organization is already marked; True if it ran"""
+        if self.done(db, name, organization_id):
+            return False
+        build()
+        insert_missing(db, BackfillMarker, [{"name": name, "organization_id": organization_id}])
+        db.commit()
+        self._done.add((name, organization_id))
+        logger.info(f"Backfilled {name} for organization {organization_id}")
+        return True
+
+# Global instance
+backfills = BackfillMarkers()
@@ -0,0 +1,399 @@
+"""
+Bulk Import Pipeline
+Streams uploaded CSV/XLSX files of products, suppliers or historical
+temperature logs, validates rows in chunks, skips records that already exist
+(matched on indexed natural keys) and writes the rest with one multi-row
+INSERT per chunk, or COPY on PostgreSQL. Jobs run in the background and report
+progress and per-row errors.
+"""
+
+import csv
+import io
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models import Product, Supplier, TemperatureLog, ImportJob
+
+logger = logging.getLogger(__name__)
+
+IMPORT_DIR = os.getenv("IMPORT_DIR", "data/imports")
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "2"))
+# Largest accepted upload; bigger files are rejected with 413 before a job is queued
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(100 * 1024 * 1024)))
+CHUNK_SIZE = 2000
+MAX_ERRORS = 500
+EXTENSIONS = (".csv", ".xlsx")
+# Imported decimals are DECIMAL(5,2) columns and integers are 32-bit INTEGER columns
+DECIMAL_LIMIT = Decimal("1000")
+INTEGER_LIMIT = Decimal(2 ** 31)
+
+TIMESTAMP_FORMATS = ("%Y-%m-%d %H:%M", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y", "%m/%d/%Y %H:%M")
+TRUE_VALUES = {"true", "yes", "y", "1", "oui", "ok"}
+FALSE_VALUES = {"false", "no", "n", "0", "non"}
+
+
+class RowError(ValueError):
+    pass
+
+
+def _text(row: Dict[str, Any], *names: str, required: bool = False, max_length: int = 255) -> Optional[str]:
+    for name in names:
+        value = row.get(name)
+        if value is not None and str(value).strip() != "":
+            text = str(value).strip()
+            if len(text) > max_length:
+                raise RowError(f"{names[0]} is longer than {max_length} characters")
+            return text
+    if required:
+        raise RowError(f"{names[0]} is required")
+    return None
+
+
+def _decimal(row: Dict[str, Any], *names: str, required: bool = False,
+             limit: Decimal = DECIMAL_LIMIT) -> Optional[Decimal]:
+    text = _text(row, *names, required=required)
+    if text is None:
+        return None
+    try:
+        value = Decimal(text.replace(",", "."))
+    except InvalidOperation:
+        raise RowError(f"{names[0]} is not a number: {text}")
+    # NaN and infinity parse as Decimals but cannot be stored or converted to int
+    if not value.is_finite():
+        raise RowError(f"{names[0]} is not a number: {text}")
+    if abs(value) >= limit:
+        raise RowError(f"{names[0]} is out of range: {text}")
+    return value
+
+
+def _integer(row: Dict[str, Any], *names: str) -> Optional[int]:
+    value = _decimal(row, *names, limit=INTEGER_LIMIT)
+    return int(value) if value is not None else None
+
+
+def _boolean(row: Dict[str, Any], *names: str) -> Optional[bool]:
+    text = _text(row, *names)
+    if text is None:
+        return None
+    if text.lower() in TRUE_VALUES:
+        return True
+    if text.lower() in FALSE_VALUES:
+        return False
+    raise RowError(f"{names[0]} must be yes or no: {text}")
+
+
+def _timestamp(row: Dict[str, Any], *names: str) -> datetime:
+    for name in names:
+        value = row.get(name)
+        if isinstance(value, datetime):
+            return value
+    text = _text(row, *names, required=True)
+    try:
+        return datetime.fromisoformat(text.replace("Z", "")).replace(tzinfo=None)
+    except ValueError:
+        pass
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    raise RowError(f"{names[0]} is not a recognised date/time: {text}")
+
+
+def _list(row: Dict[str, Any], *names: str) -> Optional[List[str]]:
+    text = _text(row, *names, max_length=2000)
+    if text is None:
+        return None
+    return [item.strip() for item in text.replace(";", ",").split(",") if item.strip()]
+
+
+class ImportKind:
+    """Row validation and natural-key dedup for one target table"""
+
+    def __init__(self, model, parse: Callable[[Dict[str, Any]], Dict[str, Any]],
+                 key: Callable[[Dict[str, Any]], Tuple], existing: Callable[[Session, int, List[Dict[str, Any]]], Set[Tuple]],
+                 preload: bool = False):
+        self.model = model
+        self.parse = parse
+        self.key = key
+        self.existing = existing
+        # Small catalog tables are loaded once per job instead of per chunk
+        self.preload = preload
+
+
+def _parse_product(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "name": _text(row, "name", "product", "product_name", required=True),
+        "category": _text(row, "category", max_length=100),
+        "allergens": _list(row, "allergens"),
+        "shelf_life_days": _integer(row, "shelf_life_days", "shelf_life"),
+        "storage_temp_min": _decimal(row, "storage_temp_min", "temp_min"),
+        "storage_temp_max": _decimal(row, "storage_temp_max", "temp_max"),
+    }
+
+
+def _parse_supplier(row: Dict[str, Any]) -> Dict[str, Any]:
+    contact_info = {
+        field: _text(row, field, max_length=500)
+        for field in ("contact_person", "email", "phone", "address")
+        if _text(row, field, max_length=500)
+    }
+    return {
+        "name": _text(row, "name", "supplier", "supplier_name", required=True),
+        "contact_info": contact_info or None,
+        "certification_status": _text(row, "certification_status", "certification", max_length=50),
+        "risk_level": _integer(row, "risk_level", "risk") or 1,
+    }
+
+
+def _parse_temperature_log(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "location": _text(row, "location", required=True),
+        "temperature": _decimal(row, "temperature", "temp", "temperature_c", required=True),
+        "equipment_id": _text(row, "equipment_id", "equipment", max_length=100),
+        "is_within_limits": _boolean(row, "is_within_limits", "within_limits", "ok"),
+        "created_at": _timestamp(row, "recorded_at", "created_at", "timestamp", "date"),
+    }
+
+
+def _existing_names(model):
+    def existing(db: Session, organization_id: int, records: List[Dict[str, Any]]) -> Set[Tuple]:
+        return {(name.lower(),) for (name,) in db.query(model.name).filter(model.organization_id == organization_id)}
+    return existing
+
+
+def _existing_temperature_logs(db: Session, organization_id: int, records: List[Dict[str, Any]]) -> Set[Tuple]:
+    timestamps = {record["created_at"] for record in records}
+    rows = db.query(TemperatureLog.location, TemperatureLog.created_at).filter(
+        TemperatureLog.organization_id == organization_id,
+        TemperatureLog.created_at.in_(timestamps)
+    )
+    return {(location, created_at) for location, created_at in rows}
+
+
+KINDS: Dict[str, ImportKind] = {
+    "products": ImportKind(Product, _parse_product, lambda record: (record["name"].lower(),),
+                           _existing_names(Product), preload=True),
+    "suppliers": ImportKind(Supplier, _parse_supplier, lambda record: (record["name"].lower(),),
+                            _existing_names(Supplier), preload=True),
+    "temperature_logs": ImportKind(TemperatureLog, _parse_temperature_log,
+                                   lambda record: (record["location"], record["created_at"]),
+                                   _existing_temperature_logs),
+}
+
+
+def _normalize_header(name: Any) -> str:
+    return str(name or "").strip().lower().replace(" ", "_").replace("-", "_")
+
+
+def read_rows(path: str) -> Iterator[Tuple[Dict[str, Any], float]]:
+    """Yield (row, fraction of the file read) without loading the whole file"""
+    if path.lower().endswith(".xlsx"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise RuntimeError("openpyxl is required to import XLSX files")
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            total = max((sheet.max_row or 1) - 1, 1)
+            rows = sheet.iter_rows(values_only=True)
+            header = [_normalize_header(cell) for cell in next(rows, [])]
+            for position, values in enumerate(rows, 1):
+                if values and any(value is not None for value in values):
+                    yield dict(zip(header, values)), min(position / total, 1.0)
+        finally:
+            workbook.close()
+        return
+
+    size = max(os.path.getsize(path), 1)
+    with open(path, "rb") as raw:
+        stream = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        sample = stream.read(4096)
+        stream.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(stream, dialect)
+        header = [_normalize_header(cell) for cell in next(reader, [])]
+        for values in reader:
+            if any(value.strip() for value in values):
+                yield dict(zip(header, values)), min(raw.tell() / size, 1.0)
+
+
+class ImportPipeline:
+    def __init__(self, import_dir: str = IMPORT_DIR, workers: int = IMPORT_WORKERS):
+        self.import_dir = import_dir
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="import")
+
+    def upload_path(self, organization_id: int, job_id: int, filename: str) -> str:
+        directory = os.path.join(self.import_dir, str(organization_id))
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"import-{job_id}{os.path.splitext(filename)[1].lower()}")
+
+    def submit(self, job_id: int):
+        self.executor.submit(self.run, job_id)
+
+    def run(self, job_id: int):
+        """Import a queued job in its own session; failures are recorded on the job"""
+        from job_lock import job_locks
+
+        # Held while importing, so recover() can tell a running job from one whose worker died
+        with job_locks.hold(f"import-{job_id}") as acquired:
+            if acquired:
+                self._import(job_id)
+
+    def recover(self):
+        """Re-queue jobs left queued or running by a worker that stopped; called at startup"""
+        from database import SessionLocal
+        from job_lock import job_locks
+
+        db = SessionLocal()
+        try:
+            jobs = db.query(ImportJob).filter(ImportJob.status.in_(("queued", "running"))).all()
+            for job in jobs:
+                with job_locks.hold(f"import-{job.id}") as acquired:
+                    if not acquired:
+                        continue
+                    # The job may have finished between the query and taking its lock
+                    db.refresh(job)
+                    if job.status not in ("queued", "running"):
+                        continue
+                    if not job.upload_path or not os.path.exists(job.upload_path):
+                        logger.warning(f"Import job {job.id} lost its upload in a restart")
+                        job.status = "failed"
+                        job.error = "The upload was interrupted; please import the file again"
+                        job.finished_at = datetime.utcnow()
+                        db.commit()
+                        continue
+                    if job.status == "running":
+                        # Chunks already written are skipped as duplicates on the second pass
+                        logger.info(f"Re-queueing interrupted import job {job.id}")
+                        job.status = "queued"
+                        db.commit()
+                self.submit(job.id)
+        finally:
+            db.close()
+
+    def _import(self, job_id: int):
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+            if not job or job.status != "queued":
+                return
+            job.status = "running"
+            db.commit()
+            try:
+                self.import_file(db, job)
+                job.status = "done"
+            except Exception as e:
+                logger.error(f"Import job {job.id} failed: {e}")
+                db.rollback()
+                job.status = "failed"
+                job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            if job.upload_path and os.path.exists(job.upload_path):
+                os.remove(job.upload_path)
+        finally:
+            db.close()
+
+    def import_file(self, db: Session, job: ImportJob):
+        kind = KINDS[job.kind]
+        errors: List[Dict[str, Any]] = []
+        seen: Set[Tuple] = set()
+        existing = kind.existing(db, job.organization_id, []) if kind.preload else None
+        chunk: List[Tuple[int, Dict[str, Any]]] = []
+        counters = {"processed": 0, "inserted": 0, "duplicates": 0, "errors": 0}
+        progress = 0.0
+
+        for line, (row, progress) in enumerate(read_rows(job.upload_path), 2):
+            chunk.append((line, row))
+            if len(chunk) >= CHUNK_SIZE:
+                self._import_chunk(db, job, kind, chunk, seen, existing, errors, counters)
+                self._report(db, job, counters, errors, progress)
+                chunk = []
+        if chunk:
+            self._import_chunk(db, job, kind, chunk, seen, existing, errors, counters)
+        self._report(db, job, counters, errors, 1.0)
+        logger.info(f"Import job {job.id} ({job.kind}): {counters}")
+
+    def _import_chunk(self, db: Session, job: ImportJob, kind: ImportKind, chunk: List[Tuple[int, Dict[str, Any]]],
+                      seen: Set[Tuple], existing: Optional[Set[Tuple]], errors: List[Dict[str, Any]],
+                      counters: Dict[str, int]):
+        records = []
+        for line, row in chunk:
+            try:
+                record = kind.parse(row)
+            except RowError as e:
+                counters["errors"] += 1
+                if len(errors) < MAX_ERRORS:
+                    errors.append({"row": line, "error": str(e)})
+                continue
+            key = kind.key(record)
+            if key in seen:
+                counters["duplicates"] += 1
+                continue
+            seen.add(key)
+            records.append(record)
+        counters["processed"] += len(chunk)
+        if not records:
+            return
+
+        known = existing if existing is not None else kind.existing(db, job.organization_id, records)
+        new_records = []
+        for record in records:
+            if kind.key(record) in known:
+                counters["duplicates"] += 1
+            else:
+                record["organization_id"] = job.organization_id
+                if kind.model is TemperatureLog:
+                    record["recorded_by"] = job.requested_by
+                new_records.append(record)
+        if new_records:
+            self._bulk_insert(db, kind.model, new_records)
+            counters["inserted"] += len(new_records)
+
+    def _bulk_insert(self, db: Session, model, records: List[Dict[str, Any]]):
+        if model is TemperatureLog and db.get_bind().dialect.driver == "psycopg2":
+            self._copy(db, model.__table__.name, records)
+        else:
+            # executemany; SQLAlchemy batches it into multi-row INSERT statements
+            db.execute(insert(model), records)
+
+    def _copy(self, db: Session, table: str, records: List[Dict[str, Any]]):
+        columns = list(records[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for record in records:
+            writer.writerow(["" if record[column] is None else record[column] for column in columns])
+        buffer.seek(0)
+        cursor = db.connection().connection.cursor()
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    def _report(self, db: Session, job: ImportJob, counters: Dict[str, int], errors: List[Dict[str, Any]],
+                progress: float):
+        from job_lock import job_locks
+
+        # Commits the chunk together with the progress counters
+        job.processed_rows = counters["processed"]
+        job.inserted_rows = counters["inserted"]
+        job.duplicate_rows = counters["duplicates"]
+        job.error_rows = counters["errors"]
+        job.errors = list(errors)
+        job.progress = round(progress, 4)
+        db.commit()
+        job_locks.renew(f"import-{job.id}")
+
+# Global instance
+import_pipeline = ImportPipeline()
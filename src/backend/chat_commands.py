@@ -0,0 +1,320 @@
+"""
+AI Chat Commands
+Parses chat messages (English or French) with a compiled intent/slot grammar and
+runs the matching action server-side, so every message is one round trip. The
+grammar and the response templates are built once, at import.
+"""
+
+import re
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Any
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ai_chat_french import FRENCH_RESPONSES
+from models import User, TemperatureLog, Product, CleaningPlan, Incident, UsageLog, UsageLogRollup, UserTemperatureRange
+
+logger = logging.getLogger(__name__)
+
+LANGUAGES = ("en", "fr")
+PRODUCTS_SHOWN = 10
+
+ENGLISH_RESPONSES = {
+    'temperature_success': '🌡️ Temperature logged:\n• Location: {location}\n• Temperature: {temperature}°C\n• Status: {status}',
+    'temperature_error': '❌ Failed to log temperature. Please check your input.',
+    'temperature_help': 'Please specify temperature and location. Example: "add temperature of fridge1 to 10 degrees"',
+
+    'product_success': '✅ Product "{name}" added successfully.',
+    'product_error': '❌ Failed to add product. Please try again.',
+    'product_help': 'Please specify the product name. Example: "add product fresh salmon with allergens fish"',
+
+    'room_success': '🧹 Room "{room}" marked as cleaned.',
+    'room_error': '❌ Failed to mark room as cleaned. Please check the room name.',
+    'room_help': 'Please specify the room name. Example: "clean kitchen"',
+
+    'incident_success': '❗ Incident reported:\n• {title}\n• Severity: {severity}\n• Status: Open - requires attention',
+    'incident_help': 'Please describe the incident. Example: "report high incident temperature in freezer"',
+
+    'compliance_status': '📊 HACCP Compliance Status: {status} ({score}/100)\n\n• Temperature Alerts ({window_hours}h): {breaches}\n• Open Incidents: {incidents}\n• Overdue Cleanings: {overdue}\n• Expired Lots: {expired}\n\n{message}',
+    'compliance_error': '❌ Failed to get compliance status.',
+
+    'products_empty': 'No products found.',
+    'products_list': '📦 Products:\n\n',
+    'products_error': '❌ Failed to fetch products.',
+
+    'usage_report': '💰 Usage Report:\n\n• Total: ${total}\n• Monthly: ${monthly}\n• Savings: ~85%\n\n💡 Serverless efficiency!',
+    'usage_error': '❌ Failed to get report.',
+
+    'help_message': '🤖 Available commands:\n\n🌡️ "add temperature of fridge1 to 10 degrees"\n🥘 "add product fresh salmon with allergens fish"\n🧹 "clean kitchen"\n❗ "report high incident temperature in freezer"\n📊 "compliance status"\n📦 "list products"\n💰 "usage report"',
+
+    'default_response': '🤔 I understood: "{input}"\n\nI can help with temperatures, products, cleaning and reports. Say "help" for examples.',
+
+    'error_general': '❌ Sorry, I encountered an error processing your request. Please try again.',
+
+    'status_normal': '✅ Normal',
+    'status_alert': '⚠️ Alert',
+    'compliance_compliant': '🟢 Compliant',
+    'compliance_attention_required': '🟡 Attention Required',
+    'compliance_non_compliant': '🔴 Non-Compliant',
+    'compliance_ok': '✅ All normal',
+    'compliance_action': '⚠️ Action required to maintain compliance',
+    'product_line': '• {name}{details}',
+    'products_more': '\n... and {count} more'
+}
+
+# Bound str.format of every template, per language
+RESPONSES = {
+    language: {key: template.format for key, template in templates.items()}
+    for language, templates in (("en", ENGLISH_RESPONSES), ("fr", FRENCH_RESPONSES))
+}
+
+_NUMBER = r"(?P<temperature>[-+−]?\d+(?:[.,]\d+)?)"
+_DEGREES = r"\s*(?:°\s*c?|degr[eé]e?s?|deg|c)?"
+_ARTICLE_EN = r"(?:the\s+|our\s+)?"
+_ARTICLE_FR = r"(?:la\s+|le\s+|les\s+|l['’]\s*|du\s+|de\s+la\s+)?"
+
+# (intent, pattern) in priority order; named groups are the intent's slots
+GRAMMAR: Dict[str, List[Tuple[str, str]]] = {
+    "en": [
+        ("help", r"^(?:help|\?|what can you do|commands)$"),
+        ("log_temperature", rf"^(?:add|log|record|note|set)\s+(?:a\s+)?(?:temperature|temp)\s+(?:of|in|at|for)\s+{_ARTICLE_EN}(?P<location>.+?)\s+(?:to|at|as|is|=)\s+{_NUMBER}{_DEGREES}$"),
+        ("log_temperature", rf"^(?:add|log|record|note)\s+(?:a\s+)?(?:temperature|temp)\s+(?:of\s+)?{_NUMBER}{_DEGREES}\s+(?:in|at|for)\s+{_ARTICLE_EN}(?P<location>.+)$"),
+        ("log_temperature", rf"^(?:add|log|record|note)\s+{_ARTICLE_EN}(?P<location>.+?)\s+(?:temperature|temp)\s+(?:as|at|to|of|is)\s+{_NUMBER}{_DEGREES}$"),
+        ("log_temperature", rf"^{_ARTICLE_EN}(?P<location>\S+(?:\s+\S+)?)\s+(?:is|reads|at)\s+{_NUMBER}\s*(?:°\s*c?|degrees?)$"),
+        ("add_product", r"^(?:add|create|new)\s+(?:a\s+)?(?:new\s+)?product\s+(?P<name>.+?)(?:\s+with\s+(?:allergens?\s+)?(?P<allergens>.+?)(?:\s+allergens?)?)?$"),
+        ("clean_room", rf"^mark\s+{_ARTICLE_EN}(?:room\s+)?(?P<room>.+?)(?:\s+room)?\s+as\s+clean(?:ed)?$"),
+        ("clean_room", rf"^(?:clean|cleaned)\s+{_ARTICLE_EN}(?:room\s+)?(?P<room>.+?)(?:\s+room)?$"),
+        ("clean_room", rf"^{_ARTICLE_EN}(?P<room>.+?)(?:\s+room)?\s+(?:is|was|has been)\s+cleaned$"),
+        ("report_incident", r"^(?:report|raise|open)\s+(?:an?\s+)?(?:(?P<severity>low|medium|high|critical)\s+)?incident\s*(?::|of|about|in|for|with)?\s*(?P<title>.+)$"),
+        ("list_products", r"^(?:list|show|display)\s+(?:me\s+)?(?:all\s+)?(?:the\s+|our\s+)?products$"),
+        ("compliance_status", r"\b(?:compliance|compliant|status|how are we doing)\b"),
+        ("usage_report", r"\b(?:usage|costs?|billing|report)\b"),
+    ],
+    "fr": [
+        ("help", r"^(?:aide|\?|que peux-tu faire|commandes)$"),
+        ("log_temperature", rf"^(?:ajouter|enregistrer|noter)\s+(?:une\s+|la\s+)?temp[ée]rature\s+(?:de|du|dans|pour|au)\s+{_ARTICLE_FR}(?P<location>.+?)\s+(?:à|a|=)\s+{_NUMBER}{_DEGREES}$"),
+        ("log_temperature", rf"^(?:ajouter|enregistrer|noter)\s+(?:une\s+|la\s+)?temp[ée]rature\s+(?:de\s+)?{_NUMBER}{_DEGREES}\s+(?:dans|pour|au|à|en)\s+{_ARTICLE_FR}(?P<location>.+)$"),
+        ("log_temperature", rf"^{_ARTICLE_FR}(?P<location>\S+(?:\s+\S+)?)\s+(?:est\s+)?(?:à|a)\s+{_NUMBER}\s*(?:°\s*c?|degr[ée]s?)$"),
+        ("add_product", r"^(?:ajouter|cr[ée]er)\s+(?:un\s+)?(?:nouveau\s+)?produit\s+(?P<name>.+?)(?:\s+avec\s+(?:(?:les\s+)?allerg[èe]nes?\s+)?(?P<allergens>.+))?$"),
+        ("clean_room", rf"^marquer\s+{_ARTICLE_FR}(?:salle\s+|pi[èe]ce\s+)?(?P<room>.+?)\s+comme\s+nettoy[ée]e?s?$"),
+        ("clean_room", rf"^(?:nettoyer|nettoy[ée]e?)\s+{_ARTICLE_FR}(?:salle\s+|pi[èe]ce\s+)?(?P<room>.+?)$"),
+        ("report_incident", r"^(?:signaler|d[ée]clarer|ouvrir)\s+(?:un\s+)?incident\s+(?:(?P<severity>faible|moyen|[ée]lev[ée]|critique)\s+)?(?::\s*|de\s+|d['’]\s*)?(?P<title>.+)$"),
+        ("list_products", r"^(?:lister|afficher|montrer|voir)\s+(?:tous\s+)?(?:les\s+|nos\s+)?produits$"),
+        ("compliance_status", r"\b(?:conformit[ée]|conforme|statut)\b"),
+        ("usage_report", r"\b(?:utilisation|co[uû]ts?|facturation|rapport)\b"),
+    ],
+}
+
+COMPILED_GRAMMAR = {
+    language: [(intent, re.compile(pattern, re.IGNORECASE)) for intent, pattern in rules]
+    for language, rules in GRAMMAR.items()
+}
+
+SEVERITIES = {
+    "low": "low", "faible": "low",
+    "medium": "medium", "moyen": "medium",
+    "high": "high", "élevé": "high", "eleve": "high", "élevée": "high",
+    "critical": "critical", "critique": "critical",
+}
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s.!?;]+$")
+_WHITESPACE = re.compile(r"\s+")
+_LIST_SEPARATOR = re.compile(r"\s*(?:,|;|\band\b|\bet\b)\s*", re.IGNORECASE)
+
+
+def normalize(message: str) -> str:
+    return _TRAILING_PUNCTUATION.sub("", _WHITESPACE.sub(" ", message.strip()))
+
+
+def parse_command(message: str, language: str = "en") -> Dict[str, Any]:
+    """
+    Intent and slots of a message. The grammar of `language` is tried first, then
+    the other ones, so a French command typed into the English UI still parses.
+    """
+    text = normalize(message)
+    order = [language] + [other for other in LANGUAGES if other != language]
+    for grammar_language in order:
+        for intent, pattern in COMPILED_GRAMMAR.get(grammar_language, []):
+            match = pattern.search(text)
+            if match:
+                slots = {name: value.strip() for name, value in match.groupdict().items() if value}
+                return {"intent": intent, "slots": slots, "grammar": grammar_language}
+    return {"intent": "unknown", "slots": {}, "grammar": None}
+
+
+class ChatCommandService:
+    def execute(self, db: Session, user: User, message: str, language: Optional[str] = None) -> Dict[str, Any]:
+        """Parse a message and run its action; replies are in `language` (default English)"""
+        language = language if language in LANGUAGES else "en"
+        parsed = parse_command(message, language)
+        responses = RESPONSES[language]
+        handler = getattr(self, f"_{parsed['intent']}", None)
+        result = {
+            "intent": parsed["intent"],
+            "language": language,
+            "slots": parsed["slots"],
+            "action_type": "data_query",
+            "data": None,
+        }
+        if handler is None:
+            result["reply"] = responses["default_response"](input=normalize(message))
+            return result
+        try:
+            handler(db, user, parsed["slots"], responses, result)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Chat command {parsed['intent']} failed: {e}")
+            result["reply"] = responses["error_general"]()
+        return result
+
+    def _help(self, db, user, slots, responses, result):
+        result["reply"] = responses["help_message"]()
+
+    def _log_temperature(self, db, user, slots, responses, result):
+        try:
+            temperature = float(slots["temperature"].replace(",", ".").replace("−", "-"))
+        except (KeyError, ValueError):
+            result["reply"] = responses["temperature_help"]()
+            return
+        location = slots.get("location")
+        if not location:
+            result["reply"] = responses["temperature_help"]()
+            return
+
+        within_limits = self._within_limits(db, user, temperature)
+        log = TemperatureLog(
+            organization_id=user.organization_id,
+            location=location,
+            temperature=temperature,
+            is_within_limits=within_limits,
+            recorded_by=user.id
+        )
+        db.add(log)
+        db.commit()
+        result["action_type"] = "temperature_log"
+        result["data"] = {"id": log.id, "location": location, "temperature": temperature, "is_within_limits": within_limits}
+        result["reply"] = responses["temperature_success"](
+            location=location,
+            temperature=f"{temperature:g}",
+            status=responses["status_normal" if within_limits else "status_alert"]()
+        )
+
+    def _add_product(self, db, user, slots, responses, result):
+        name = slots.get("name")
+        if not name:
+            result["reply"] = responses["product_help"]()
+            return
+        allergens = [item.lower() for item in _LIST_SEPARATOR.split(slots.get("allergens", "")) if item]
+        product = Product(organization_id=user.organization_id, name=name, allergens=allergens)
+        db.add(product)
+        db.commit()
+        result["action_type"] = "product_create"
+        result["data"] = {"id": product.id, "name": name, "allergens": allergens}
+        result["reply"] = responses["product_success"](name=name)
+
+    def _clean_room(self, db, user, slots, responses, result):
+        from cleaning_schedule import cleaning_schedule
+        room = slots.get("room")
+        if not room:
+            result["reply"] = responses["room_help"]()
+            return
+        plans = db.query(CleaningPlan).filter(
+            CleaningPlan.organization_id == user.organization_id,
+            CleaningPlan.archived_at.is_(None)
+        ).order_by(CleaningPlan.id).all()
+        wanted = room.lower()
+        for plan in plans:
+            for plan_room in plan.rooms or []:
+                room_name = plan_room.get("name")
+                if room_name and room_name.lower() == wanted:
+                    cleanings = cleaning_schedule.mark_cleaned(db, plan, [room_name], user.id, "Cleaned via AI chat")
+                    result["action_type"] = "room_cleaning"
+                    result["data"] = {"id": cleanings[0].id, "cleaning_plan_id": plan.id, "room_name": room_name}
+                    result["reply"] = responses["room_success"](room=room_name)
+                    return
+        result["reply"] = responses["room_error"]()
+
+    def _report_incident(self, db, user, slots, responses, result):
+        from incident_stats import incident_stats, snapshot
+        title = slots.get("title")
+        if not title:
+            result["reply"] = responses["incident_help"]()
+            return
+        severity = SEVERITIES.get(slots.get("severity", "").lower(), "medium")
+        incident = Incident(
+            organization_id=user.organization_id,
+            title=title,
+            severity=severity,
+            reported_by=user.id,
+            status="open"
+        )
+        db.add(incident)
+        db.commit()
+        incident_stats.record_change(db, user.organization_id, None, snapshot(incident))
+        result["action_type"] = "incident_create"
+        result["data"] = {"id": incident.id, "title": title, "severity": severity}
+        result["reply"] = responses["incident_success"](title=title, severity=severity)
+
+    def _compliance_status(self, db, user, slots, responses, result):
+        from compliance import compliance_service
+        status = compliance_service.status(db, user.organization_id)
+        message = responses["compliance_action" if status["alerts"] else "compliance_ok"]()
+        result["data"] = status
+        result["reply"] = responses["compliance_status"](
+            status=responses[f"compliance_{status['status']}"](),
+            score=status["score"],
+            window_hours=status["window_hours"],
+            breaches=status["temperature"]["breaches"],
+            incidents=status["incidents"]["open"],
+            overdue=status["cleaning"]["overdue"],
+            expired=status["expiry"]["expired"],
+            message=message
+        )
+
+    def _list_products(self, db, user, slots, responses, result):
+        base = db.query(Product).filter(Product.organization_id == user.organization_id)
+        total = base.count()
+        if not total:
+            result["reply"] = responses["products_empty"]()
+            return
+        products = base.order_by(Product.name, Product.id).limit(PRODUCTS_SHOWN).all()
+        lines = []
+        for product in products:
+            details = f" ({product.category})" if product.category else ""
+            if product.allergens:
+                details += f" ⚠️ {', '.join(product.allergens)}"
+            lines.append(responses["product_line"](name=product.name, details=details))
+        reply = responses["products_list"]() + "\n".join(lines)
+        if total > len(products):
+            reply += responses["products_more"](count=total - len(products))
+        result["data"] = {"count": total, "products": [{"id": product.id, "name": product.name} for product in products]}
+        result["reply"] = reply
+
+    def _usage_report(self, db, user, slots, responses, result):
+        total, monthly = db.query(
+            func.sum(UsageLog.resource_used),
+            func.sum(UsageLog.resource_used).filter(UsageLog.created_at >= datetime.utcnow() - timedelta(days=30))
+        ).filter(UsageLog.organization_id == user.organization_id).one()
+        # Usage older than the retention window only survives as monthly rollups
+        rolled_up = db.query(func.sum(UsageLogRollup.total_cost)).filter(
+            UsageLogRollup.organization_id == user.organization_id
+        ).scalar()
+        total = float(total or 0) + float(rolled_up or 0)
+        monthly = float(monthly or 0)
+        result["data"] = {"total_cost": total, "monthly_cost": monthly}
+        result["reply"] = responses["usage_report"](total=f"{total:.4f}", monthly=f"{monthly:.4f}")
+
+    def _within_limits(self, db: Session, user: User, temperature: float) -> bool:
+        """Within the user's refrigerated or frozen range (model defaults if none is saved)"""
+        ranges = db.query(UserTemperatureRange).filter(UserTemperatureRange.user_id == user.id).first()
+        bounds = []
+        for kind, default_min, default_max in (("refrigerated", 0.0, 4.0), ("frozen", -25.0, -18.0)):
+            low = getattr(ranges, f"{kind}_min", None)
+            high = getattr(ranges, f"{kind}_max", None)
+            bounds.append((float(default_min if low is None else low), float(default_max if high is None else high)))
+        return any(low <= temperature <= high for low, high in bounds)
+
+# Global instance
+chat_commands = ChatCommandService()
@@ -0,0 +1,249 @@
+"""
+Cleaning Plan Archival and History Compaction
+Moves old room cleaning rows out of the hot room_cleanings table into
+zlib-compressed JSON segments (one or more per plan and month), and archives
+plans that are no longer in use. Archived history stays retrievable for audits.
+"""
+
+import hashlib
+import json
+import os
+import zlib
+import logging
+from datetime import datetime, date, timedelta
+from typing import Dict, Iterator, List, Optional, Any
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from models import CleaningPlan, RoomCleaning, RoomCleaningStatus, CleaningArchiveSegment
+
+logger = logging.getLogger(__name__)
+
+# Room cleanings older than this are compacted out of the hot table
+HOT_HISTORY_DAYS = int(os.getenv("CLEANING_HOT_HISTORY_DAYS", "90"))
+# Plans with no cleaning for this long are archived by check-archive
+PLAN_IDLE_DAYS = int(os.getenv("CLEANING_PLAN_IDLE_DAYS", "180"))
+DELETE_CHUNK = 500
+PAGE_SIZE = 1000
+# Larger plan-months are split over several segments
+SEGMENT_RECORDS = 5000
+
+
+def _month_start(moment: datetime) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def encode_segment(records: List[Dict[str, Any]]) -> bytes:
+    return zlib.compress(json.dumps(records, separators=(",", ":"), default=str).encode("utf-8"), 9)
+
+
+def decode_segment(payload: bytes) -> List[Dict[str, Any]]:
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+
+class CleaningArchiver:
+    def compact(self, db: Session, before: datetime, organization_id: Optional[int] = None,
+                plan_id: Optional[int] = None, commit: bool = True) -> Dict[str, int]:
+        """
+        Move room cleanings older than `before` into compressed monthly segments.
+        Segments are written (and their rows deleted) one at a time, so only one
+        segment's rows are held in memory; everything commits together at the end
+        unless commit is False.
+        """
+        conditions = [RoomCleaning.cleaned_at < before]
+        if organization_id is not None:
+            conditions.append(RoomCleaning.organization_id == organization_id)
+        if plan_id is not None:
+            plan_ids = [plan_id]
+        else:
+            plan_ids = [
+                current for (current,) in db.query(RoomCleaning.cleaning_plan_id).filter(*conditions).distinct()
+            ]
+
+        result = {"segments": 0, "records": 0}
+        for current in plan_ids:
+            group_key = None
+            group = []
+            for row in self._hot_rows(db, conditions, current):
+                key = (row.organization_id, row.cleaning_plan_id, _month_start(row.cleaned_at))
+                if group and (key != group_key or len(group) >= SEGMENT_RECORDS):
+                    self._write_segment(db, group_key, group, result)
+                    group = []
+                group_key = key
+                group.append(row)
+            if group:
+                self._write_segment(db, group_key, group, result)
+        if commit:
+            db.commit()
+
+        if result["records"]:
+            logger.info(f"Compacted {result['records']} room cleanings into {result['segments']} archive segments")
+        return result
+
+    def archive_plan(self, db: Session, plan: CleaningPlan) -> Dict[str, int]:
+        """Archive a plan and move its entire cleaning history into segments"""
+        # One transaction: if compaction fails the plan is not left archived with hot history
+        plan.archived_at = datetime.utcnow()
+        result = self.compact(db, before=datetime.max, plan_id=plan.id, commit=False)
+        db.query(RoomCleaningStatus).filter(RoomCleaningStatus.cleaning_plan_id == plan.id).delete()
+        db.commit()
+        return result
+
+    def check_archive(self, db: Session, organization_id: int, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Archive idle plans and compact history older than the hot window"""
+        now = now or datetime.utcnow()
+        idle_cutoff = now - timedelta(days=PLAN_IDLE_DAYS)
+        archived = 0
+
+        plans = db.query(CleaningPlan).filter(
+            CleaningPlan.organization_id == organization_id,
+            CleaningPlan.archived_at.is_(None),
+            CleaningPlan.created_at < idle_cutoff
+        ).all()
+        if plans:
+            recently_cleaned = {
+                plan_id for (plan_id,) in db.query(RoomCleaningStatus.cleaning_plan_id).filter(
+                    RoomCleaningStatus.cleaning_plan_id.in_([plan.id for plan in plans]),
+                    RoomCleaningStatus.last_cleaned_at >= idle_cutoff
+                ).distinct()
+            }
+            recently_cleaned |= {
+                plan_id for (plan_id,) in db.query(RoomCleaning.cleaning_plan_id).filter(
+                    RoomCleaning.cleaning_plan_id.in_([plan.id for plan in plans]),
+                    RoomCleaning.cleaned_at >= idle_cutoff
+                ).distinct()
+            }
+            for plan in plans:
+                if plan.id not in recently_cleaned:
+                    self.archive_plan(db, plan)
+                    archived += 1
+
+        result = self.compact(db, before=now - timedelta(days=HOT_HISTORY_DAYS), organization_id=organization_id)
+        result["archived_plans"] = archived
+        return result
+
+    def history(self, db: Session, plan_id: int, start: Optional[datetime] = None,
+                end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Audit view of a plan's cleanings in [start, end), merging hot rows and archive segments"""
+        records = list(self._archived_records(db, plan_id, start, end))
+
+        query = db.query(RoomCleaning).filter(RoomCleaning.cleaning_plan_id == plan_id)
+        if start is not None:
+            query = query.filter(RoomCleaning.cleaned_at >= start)
+        if end is not None:
+            query = query.filter(RoomCleaning.cleaned_at < end)
+        for row in query:
+            record = self._record(row)
+            record["archived"] = False
+            records.append(record)
+
+        records.sort(key=lambda record: record["cleaned_at"], reverse=True)
+        return records
+
+    def organization_records(self, db: Session, organization_id: int, start: Optional[datetime] = None,
+                             end: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Archived cleanings of every plan of an organization, decompressed one segment at a time"""
+        return self._archived_records(db, None, start, end, organization_id=organization_id)
+
+    def _archived_records(self, db: Session, plan_id: Optional[int], start: Optional[datetime],
+                          end: Optional[datetime], organization_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        query = db.query(CleaningArchiveSegment)
+        if plan_id is not None:
+            query = query.filter(CleaningArchiveSegment.cleaning_plan_id == plan_id)
+        if organization_id is not None:
+            query = query.filter(CleaningArchiveSegment.organization_id == organization_id)
+        # Segments cover whole months, so prune on the period before decompressing
+        if start is not None:
+            query = query.filter(CleaningArchiveSegment.period_end >= start.date())
+        if end is not None:
+            query = query.filter(CleaningArchiveSegment.period_start <= end.date())
+        # Segments are fetched a few at a time so long ranges do not hold every payload in memory
+        for segment in query.order_by(CleaningArchiveSegment.period_start).yield_per(10):
+            if hashlib.sha256(segment.payload).hexdigest() != segment.checksum:
+                logger.error(f"Archive segment {segment.id} failed checksum verification")
+                continue
+            for record in decode_segment(segment.payload):
+                cleaned_at = datetime.fromisoformat(record["cleaned_at"])
+                if (start is None or cleaned_at >= start) and (end is None or cleaned_at < end):
+                    record["cleaned_at"] = cleaned_at
+                    record["archived"] = True
+                    yield record
+
+        # Segments older than COLD_ARCHIVE_CLEANING_DAYS were moved on to cold storage
+        from cold_archive import cold_archive
+        yield from cold_archive.cleaning_records(db, organization_id, plan_id, start, end)
+
+    def _hot_rows(self, db: Session, conditions: List[Any], plan_id: Optional[int]) -> Iterator[Any]:
+        """One plan's matching rows, oldest first, fetched a page at a time by keyset"""
+        plan_condition = RoomCleaning.cleaning_plan_id.is_(None) if plan_id is None \
+            else RoomCleaning.cleaning_plan_id == plan_id
+        query = db.query(
+            RoomCleaning.id, RoomCleaning.organization_id, RoomCleaning.cleaning_plan_id, RoomCleaning.room_name,
+            RoomCleaning.cleaned_by, RoomCleaning.notes, RoomCleaning.cleaned_at
+        ).filter(plan_condition, *conditions).order_by(RoomCleaning.cleaned_at, RoomCleaning.id)
+        last = None
+        while True:
+            page_query = query
+            if last is not None:
+                # Bound on the stored value of the last row (SQLite keeps server-default times without
+                # microseconds). That row is still in the database: the segment it belongs to is only
+                # written once a row of the next page starts a new one.
+                bound = db.query(RoomCleaning.cleaned_at).filter(RoomCleaning.id == last.id).scalar_subquery()
+                page_query = query.filter(or_(
+                    RoomCleaning.cleaned_at > bound,
+                    and_(RoomCleaning.cleaned_at == bound, RoomCleaning.id > last.id)
+                ))
+            # Each page is read completely before its rows are deleted
+            page = page_query.limit(PAGE_SIZE).all()
+            yield from page
+            if len(page) < PAGE_SIZE:
+                return
+            last = page[-1]
+
+    def _write_segment(self, db: Session, key, rows: List[Any], result: Dict[str, int]):
+        segment, ids = self._segment(key, rows)
+        db.add(segment)
+        self._delete_hot_rows(db, ids)
+        db.flush()
+        # The payload is in the database now; the session need not keep it until commit
+        db.expunge(segment)
+        result["segments"] += 1
+        result["records"] += len(ids)
+
+    def _segment(self, key, rows: List[Any]):
+        organization_id, plan_id, period_start = key
+        payload = encode_segment([self._record(row) for row in rows])
+        last = rows[-1].cleaned_at
+        segment = CleaningArchiveSegment(
+            organization_id=organization_id,
+            cleaning_plan_id=plan_id,
+            period_start=period_start,
+            period_end=last.date(),
+            record_count=len(rows),
+            payload=payload,
+            checksum=hashlib.sha256(payload).hexdigest()
+        )
+        return segment, [row.id for row in rows]
+
+    def _record(self, row) -> Dict[str, Any]:
+        return {
+            "id": row.id,
+            "room_name": row.room_name,
+            "cleaning_plan_id": row.cleaning_plan_id,
+            "cleaned_by": row.cleaned_by,
+            "notes": row.notes,
+            "cleaned_at": row.cleaned_at,
+        }
+
+    def _delete_hot_rows(self, db: Session, ids: List[int]):
+        for offset in range(0, len(ids), DELETE_CHUNK):
+            chunk = ids[offset:offset + DELETE_CHUNK]
+            # The last-cleaned index keeps its timestamp but must not point at deleted rows
+            db.query(RoomCleaningStatus).filter(
+                RoomCleaningStatus.last_cleaning_id.in_(chunk)
+            ).update({RoomCleaningStatus.last_cleaning_id: None}, synchronize_session=False)
+            db.query(RoomCleaning).filter(RoomCleaning.id.in_(chunk)).delete(synchronize_session=False)
+
+# Global instance
+cleaning_archiver = CleaningArchiver()
@@ -0,0 +1,289 @@
+"""
+Cleaning Schedule Engine
+Turns cleaning plan frequencies into recurrence rules and keeps a
+per-(plan, room) last-cleaned index so due/overdue status is computed
+without reading the room cleaning history.
+"""
+
+import calendar
+import re
+import logging
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Optional, Any
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+
+from backfill import backfills
+from database import insert_missing
+from models import CleaningPlan, RoomCleaning, RoomCleaningStatus
+
+logger = logging.getLogger(__name__)
+
+FREQUENCY_ALIASES = {
+    "hourly": (1, "hour"),
+    "twice daily": (12, "hour"),
+    "twice_daily": (12, "hour"),
+    "daily": (1, "day"),
+    "weekly": (1, "week"),
+    "biweekly": (2, "week"),
+    "fortnightly": (2, "week"),
+    "monthly": (1, "month"),
+    "quarterly": (3, "month"),
+}
+
+_FREQUENCY_PATTERN = re.compile(r"^(?:every\s+)?(\d+)?\s*(hour|day|week|month)s?$")
+
+
+class RecurrenceRule:
+    """Repeat every `count` `unit`s (hour, day, week or month)"""
+
+    def __init__(self, count: int, unit: str):
+        self.count = count
+        self.unit = unit
+
+    @classmethod
+    def parse(cls, frequency: str) -> "RecurrenceRule":
+        text = (frequency or "").strip().lower()
+        if text in FREQUENCY_ALIASES:
+            return cls(*FREQUENCY_ALIASES[text])
+        match = _FREQUENCY_PATTERN.match(text)
+        if match:
+            return cls(int(match.group(1) or 1), match.group(2))
+        logger.warning(f"Unknown cleaning frequency '{frequency}', assuming daily")
+        return cls(1, "day")
+
+    def advance(self, moment: datetime, periods: int = 1) -> datetime:
+        """Return moment shifted forward by the given number of periods"""
+        count = self.count * periods
+        if self.unit == "hour":
+            return moment + timedelta(hours=count)
+        if self.unit == "day":
+            return moment + timedelta(days=count)
+        if self.unit == "week":
+            return moment + timedelta(weeks=count)
+        month_index = moment.month - 1 + count
+        year, month = moment.year + month_index // 12, month_index % 12 + 1
+        day = min(moment.day, calendar.monthrange(year, month)[1])
+        return moment.replace(year=year, month=month, day=day)
+
+    def __repr__(self):
+        return f"RecurrenceRule({self.count}, {self.unit!r})"
+
+
+def room_state(rule: RecurrenceRule, last_cleaned_at: Optional[datetime], now: datetime) -> Dict[str, Any]:
+    """
+    ok:       cleaned within the current period
+    due:      one period has elapsed since the last cleaning
+    overdue:  two periods have elapsed, or the room was never cleaned
+    """
+    if last_cleaned_at is None:
+        return {"state": "overdue", "last_cleaned_at": None, "due_at": None}
+    due_at = rule.advance(last_cleaned_at)
+    if now < due_at:
+        state = "ok"
+    elif now < rule.advance(last_cleaned_at, 2):
+        state = "due"
+    else:
+        state = "overdue"
+    return {"state": state, "last_cleaned_at": last_cleaned_at, "due_at": due_at}
+
+
+class CleaningScheduleEngine:
+    def record_cleaning(self, db: Session, cleaning: RoomCleaning):
+        """Update the last-cleaned index for a committed room cleaning"""
+        self.record_cleanings(db, [cleaning])
+
+    def record_cleanings(self, db: Session, cleanings: List[RoomCleaning]):
+        """Update the last-cleaned index for several committed room cleanings in one transaction"""
+        if not cleanings:
+            return
+        # Concurrent first cleanings of a room race to create its row, so missing rows are inserted
+        # with ON CONFLICT DO NOTHING and then moved forward in SQL only by newer cleanings
+        self._insert_missing(db, cleanings)
+        for cleaning in sorted(cleanings, key=lambda cleaning: cleaning.cleaned_at):
+            self._set_last_cleaned(db, cleaning, only_if_newer=True)
+        db.commit()
+
+    def mark_cleaned(self, db: Session, plan: CleaningPlan, room_names: List[str], user_id: int,
+                     notes: Optional[str] = None) -> List[RoomCleaning]:
+        """Record cleanings for several rooms of a plan in one transaction"""
+        cleaned_at = datetime.utcnow()
+        cleanings = [
+            RoomCleaning(
+                organization_id=plan.organization_id,
+                cleaning_plan_id=plan.id,
+                room_name=room_name,
+                cleaned_by=user_id,
+                notes=notes,
+                cleaned_at=cleaned_at
+            )
+            for room_name in room_names
+        ]
+        db.add_all(cleanings)
+        db.flush()
+        self.record_cleanings(db, cleanings)
+        return cleanings
+
+    def plan_status(self, db: Session, plan: CleaningPlan, now: Optional[datetime] = None) -> Dict[str, Any]:
+        now = now or datetime.utcnow()
+        rule = RecurrenceRule.parse(plan.cleaning_frequency)
+        last_cleaned = self._last_cleaned(db, [plan]).get(plan.id, {})
+        rooms = []
+        for room in plan.rooms or []:
+            entry = room_state(rule, last_cleaned.get(room.get("name")), now)
+            entry["room_name"] = room.get("name")
+            rooms.append(entry)
+        return {
+            "cleaning_plan_id": plan.id,
+            "cleaning_frequency": plan.cleaning_frequency,
+            "generated_at": now,
+            "rooms": rooms,
+        }
+
+    def state_counts(self, db: Session, organization_id: int, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Number of rooms in each state across an organization's active plans"""
+        now = now or datetime.utcnow()
+        plans = db.query(CleaningPlan).filter(
+            CleaningPlan.organization_id == organization_id,
+            CleaningPlan.archived_at.is_(None)
+        ).all()
+        last_cleaned = self._last_cleaned(db, plans)
+        counts = {"ok": 0, "due": 0, "overdue": 0}
+        for plan in plans:
+            rule = RecurrenceRule.parse(plan.cleaning_frequency)
+            plan_index = last_cleaned.get(plan.id, {})
+            for room in plan.rooms or []:
+                counts[room_state(rule, plan_index.get(room.get("name")), now)["state"]] += 1
+        return counts
+
+    def task_list(self, db: Session, for_date: date, organization_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Rooms that will need cleaning on for_date, for every plan (optionally of one
+        organization). Runs as one plan query plus one index query regardless of plan count.
+        """
+        day_start = datetime.combine(for_date, datetime.min.time())
+        day_end = day_start + timedelta(days=1)
+
+        query = db.query(CleaningPlan).filter(CleaningPlan.archived_at.is_(None))
+        if organization_id is not None:
+            query = query.filter(CleaningPlan.organization_id == organization_id)
+        plans = query.all()
+        last_cleaned = self._last_cleaned(db, plans)
+
+        tasks = []
+        for plan in plans:
+            rule = RecurrenceRule.parse(plan.cleaning_frequency)
+            plan_index = last_cleaned.get(plan.id, {})
+            for room in plan.rooms or []:
+                last = plan_index.get(room.get("name"))
+                due_at = rule.advance(last) if last else None
+                if due_at is None or due_at < day_end:
+                    tasks.append({
+                        "organization_id": plan.organization_id,
+                        "cleaning_plan_id": plan.id,
+                        "plan_name": plan.name,
+                        "room_name": room.get("name"),
+                        "due_at": max(due_at, day_start) if due_at else day_start,
+                        "estimated_duration": plan.estimated_duration,
+                    })
+        return tasks
+
+    def rebuild(self, db: Session, plan_ids: Optional[List[int]] = None, organization_id: Optional[int] = None) -> int:
+        """
+        Rebuild the last-cleaned index from room cleaning history. Rooms whose cleanings
+        have all been compacted into archive segments keep their existing entry.
+        """
+        latest = db.query(
+            RoomCleaning.cleaning_plan_id,
+            RoomCleaning.room_name,
+            func.max(RoomCleaning.cleaned_at).label("cleaned_at")
+        ).group_by(RoomCleaning.cleaning_plan_id, RoomCleaning.room_name)
+        if plan_ids is not None:
+            latest = latest.filter(RoomCleaning.cleaning_plan_id.in_(plan_ids))
+        if organization_id is not None:
+            latest = latest.filter(RoomCleaning.organization_id == organization_id)
+        latest = latest.subquery()
+
+        # The newest cleaning of each room, so who cleaned it and which cleaning it was carry over too
+        cleanings: Dict[tuple, RoomCleaning] = {}
+        for cleaning in db.query(RoomCleaning).join(latest, and_(
+            RoomCleaning.cleaning_plan_id == latest.c.cleaning_plan_id,
+            RoomCleaning.room_name == latest.c.room_name,
+            RoomCleaning.cleaned_at == latest.c.cleaned_at
+        )).order_by(RoomCleaning.id):
+            cleanings[(cleaning.cleaning_plan_id, cleaning.room_name)] = cleaning
+
+        self._insert_missing(db, list(cleanings.values()))
+        for cleaning in cleanings.values():
+            self._set_last_cleaned(db, cleaning, only_if_newer=False)
+        db.commit()
+        return len(cleanings)
+
+    def _insert_missing(self, db: Session, cleanings: List[RoomCleaning]):
+        keys = {(cleaning.cleaning_plan_id, cleaning.room_name): cleaning.organization_id for cleaning in cleanings}
+        insert_missing(db, RoomCleaningStatus, [
+            {"organization_id": organization_id, "cleaning_plan_id": plan_id, "room_name": room_name}
+            for (plan_id, room_name), organization_id in keys.items()
+        ])
+
+    def _set_last_cleaned(self, db: Session, cleaning: RoomCleaning, only_if_newer: bool):
+        statement = update(RoomCleaningStatus).where(
+            RoomCleaningStatus.cleaning_plan_id == cleaning.cleaning_plan_id,
+            RoomCleaningStatus.room_name == cleaning.room_name
+        )
+        if only_if_newer:
+            statement = statement.where(or_(
+                RoomCleaningStatus.last_cleaned_at.is_(None),
+                RoomCleaningStatus.last_cleaned_at <= cleaning.cleaned_at
+            ))
+        db.execute(statement.values(
+            last_cleaned_at=cleaning.cleaned_at,
+            last_cleaned_by=cleaning.cleaned_by,
+            last_cleaning_id=cleaning.id
+        ))
+
+    def _last_cleaned(self, db: Session, plans: List[CleaningPlan]) -> Dict[int, Dict[str, datetime]]:
+        if not plans:
+            return {}
+        # Organizations with history from before the index existed are backfilled once, even if
+        # cleanings recorded since then have already created some of their rows
+        for organization_id in {plan.organization_id for plan in plans}:
+            backfills.ensure(db, "room_cleaning_status", organization_id,
+                             lambda: self.rebuild(db, organization_id=organization_id))
+
+        rows = db.query(
+            RoomCleaningStatus.cleaning_plan_id,
+            RoomCleaningStatus.room_name,
+            RoomCleaningStatus.last_cleaned_at
+        ).filter(RoomCleaningStatus.cleaning_plan_id.in_([plan.id for plan in plans])).all()
+
+        index: Dict[int, Dict[str, datetime]] = {}
+        for plan_id, room_name, last_cleaned_at in rows:
+            if last_cleaned_at is not None:
+                index.setdefault(plan_id, {})[room_name] = last_cleaned_at
+        return index
+
+# Global instance
+cleaning_schedule = CleaningScheduleEngine()
+
+
+if __name__ == "__main__":
+    # Batch job: print tomorrow's (or --date) task list for every plan as JSON
+    import argparse
+    import json
+    from database import SessionLocal, init_database
+
+    parser = argparse.ArgumentParser(description="Generate cleaning task lists for all plans")
+    parser.add_argument("--date", help="YYYY-MM-DD (default: tomorrow)")
+    parser.add_argument("--organization-id", type=int)
+    args = parser.parse_args()
+
+    target = date.fromisoformat(args.date) if args.date else date.today() + timedelta(days=1)
+    init_database()
+    db = SessionLocal()
+    try:
+        tasks = cleaning_schedule.task_list(db, target, args.organization_id)
+        print(json.dumps({"date": target.isoformat(), "tasks": tasks}, default=str, indent=2))
+    finally:
+        db.close()
@@ -0,0 +1,405 @@
+"""
+Cold Storage Archive
+Exports aged temperature_logs, usage_logs and room_cleanings months to
+zstd-compressed Parquet files (one per organization, table and month) on local
+disk or S3-compatible storage before they leave the database. The
+cold_archive_files table is the manifest; audits read archived ranges back
+through memory-mapped Arrow reads that only touch the files and row groups
+overlapping the requested period.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import logging
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple, Any
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from models import TemperatureLog, UsageLog, CleaningPlan, CleaningArchiveSegment, ColdArchiveFile
+
+logger = logging.getLogger(__name__)
+
+# Archive segments of room cleanings older than this move from the database to cold storage
+COLD_CLEANING_DAYS = int(os.getenv("COLD_ARCHIVE_CLEANING_DAYS", "365"))
+ROW_GROUP_SIZE = 50000
+COMPRESSION = "zstd"
+# Session.info key of files uploaded in the current transaction
+PENDING_UPLOADS = "cold_archive_pending_uploads"
+
+# Column name -> kind: int, str, bool, time, json or ("decimal", precision, scale)
+ARCHIVE_COLUMNS: Dict[str, List[Tuple[str, Any]]] = {
+    "temperature_logs": [
+        ("id", "int"), ("organization_id", "int"), ("location", "str"), ("temperature", ("decimal", 5, 2)),
+        ("recorded_by", "int"), ("equipment_id", "str"), ("is_within_limits", "bool"), ("created_at", "time"),
+    ],
+    "usage_logs": [
+        ("id", "int"), ("organization_id", "int"), ("user_id", "int"), ("action_type", "str"),
+        ("resource_used", ("decimal", 10, 6)), ("execution_time", ("decimal", 10, 6)), ("meta_data", "json"),
+        ("created_at", "time"),
+    ],
+    "room_cleanings": [
+        ("id", "int"), ("organization_id", "int"), ("cleaning_plan_id", "int"), ("room_name", "str"),
+        ("cleaned_by", "int"), ("notes", "str"), ("cleaned_at", "time"),
+    ],
+}
+
+# Tables exported straight from their rows: table -> (model, time column)
+ROW_SOURCES = {
+    "temperature_logs": (TemperatureLog, "created_at"),
+    "usage_logs": (UsageLog, "created_at"),
+}
+
+TIME_COLUMNS = {"temperature_logs": "created_at", "usage_logs": "created_at", "room_cleanings": "cleaned_at"}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("pyarrow is required for the cold storage archive")
+    return pyarrow, pyarrow.parquet
+
+
+def _month_start(moment) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def _arrow_schema(table: str, metadata: Dict[str, str]):
+    pa, _ = _pyarrow()
+    types = {"int": pa.int64(), "str": pa.string(), "bool": pa.bool_(), "time": pa.timestamp("us"), "json": pa.string()}
+    fields = [
+        pa.field(name, pa.decimal128(kind[1], kind[2]) if isinstance(kind, tuple) else types[kind])
+        for name, kind in ARCHIVE_COLUMNS[table]
+    ]
+    return pa.schema(fields, metadata=metadata)
+
+
+def _converter(kind):
+    if isinstance(kind, tuple):
+        quantum = Decimal(1).scaleb(-kind[2])
+        return lambda value: None if value is None else Decimal(str(value)).quantize(quantum)
+    if kind == "json":
+        return lambda value: None if value is None else json.dumps(value, default=str)
+    if kind == "time":
+        return lambda value: datetime.fromisoformat(value) if isinstance(value, str) else value
+    return lambda value: value
+
+
+class LocalArchiveBackend:
+    """Filesystem backend rooted at a directory; files are memory-mapped in place"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def put_file(self, key: str, source_path: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.move(source_path, path)
+
+    def delete(self, key: str):
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def local_path(self, key: str, checksum: str) -> str:
+        return self._path(key)
+
+
+class S3ArchiveBackend:
+    """
+    S3-compatible backend (AWS S3, MinIO, LocalStack...)
+    Files are downloaded once into cache_dir, verified, and memory-mapped from there
+    """
+
+    def __init__(self, bucket: str, cache_dir: str, prefix: str = "", endpoint_url: Optional[str] = None, client=None):
+        if client is None:
+            try:
+                import boto3
+            except ImportError:
+                raise RuntimeError("boto3 is required for the S3 cold archive backend")
+            client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.cache_dir = cache_dir
+        self.prefix = prefix.strip("/")
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put_file(self, key: str, source_path: str):
+        self.client.upload_file(source_path, self.bucket, self._key(key))
+        os.remove(source_path)
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def local_path(self, key: str, checksum: str) -> str:
+        path = os.path.join(self.cache_dir, *key.split("/"))
+        if os.path.exists(path):
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # A unique name per download, since threads of one process may fetch the same file at once
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, self._key(key), tmp_path)
+            if _file_checksum(tmp_path) != checksum:
+                raise RuntimeError(f"Cold archive file {key} failed checksum verification")
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+
+def _file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ColdArchive:
+    def __init__(self, backend=None, work_dir: Optional[str] = None):
+        # No backend means cold archiving is disabled and aged rows are only rolled up
+        self.backend = backend
+        self.work_dir = work_dir
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def export(self, db: Session, table: str, start: datetime, end: datetime) -> Dict[str, int]:
+        """
+        Write every organization's rows of `table` in [start, end) to cold storage.
+        Manifest entries are added to the session but not committed: the caller commits
+        them together with the removal of the rows.
+        """
+        model, time_column = ROW_SOURCES[table]
+        column = getattr(model, time_column)
+        organization_ids = [
+            organization_id for (organization_id,) in db.query(model.organization_id).filter(
+                column >= start, column < end
+            ).distinct()
+            if organization_id is not None
+        ]
+        result = {"files": 0, "records": 0}
+        for organization_id in sorted(organization_ids):
+            selected = [getattr(model, name) for name, _ in ARCHIVE_COLUMNS[table]]
+            rows = db.query(*selected).filter(
+                model.organization_id == organization_id, column >= start, column < end
+            ).order_by(column).yield_per(5000)
+            entry = self._write(db, table, organization_id, _month_start(start), (tuple(row) for row in rows))
+            if entry:
+                result["files"] += 1
+                result["records"] += entry.record_count
+        return result
+
+    def export_cleaning_segments(self, db: Session, before: date) -> Dict[str, int]:
+        """Move room cleaning archive segments of months ending before `before` out of the database"""
+        cutoff = _month_start(before)
+        keys = db.query(CleaningArchiveSegment.organization_id, CleaningArchiveSegment.period_start).filter(
+            CleaningArchiveSegment.period_start < cutoff
+        ).distinct().order_by(CleaningArchiveSegment.period_start, CleaningArchiveSegment.organization_id).all()
+
+        from cleaning_archive import decode_segment
+
+        result = {"files": 0, "records": 0}
+        for organization_id, period_start in keys:
+            segments = db.query(CleaningArchiveSegment).filter(
+                CleaningArchiveSegment.organization_id == organization_id,
+                CleaningArchiveSegment.period_start == period_start
+            ).all()
+            records = []
+            for segment in segments:
+                if hashlib.sha256(segment.payload).hexdigest() != segment.checksum:
+                    # A corrupt segment stays in the database where it can still be inspected
+                    logger.error(f"Archive segment {segment.id} failed checksum verification; not moved to cold storage")
+                    break
+                for record in decode_segment(segment.payload):
+                    record["organization_id"] = organization_id
+                    records.append(record)
+            else:
+                records.sort(key=lambda record: record["cleaned_at"])
+                names = [name for name, _ in ARCHIVE_COLUMNS["room_cleanings"]]
+                entry = self._write(db, "room_cleanings", organization_id, period_start,
+                                    (tuple(record.get(name) for name in names) for record in records))
+                for segment in segments:
+                    db.delete(segment)
+                db.commit()
+                if entry:
+                    result["files"] += 1
+                    result["records"] += entry.record_count
+        if result["files"]:
+            logger.info(f"Moved {result['records']} archived room cleanings to cold storage in {result['files']} files")
+        return result
+
+    def files(self, db: Session, organization_id: int, table: Optional[str] = None,
+              start: Optional[date] = None, end: Optional[date] = None) -> List[ColdArchiveFile]:
+        """Manifest entries overlapping [start, end], oldest first"""
+        query = db.query(ColdArchiveFile).filter(ColdArchiveFile.organization_id == organization_id)
+        if table:
+            query = query.filter(ColdArchiveFile.table_name == table)
+        # Files cover at most one month, so the manifest prunes before any file is opened
+        if start is not None:
+            query = query.filter(ColdArchiveFile.period_end >= start)
+        if end is not None:
+            query = query.filter(ColdArchiveFile.period_start <= end)
+        return query.order_by(ColdArchiveFile.period_start, ColdArchiveFile.id).all()
+
+    def read(self, db: Session, organization_id: int, table: str, start: Optional[datetime] = None,
+             end: Optional[datetime] = None, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """Archived records of `table` with start <= time < end, oldest first"""
+        records = []
+        for record in self.records(db, organization_id, table, start, end):
+            if offset:
+                offset -= 1
+                continue
+            records.append(record)
+            if limit is not None and len(records) >= limit:
+                break
+        return records
+
+    def records(self, db: Session, organization_id: int, table: str, start: Optional[datetime] = None,
+                end: Optional[datetime] = None, filters: Optional[List[Tuple[str, str, Any]]] = None) -> Iterator[Dict[str, Any]]:
+        """Stream archived records one file at a time; extra filters use the (column, op, value) form"""
+        entries = self.files(db, organization_id, table, start.date() if start else None, end.date() if end else None)
+        if not entries:
+            return
+        if self.backend is None:
+            raise RuntimeError("Cold archive storage is not configured (COLD_ARCHIVE_BACKEND)")
+        _, pq = _pyarrow()
+
+        time_column = TIME_COLUMNS[table]
+        predicates = list(filters or [])
+        if start is not None:
+            predicates.append((time_column, ">=", start))
+        if end is not None:
+            predicates.append((time_column, "<", end))
+        for entry in entries:
+            path = self.backend.local_path(entry.storage_key, entry.checksum)
+            # Row group statistics on the time column skip the parts outside the range
+            arrow_table = pq.read_table(path, memory_map=True, filters=predicates or None)
+            for batch in arrow_table.to_batches():
+                for record in batch.to_pylist():
+                    record["archived"] = True
+                    yield record
+
+    def cleaning_records(self, db: Session, organization_id: Optional[int], plan_id: Optional[int],
+                         start: Optional[datetime], end: Optional[datetime]) -> Iterator[Dict[str, Any]]:
+        """Room cleanings of a plan or organization that were moved to cold storage"""
+        if organization_id is None:
+            organization_id = db.query(CleaningPlan.organization_id).filter(CleaningPlan.id == plan_id).scalar()
+        if organization_id is None:
+            return iter(())
+        filters = [("cleaning_plan_id", "=", plan_id)] if plan_id is not None else None
+        return self.records(db, organization_id, "room_cleanings", start, end, filters)
+
+    def _write(self, db: Session, table: str, organization_id: int, period_start: date,
+               rows: Iterator[Tuple]) -> Optional[ColdArchiveFile]:
+        pa, pq = _pyarrow()
+        columns = ARCHIVE_COLUMNS[table]
+        converters = [_converter(kind) for _, kind in columns]
+        time_position = [name for name, _ in columns].index(TIME_COLUMNS[table])
+        schema = _arrow_schema(table, {
+            "table": table,
+            "organization_id": str(organization_id),
+            "period_start": period_start.isoformat(),
+        })
+
+        os.makedirs(self.work_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".parquet", dir=self.work_dir)
+        os.close(fd)
+        count = 0
+        last_time = None
+        try:
+            with pq.ParquetWriter(tmp_path, schema, compression=COMPRESSION) as writer:
+                chunk: List[List[Any]] = [[] for _ in columns]
+                for row in rows:
+                    for position, value in enumerate(row):
+                        chunk[position].append(converters[position](value))
+                    count += 1
+                    if len(chunk[0]) >= ROW_GROUP_SIZE:
+                        last_time = chunk[time_position][-1]
+                        writer.write_table(pa.Table.from_arrays(chunk, schema=schema))
+                        chunk = [[] for _ in columns]
+                if chunk[0]:
+                    last_time = chunk[time_position][-1]
+                    writer.write_table(pa.Table.from_arrays(chunk, schema=schema))
+            if not count:
+                os.remove(tmp_path)
+                return None
+
+            # Rows backdated into an exported month land in an additional part file
+            part = db.query(func.count(ColdArchiveFile.id)).filter(
+                ColdArchiveFile.organization_id == organization_id,
+                ColdArchiveFile.table_name == table,
+                ColdArchiveFile.period_start == period_start
+            ).scalar()
+            key = f"{table}/org={organization_id}/{period_start:%Y-%m}/part-{part:04d}.parquet"
+            entry = ColdArchiveFile(
+                organization_id=organization_id,
+                table_name=table,
+                period_start=period_start,
+                period_end=last_time.date(),
+                storage_key=key,
+                record_count=count,
+                size_bytes=os.path.getsize(tmp_path),
+                checksum=_file_checksum(tmp_path)
+            )
+            self.backend.put_file(key, tmp_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # The file is only kept if the manifest entry commits, see _discard_uploads
+        db.info.setdefault(PENDING_UPLOADS, []).append((self.backend, key))
+        db.add(entry)
+        db.flush()
+        return entry
+
+
+@event.listens_for(Session, "after_commit")
+def _keep_uploads(db: Session):
+    db.info.pop(PENDING_UPLOADS, None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_uploads(db: Session):
+    """Remove files whose manifest entries were rolled back, so no object is left without a row"""
+    for backend, key in db.info.pop(PENDING_UPLOADS, []):
+        try:
+            backend.delete(key)
+        except Exception as e:
+            logger.error(f"Could not remove orphaned cold archive file {key}: {e}")
+
+
+def create_cold_archive() -> ColdArchive:
+    backend_name = os.getenv("COLD_ARCHIVE_BACKEND", "none")
+    root = os.getenv("COLD_ARCHIVE_ROOT", "data/cold_archive")
+    backend = None
+    if backend_name == "s3":
+        backend = S3ArchiveBackend(
+            bucket=os.getenv("COLD_ARCHIVE_BUCKET", "ai-haccp-archive"),
+            cache_dir=os.getenv("COLD_ARCHIVE_CACHE_DIR", "data/cold_archive_cache"),
+            prefix=os.getenv("COLD_ARCHIVE_PREFIX", "haccp"),
+            endpoint_url=os.getenv("COLD_ARCHIVE_ENDPOINT")
+        )
+    elif backend_name == "local":
+        backend = LocalArchiveBackend(root)
+    return ColdArchive(backend, work_dir=os.path.join(root, ".tmp"))
+
+# Global instance
+cold_archive = create_cold_archive()
@@ -0,0 +1,176 @@
+"""
+Compliance Status
+Scores an organization's HACCP compliance from temperature breaches in a recent
+window, open incidents by severity, overdue room cleanings and expired lots.
+Breaches come from one grouped range scan on the (organization_id, created_at)
+index; the other indicators are read from the incident counters, the cleaning
+last-cleaned index and the expiry index. Results are cached per organization
+for a few seconds, so dashboards, chat and MCP polling share one computation.
+"""
+
+import os
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple, Any
+
+from sqlalchemy import func, case
+from sqlalchemy.orm import Session
+
+from models import TemperatureLog
+
+logger = logging.getLogger(__name__)
+
+# Open incidents of these severities make an organization non-compliant
+CRITICAL_SEVERITIES = frozenset({"critical", "high"})
+# Points deducted from 100 per finding, and the most each indicator can deduct
+PENALTIES = {
+    "temperature_breach": (5, 30),
+    "critical_incident": (15, 30),
+    "open_incident": (5, 15),
+    "overdue_cleaning": (3, 15),
+    "expired_lot": (5, 10),
+}
+TOP_LOCATIONS = 5
+
+
+class ComplianceService:
+    def __init__(self, window_hours: int = 24, ttl_seconds: int = 30):
+        self.window_hours = window_hours
+        # Writes show up in the status within ttl_seconds
+        self.ttl_seconds = ttl_seconds
+        self._cache: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def status(self, db: Session, organization_id: int, refresh: bool = False) -> Dict[str, Any]:
+        """The organization's compliance status, from the cache while it is fresh"""
+        if not refresh:
+            with self._lock:
+                cached = self._cache.get(organization_id)
+            if cached and cached[0] > time.time():
+                return cached[1]
+
+        result = self.compute(db, organization_id)
+        with self._lock:
+            self._cache[organization_id] = (time.time() + self.ttl_seconds, result)
+        return result
+
+    def invalidate(self, organization_id: Optional[int] = None):
+        with self._lock:
+            if organization_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(organization_id, None)
+
+    def compute(self, db: Session, organization_id: int, now: Optional[datetime] = None) -> Dict[str, Any]:
+        from incident_stats import incident_stats
+        from cleaning_schedule import cleaning_schedule
+        from expiry import expiry_index, warning_days
+
+        now = now or datetime.utcnow()
+        temperature = self._temperature(db, organization_id, now - timedelta(hours=self.window_hours))
+
+        incident_summary = incident_stats.summary(db, organization_id)
+        open_by_severity = {
+            severity: group["open"] for severity, group in incident_summary["by_severity"].items() if group["open"]
+        }
+        critical_incidents = sum(
+            count for severity, count in open_by_severity.items() if severity.lower() in CRITICAL_SEVERITIES
+        )
+        incidents = {
+            "open": incident_summary["open"],
+            "critical": critical_incidents,
+            "open_by_severity": open_by_severity,
+        }
+
+        room_states = cleaning_schedule.state_counts(db, organization_id, now)
+        cleaning = {"rooms": sum(room_states.values()), "due": room_states["due"], "overdue": room_states["overdue"]}
+
+        days = warning_days(db)
+        lots = expiry_index.expiring(db, organization_id, days, include_expired=True, today=now.date())
+        expired = sum(1 for item in lots if item["days_left"] < 0)
+        expiry = {"expired": expired, "expiring_soon": len(lots) - expired, "warning_days": days}
+
+        findings = {
+            "temperature_breach": temperature["breaches"],
+            "critical_incident": critical_incidents,
+            "open_incident": incidents["open"] - critical_incidents,
+            "overdue_cleaning": cleaning["overdue"],
+            "expired_lot": expired,
+        }
+        score = 100
+        for name, count in findings.items():
+            per_finding, cap = PENALTIES[name]
+            score -= min(count * per_finding, cap)
+        if critical_incidents or expired:
+            status = "non_compliant"
+        elif any(findings.values()):
+            status = "attention_required"
+        else:
+            status = "compliant"
+
+        return {
+            "organization_id": organization_id,
+            "status": status,
+            "score": max(score, 0),
+            "generated_at": now,
+            "window_hours": self.window_hours,
+            "temperature": temperature,
+            "incidents": incidents,
+            "cleaning": cleaning,
+            "expiry": expiry,
+            "alerts": self._alerts(temperature, incidents, cleaning, expiry),
+        }
+
+    def _temperature(self, db: Session, organization_id: int, since: datetime) -> Dict[str, Any]:
+        breach = TemperatureLog.is_within_limits == False
+        rows = db.query(
+            TemperatureLog.location,
+            func.count(TemperatureLog.id),
+            func.sum(case((breach, 1), else_=0)),
+            func.max(case((breach, TemperatureLog.created_at), else_=None))
+        ).filter(
+            TemperatureLog.organization_id == organization_id,
+            TemperatureLog.created_at >= since
+        ).group_by(TemperatureLog.location).all()
+
+        readings = sum(count for _, count, _, _ in rows)
+        breaches = sum(int(breached or 0) for _, _, breached, _ in rows)
+        locations = sorted(
+            (
+                {"location": location, "breaches": int(breached), "last_breach_at": last_breach_at}
+                for location, _, breached, last_breach_at in rows if breached
+            ),
+            key=lambda item: (-item["breaches"], item["location"] or "")
+        )
+        return {
+            "readings": readings,
+            "breaches": breaches,
+            "breach_rate": round(breaches / readings, 4) if readings else 0.0,
+            "locations": locations[:TOP_LOCATIONS],
+        }
+
+    def _alerts(self, temperature: Dict[str, Any], incidents: Dict[str, Any],
+                cleaning: Dict[str, Any], expiry: Dict[str, Any]):
+        alerts = []
+        if temperature["breaches"]:
+            places = ", ".join(item["location"] or "unknown" for item in temperature["locations"])
+            alerts.append(f"{temperature['breaches']} temperature breaches in the last {self.window_hours}h ({places})")
+        if incidents["critical"]:
+            alerts.append(f"{incidents['critical']} open high/critical incidents")
+        elif incidents["open"]:
+            alerts.append(f"{incidents['open']} open incidents")
+        if cleaning["overdue"]:
+            alerts.append(f"{cleaning['overdue']} rooms overdue for cleaning")
+        if expiry["expired"]:
+            alerts.append(f"{expiry['expired']} expired lots still on hand")
+        if expiry["expiring_soon"]:
+            alerts.append(f"{expiry['expiring_soon']} lots expire within {expiry['warning_days']} days")
+        return alerts
+
+# Global instance
+compliance_service = ComplianceService(
+    window_hours=int(os.getenv("COMPLIANCE_WINDOW_HOURS", "24")),
+    ttl_seconds=int(os.getenv("COMPLIANCE_CACHE_TTL", "30"))
+)
@@ -1,15 +1,50 @@
 #!/usr/bin/env python3
 
+"""
+Demo data for the AI-HACCP platform
+Without arguments, creates the Demo Restaurant, its admin user and a few records.
+With --orgs, also seeds that many benchmark organizations with months of
+realistic history, for load testing (see scripts/benchmark_api.py):
+
+    python create_demo_data.py --orgs 10 --locations 8 --months 6 --readings-per-day 24
+"""
+
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from database import get_db, init_database
-from models import User, Organization, Product, TemperatureLog, Supplier
+from models import (User, Organization, Product, TemperatureLog, Supplier, Incident, CleaningPlan, RoomCleaning,
+                    BatchTracking, MaterialReception)
+import argparse
 import hashlib
+import random
 from datetime import datetime, timedelta
 from decimal import Decimal
 
+# (location kind, normal reading, allowed min, allowed max)
+LOCATION_KINDS = [
+    ("Fridge", 3.0, 0.0, 4.0),
+    ("Freezer", -20.0, -25.0, -18.0),
+    ("Walk-in Cooler", 2.5, 0.0, 4.0),
+    ("Display Case", 3.5, 0.0, 5.0),
+    ("Prep Area", 19.0, 15.0, 25.0),
+]
+PRODUCT_CATALOG = [
+    ("Fresh Salmon", "Fish", ["fish"], 3), ("Chicken Breast", "Poultry", [], 5),
+    ("Mixed Vegetables", "Vegetables", [], 7), ("Whole Milk", "Dairy", ["milk"], 10),
+    ("Cheddar Cheese", "Dairy", ["milk"], 30), ("Ground Beef", "Meat", [], 3),
+    ("Sourdough Bread", "Bakery", ["gluten"], 4), ("Free-range Eggs", "Eggs", ["eggs"], 21),
+    ("Shrimp", "Seafood", ["crustaceans"], 2), ("Peanut Sauce", "Sauces", ["peanuts"], 60),
+]
+INCIDENT_TYPES = [
+    ("temperature", "Temperature excursion"), ("hygiene", "Hygiene deviation"),
+    ("pest", "Pest sighting"), ("equipment", "Equipment failure"), ("supplier", "Non-compliant delivery"),
+]
+SEVERITIES = ["low", "medium", "high", "critical"]
+BENCHMARK_PASSWORD = "password"
+INSERT_CHUNK = 10000
+
 def create_demo_data():
     """Create demo data for the AI-HACCP platform"""
     
@@ -153,5 +188,172 @@ def create_demo_data():
     finally:
         db.close()
 
+def benchmark_user_email(index):
+    return f"bench{index}@ai-automorph.com"
+
+
+def gtin13(number):
+    """A valid EAN-13 for a 12-digit number"""
+    digits = f"{number:012d}"
+    total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits))
+    return digits + str((10 - total % 10) % 10)
+
+
+def _insert(db, model, rows):
+    for start in range(0, len(rows), INSERT_CHUNK):
+        db.execute(model.__table__.insert(), rows[start:start + INSERT_CHUNK])
+    return len(rows)
+
+
+def create_benchmark_data(orgs, locations=8, months=3, readings_per_day=24, seed=42):
+    """
+    Seed `orgs` benchmark organizations (Benchmark Org 1..N), each with an admin user
+    bench<N>@ai-automorph.com, `locations` monitored locations with `readings_per_day`
+    readings each over the last `months` months, and matching products, suppliers,
+    incidents, cleaning history, batches and receptions.
+    Organizations that already exist are left as they are.
+    """
+    from incident_stats import incident_stats
+    from cleaning_schedule import cleaning_schedule
+    from traceability import traceability_index
+    from gtin_index import gtin_index
+    from expiry import expiry_scheduler
+
+    init_database()
+    db = next(get_db())
+    rnd = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    days = months * 30
+    counts = {"organizations": 0, "temperature_logs": 0, "incidents": 0, "room_cleanings": 0,
+              "batches": 0, "receptions": 0}
+
+    try:
+        for index in range(1, orgs + 1):
+            name = f"Benchmark Org {index}"
+            if db.query(Organization).filter(Organization.name == name).first():
+                continue
+            org = Organization(name=name, type="restaurant")
+            db.add(org)
+            db.commit()
+            user = User(
+                email=benchmark_user_email(index),
+                password_hash=hashlib.sha256(BENCHMARK_PASSWORD.encode()).hexdigest(),
+                name=f"Benchmark Admin {index}",
+                role="admin",
+                organization_id=org.id
+            )
+            db.add(user)
+            db.commit()
+
+            products = [
+                Product(organization_id=org.id, name=f"{product} {batch + 1}" if batch else product, category=category,
+                        allergens=allergens, shelf_life_days=shelf_life,
+                        storage_temp_min=Decimal("0.0"), storage_temp_max=Decimal("4.0"))
+                for batch in range(5) for product, category, allergens, shelf_life in PRODUCT_CATALOG
+            ]
+            suppliers = [
+                Supplier(organization_id=org.id, name=f"Supplier {n + 1}",
+                         contact_info={"email": f"orders{n + 1}@supplier.example"},
+                         certification_status=rnd.choice(["certified", "certified", "pending"]), risk_level=rnd.randint(1, 3))
+                for n in range(10)
+            ]
+            db.add_all(products + suppliers)
+            db.commit()
+
+            # Temperature readings: steady around each location's normal value, with rare excursions
+            sites = [(f"{kind} {n + 1}", normal, low, high)
+                     for n, (kind, normal, low, high) in enumerate(LOCATION_KINDS * (locations // len(LOCATION_KINDS) + 1))][:locations]
+            interval = timedelta(days=1) / readings_per_day
+            logs = []
+            for step in range(days * readings_per_day):
+                created_at = now - interval * step
+                for location, normal, low, high in sites:
+                    temperature = normal + rnd.gauss(0, 0.6) + (rnd.uniform(3, 8) if rnd.random() < 0.02 else 0)
+                    temperature = round(temperature, 1)
+                    logs.append({
+                        "organization_id": org.id, "location": location, "temperature": Decimal(str(temperature)),
+                        "recorded_by": user.id, "equipment_id": f"EQUIP_{location.replace(' ', '_').upper()}",
+                        "is_within_limits": low <= temperature <= high, "created_at": created_at,
+                    })
+            counts["temperature_logs"] += _insert(db, TemperatureLog, logs)
+
+            incidents = []
+            for n in range(days // 3):
+                category, title = rnd.choice(INCIDENT_TYPES)
+                created_at = now - timedelta(hours=rnd.uniform(0, days * 24))
+                resolved = created_at < now - timedelta(days=2) and rnd.random() < 0.8
+                incidents.append({
+                    "organization_id": org.id, "title": f"{title} #{n + 1}", "description": f"{title} at {rnd.choice(sites)[0]}",
+                    "severity": rnd.choice(SEVERITIES), "category": category, "reported_by": user.id,
+                    "status": "resolved" if resolved else rnd.choice(["open", "investigating"]),
+                    "created_at": created_at,
+                    "resolved_at": created_at + timedelta(hours=rnd.uniform(1, 72)) if resolved else None,
+                })
+            counts["incidents"] += _insert(db, Incident, incidents)
+
+            rooms = [{"name": room, "x": (n % 3) * 200, "y": (n // 3) * 150, "width": 200, "height": 150}
+                     for n, room in enumerate(["Kitchen", "Prep Area", "Storage", "Cold Room", "Dish Area", "Dining Room"])]
+            plan = CleaningPlan(organization_id=org.id, name="Daily Cleaning", rooms=rooms, cleaning_frequency="daily",
+                                estimated_duration=90)
+            db.add(plan)
+            db.commit()
+            cleanings = [
+                {"organization_id": org.id, "cleaning_plan_id": plan.id, "room_name": room["name"], "cleaned_by": user.id,
+                 "notes": None, "cleaned_at": now - timedelta(days=day, hours=rnd.uniform(0, 8))}
+                for day in range(days) for room in rooms if rnd.random() < 0.95
+            ]
+            counts["room_cleanings"] += _insert(db, RoomCleaning, cleanings)
+
+            batches, receptions = [], []
+            for n in range(max(days, 30)):
+                product = products[n % len(products)]
+                supplier = suppliers[n % len(suppliers)]
+                received = (now - timedelta(days=rnd.uniform(0, days))).date()
+                expiry_date = received + timedelta(days=product.shelf_life_days)
+                batch_number = f"B{org.id:03d}-{n + 1:05d}"
+                batches.append({
+                    "organization_id": org.id, "batch_number": batch_number, "product_id": product.id,
+                    "supplier_id": supplier.id, "production_date": received, "expiry_date": expiry_date,
+                    "location": rnd.choice(sites)[0], "status": "received",
+                })
+                receptions.append({
+                    "organization_id": org.id, "supplier_id": supplier.id, "product_name": product.name,
+                    "category": product.category, "barcode": gtin13(org.id * 10 ** 6 + n % 200),
+                    "quantity": Decimal(str(rnd.randint(1, 40))), "unit": "kg", "expiry_date": expiry_date,
+                    "batch_number": batch_number, "temperature_on_arrival": Decimal(str(round(rnd.uniform(1, 5), 1))),
+                    "received_by": user.id, "received_at": datetime.combine(received, datetime.min.time()),
+                })
+            counts["batches"] += _insert(db, BatchTracking, batches)
+            counts["receptions"] += _insert(db, MaterialReception, receptions)
+            db.commit()
+
+            # Derived indexes the API maintains on writes
+            incident_stats.rebuild(db, org.id)
+            cleaning_schedule.rebuild(db, [plan.id])
+            traceability_index.rebuild(db, org.id)
+            gtin_index.rebuild(db, org.id)
+            expiry_scheduler.run(db, org.id)
+            counts["organizations"] += 1
+            print(f"Created {name} ({benchmark_user_email(index)}): {len(logs):,} temperature logs")
+
+        print(f"Benchmark data: {counts}")
+        return counts
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
 if __name__ == "__main__":
-    create_demo_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orgs", type=int, default=0, help="benchmark organizations to seed")
+    parser.add_argument("--locations", type=int, default=8, help="monitored locations per organization")
+    parser.add_argument("--months", type=int, default=3, help="months of history")
+    parser.add_argument("--readings-per-day", type=int, default=24, help="temperature readings per location per day")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    create_demo_data()
+    if args.orgs:
+        create_benchmark_data(args.orgs, args.locations, args.months, args.readings_per_day, args.seed)
\ No newline at end of file
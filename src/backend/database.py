@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -21,6 +21,7 @@ def init_database():
     try:
         # Create all tables
         Base.metadata.create_all(bind=engine)
+        add_missing_columns()
         logger.info("Database tables created successfully")
         
         # Check if demo data exists
@@ -91,6 +92,32 @@ def init_database():
         logger.error(f"Error initializing database: {e}")
         raise
 
+def add_missing_columns():
+    """Add nullable columns introduced after a table was created (create_all only creates tables)"""
+    from models import Base
+    
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                    logger.info(f"Added column {table.name}.{column.name}")
+
+def insert_missing(db, model, rows):
+    """Insert rows, skipping those that collide with an existing unique key (concurrent first writes)"""
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    db.execute(insert(model).values(rows).on_conflict_do_nothing())
+
 def get_db():
     db = SessionLocal()
     try:
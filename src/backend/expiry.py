@@ -0,0 +1,313 @@
+"""
+Expiry Index and Scheduler
+Keeps an in-memory, date-bucketed index of batch and reception expiry dates per
+organization so near-expiry queries never scan the tables, and a scheduler that
+raises expiry alerts and optionally marks expired batches.
+"""
+
+import bisect
+import os
+import re
+import threading
+import time
+import logging
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple, Any
+
+from sqlalchemy.orm import Session
+
+from models import BatchTracking, MaterialReception, Product, Configuration, ExpiryAlert
+
+logger = logging.getLogger(__name__)
+
+# Expired items stay in the index (and in include_expired results) this long
+EXPIRED_LOOKBACK_DAYS = int(os.getenv("EXPIRY_LOOKBACK_DAYS", "30"))
+DEFAULT_WARNING_DAYS = 7
+# Batches in these states are no longer on hand and are left out of the index
+CLOSED_STATUSES = frozenset({"consumed", "used", "disposed", "discarded", "recalled"})
+
+# Longest window a near-expiry query may cover (ten years)
+MAX_WITHIN_DAYS = 3650
+_WITHIN_PATTERN = re.compile(r"^\s*(\d{1,9})\s*([hdw]?)\s*$", re.IGNORECASE)
+
+
+def parse_within(value: Optional[str], default_days: int = 2) -> Optional[int]:
+    """Days covered by a window such as "48h", "3d", "2w" or "7"; None if invalid (callers cap it at MAX_WITHIN_DAYS)"""
+    if value is None or value == "":
+        return default_days
+    match = _WITHIN_PATTERN.match(str(value))
+    if not match:
+        return None
+    amount, unit = int(match.group(1)), match.group(2).lower()
+    if unit == "h":
+        # Expiry dates have day resolution: 1-24h covers today and tomorrow
+        return -(-amount // 24)
+    if unit == "w":
+        return amount * 7
+    return amount
+
+
+def warning_days(db: Session) -> int:
+    """batch_expiry_warning_days from the configuration table"""
+    parameter = db.query(Configuration).filter(Configuration.parameter == "batch_expiry_warning_days").first()
+    try:
+        return int(float(parameter.value)) if parameter else DEFAULT_WARNING_DAYS
+    except ValueError:
+        return DEFAULT_WARNING_DAYS
+
+
+class ExpiryIndex:
+    def __init__(self, ttl_seconds: int = 300):
+        # Organizations are reloaded after ttl_seconds, and whenever the day changes
+        self.ttl_seconds = ttl_seconds
+        self._buckets: Dict[int, Dict[date, Dict[Tuple[str, int], Dict[str, Any]]]] = {}
+        self._dates: Dict[int, List[date]] = {}
+        self._item_dates: Dict[int, Dict[Tuple[str, int], date]] = {}
+        self._loaded: Dict[int, Tuple[float, date]] = {}
+        self._lock = threading.Lock()
+
+    def expiring(self, db: Session, organization_id: int, within_days: int,
+                 include_expired: bool = False, today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Items expiring between today and today + within_days, soonest first"""
+        today = today or date.today()
+        self._ensure_loaded(db, organization_id, today)
+        start = today - timedelta(days=EXPIRED_LOOKBACK_DAYS) if include_expired else today
+        end = today + timedelta(days=within_days)
+
+        items = []
+        with self._lock:
+            dates = self._dates.get(organization_id, [])
+            buckets = self._buckets.get(organization_id, {})
+            for position in range(bisect.bisect_left(dates, start), bisect.bisect_right(dates, end)):
+                for item in buckets[dates[position]].values():
+                    entry = dict(item)
+                    entry["days_left"] = (item["expiry_date"] - today).days
+                    items.append(entry)
+        items.sort(key=lambda item: (item["expiry_date"], item["source_type"], item["id"]))
+        return items
+
+    def record_batch(self, db: Session, batch: BatchTracking):
+        """Fold a committed batch into the index"""
+        product_name = None
+        if batch.product_id:
+            product_name = db.query(Product.name).filter(Product.id == batch.product_id).scalar()
+        self._update(batch.organization_id, ("batch", batch.id), self._batch_item(batch, product_name))
+
+    def record_reception(self, db: Session, reception: MaterialReception):
+        """Fold a committed reception into the index"""
+        self._update(reception.organization_id, ("reception", reception.id), self._reception_item(reception))
+
+    def invalidate(self, organization_id: Optional[int] = None):
+        with self._lock:
+            if organization_id is None:
+                self._buckets.clear()
+                self._dates.clear()
+                self._item_dates.clear()
+                self._loaded.clear()
+            else:
+                self._buckets.pop(organization_id, None)
+                self._dates.pop(organization_id, None)
+                self._item_dates.pop(organization_id, None)
+                self._loaded.pop(organization_id, None)
+
+    def _ensure_loaded(self, db: Session, organization_id: int, today: date):
+        with self._lock:
+            loaded = self._loaded.get(organization_id)
+        if loaded and loaded[1] == today and time.time() - loaded[0] < self.ttl_seconds:
+            return
+
+        # Two range scans on the (organization_id, expiry_date) indexes
+        cutoff = today - timedelta(days=EXPIRED_LOOKBACK_DAYS)
+        buckets: Dict[date, Dict[Tuple[str, int], Dict[str, Any]]] = {}
+        batches = db.query(BatchTracking, Product.name).outerjoin(
+            Product, Product.id == BatchTracking.product_id
+        ).filter(
+            BatchTracking.organization_id == organization_id,
+            BatchTracking.expiry_date >= cutoff
+        )
+        for batch, product_name in batches:
+            item = self._batch_item(batch, product_name)
+            if item:
+                buckets.setdefault(item["expiry_date"], {})[("batch", batch.id)] = item
+        receptions = db.query(MaterialReception).filter(
+            MaterialReception.organization_id == organization_id,
+            MaterialReception.expiry_date >= cutoff
+        )
+        for reception in receptions:
+            item = self._reception_item(reception)
+            buckets.setdefault(item["expiry_date"], {})[("reception", reception.id)] = item
+
+        with self._lock:
+            self._buckets[organization_id] = buckets
+            self._dates[organization_id] = sorted(buckets)
+            self._item_dates[organization_id] = {
+                key: bucket_date for bucket_date, bucket in buckets.items() for key in bucket
+            }
+            self._loaded[organization_id] = (time.time(), today)
+
+    def _update(self, organization_id: int, key: Tuple[str, int], item: Optional[Dict[str, Any]]):
+        with self._lock:
+            buckets = self._buckets.get(organization_id)
+            if buckets is None:
+                return
+            dates = self._dates[organization_id]
+            item_dates = self._item_dates[organization_id]
+            previous = item_dates.pop(key, None)
+            if previous is not None:
+                bucket = buckets[previous]
+                del bucket[key]
+                if not bucket:
+                    del buckets[previous]
+                    dates.remove(previous)
+            if item is None:
+                return
+            if item["expiry_date"] not in buckets:
+                buckets[item["expiry_date"]] = {}
+                bisect.insort(dates, item["expiry_date"])
+            buckets[item["expiry_date"]][key] = item
+            item_dates[key] = item["expiry_date"]
+
+    def _batch_item(self, batch: BatchTracking, product_name: Optional[str]) -> Optional[Dict[str, Any]]:
+        if batch.expiry_date is None or (batch.status or "").lower() in CLOSED_STATUSES:
+            return None
+        return {
+            "source_type": "batch",
+            "id": batch.id,
+            "product_name": product_name,
+            "batch_number": batch.batch_number,
+            "expiry_date": batch.expiry_date,
+            "location": batch.location,
+            "status": batch.status,
+        }
+
+    def _reception_item(self, reception: MaterialReception) -> Optional[Dict[str, Any]]:
+        if reception.expiry_date is None:
+            return None
+        return {
+            "source_type": "reception",
+            "id": reception.id,
+            "product_name": reception.product_name,
+            "batch_number": reception.batch_number,
+            "expiry_date": reception.expiry_date,
+            "location": None,
+            "status": None,
+        }
+
+
+class ExpiryScheduler:
+    def __init__(self, index: ExpiryIndex, auto_expire: bool = False):
+        self.index = index
+        # Flip batch status to "expired" once the expiry date has passed
+        self.auto_expire = auto_expire
+
+    def run(self, db: Session, organization_id: int, today: Optional[date] = None) -> Dict[str, int]:
+        """Raise expiring/expired alerts for one organization; alerts are raised once per item and level"""
+        today = today or date.today()
+        items = self.index.expiring(db, organization_id, warning_days(db), include_expired=True, today=today)
+
+        existing = set()
+        if items:
+            existing = set(db.query(ExpiryAlert.source_type, ExpiryAlert.source_id, ExpiryAlert.level).filter(
+                ExpiryAlert.organization_id == organization_id,
+                ExpiryAlert.source_id.in_({item["id"] for item in items})
+            ))
+
+        raised = 0
+        expired_batches = []
+        for item in items:
+            level = "expired" if item["days_left"] < 0 else "expiring"
+            if (item["source_type"], item["id"], level) not in existing:
+                db.add(ExpiryAlert(
+                    organization_id=organization_id,
+                    source_type=item["source_type"],
+                    source_id=item["id"],
+                    product_name=item["product_name"],
+                    batch_number=item["batch_number"],
+                    expiry_date=item["expiry_date"],
+                    level=level
+                ))
+                raised += 1
+            if self.auto_expire and level == "expired" and item["source_type"] == "batch" and item["status"] != "expired":
+                expired_batches.append(item["id"])
+
+        if expired_batches:
+            db.query(BatchTracking).filter(BatchTracking.id.in_(expired_batches)).update(
+                {BatchTracking.status: "expired"}, synchronize_session=False
+            )
+        db.commit()
+        if expired_batches:
+            self.index.invalidate(organization_id)
+        if raised or expired_batches:
+            logger.info(f"Expiry check for organization {organization_id}: {raised} alerts, {len(expired_batches)} batches expired")
+        return {"alerts": raised, "expired_batches": len(expired_batches)}
+
+    def run_all(self, db: Session, today: Optional[date] = None) -> Dict[str, int]:
+        """Run the check for every organization holding dated stock"""
+        cutoff = (today or date.today()) - timedelta(days=EXPIRED_LOOKBACK_DAYS)
+        organization_ids = {
+            organization_id for (organization_id,) in db.query(BatchTracking.organization_id).filter(
+                BatchTracking.expiry_date >= cutoff
+            ).distinct()
+        } | {
+            organization_id for (organization_id,) in db.query(MaterialReception.organization_id).filter(
+                MaterialReception.expiry_date >= cutoff
+            ).distinct()
+        }
+        totals = {"organizations": 0, "alerts": 0, "expired_batches": 0}
+        for organization_id in sorted(organization_ids):
+            result = self.run(db, organization_id, today)
+            totals["organizations"] += 1
+            totals["alerts"] += result["alerts"]
+            totals["expired_batches"] += result["expired_batches"]
+        return totals
+
+    def start(self, interval_seconds: int):
+        """Run run_all every interval_seconds in a daemon thread"""
+        def loop():
+            from database import SessionLocal
+            from job_lock import job_locks
+            while True:
+                # Every API worker runs this loop; only the lock holder raises alerts.
+                # Failures taking the lock are caught too, so a database outage does not end the thread
+                try:
+                    with job_locks.hold("expiry-scheduler") as acquired:
+                        if acquired:
+                            db = SessionLocal()
+                            try:
+                                self.run_all(db)
+                            finally:
+                                db.close()
+                except Exception as e:
+                    logger.error(f"Expiry check failed: {e}")
+                time.sleep(interval_seconds)
+
+        thread = threading.Thread(target=loop, name="expiry-scheduler", daemon=True)
+        thread.start()
+        return thread
+
+# Global instances
+expiry_index = ExpiryIndex(ttl_seconds=int(os.getenv("EXPIRY_INDEX_TTL", "300")))
+expiry_scheduler = ExpiryScheduler(expiry_index, auto_expire=os.getenv("EXPIRY_AUTO_EXPIRE", "false").lower() == "true")
+
+
+if __name__ == "__main__":
+    # Batch job for cron / serverless schedules: run the expiry check once
+    import argparse
+    import json
+    from database import SessionLocal, init_database
+    from job_lock import job_locks
+
+    parser = argparse.ArgumentParser(description="Raise expiry alerts for all organizations")
+    parser.add_argument("--date", help="YYYY-MM-DD (default: today)")
+    args = parser.parse_args()
+
+    init_database()
+    with job_locks.hold("expiry-scheduler") as acquired:
+        if not acquired:
+            raise SystemExit("The expiry check is already running in another process")
+        db = SessionLocal()
+        try:
+            target = date.fromisoformat(args.date) if args.date else None
+            print(json.dumps(expiry_scheduler.run_all(db, target), indent=2))
+        finally:
+            db.close()
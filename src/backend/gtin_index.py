@@ -0,0 +1,219 @@
+"""
+GTIN / Barcode Index for Material Reception Autofill
+Maps scanned barcodes to the product, supplier and typical quantity last
+received by an organization. Entries persist in the gtin_index table and are
+served from an in-memory hash index per organization.
+"""
+
+import os
+import statistics
+import threading
+import time
+import logging
+from typing import Dict, Optional, Any
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backfill import backfills
+from database import insert_missing
+from models import GtinIndexEntry, MaterialReception, Product, Supplier
+
+logger = logging.getLogger(__name__)
+
+GTIN_LENGTHS = (8, 12, 13, 14)
+RECENT_QUANTITIES = 10
+
+
+def gtin_check_digit(body: str) -> int:
+    """GS1 mod-10 check digit for the digits preceding it"""
+    total = sum(int(digit) * (3 if position % 2 == 0 else 1)
+                for position, digit in enumerate(reversed(body)))
+    return (10 - total % 10) % 10
+
+
+def is_valid_gtin(code: str) -> bool:
+    """Validate length and check digit of a GTIN-8/12/13/14 (EAN, UPC)"""
+    if not code or not code.isdigit() or len(code) not in GTIN_LENGTHS:
+        return False
+    return gtin_check_digit(code[:-1]) == int(code[-1])
+
+
+def normalize_gtin(code: str) -> Optional[str]:
+    """Canonical GTIN-14 form, so EAN-13 and UPC-A scans of one item share a key"""
+    if not code:
+        return None
+    digits = "".join(c for c in code if c.isdigit())
+    if not is_valid_gtin(digits):
+        return None
+    return digits.zfill(14)
+
+
+class GtinIndex:
+    def __init__(self, ttl_seconds: int = 300):
+        # Organizations are reloaded after ttl_seconds so that entries written
+        # by other worker processes become visible
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        self._loaded_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, db: Session, organization_id: int, barcode: str) -> Optional[Dict[str, Any]]:
+        gtin = normalize_gtin(barcode)
+        if gtin is None:
+            return None
+        return self._organization(db, organization_id).get(gtin)
+
+    def record_reception(self, db: Session, reception: MaterialReception, count: bool = True):
+        """Fold a saved reception into the index; call after the reception is committed"""
+        gtin = normalize_gtin(reception.barcode)
+        if gtin is None:
+            return
+
+        # Concurrent first receptions of a GTIN both insert; the loser's row is skipped
+        insert_missing(db, GtinIndexEntry, [{
+            "organization_id": reception.organization_id,
+            "gtin": gtin,
+            "recent_quantities": [],
+            "reception_count": 0
+        }])
+        entry = db.query(GtinIndexEntry).filter(
+            GtinIndexEntry.organization_id == reception.organization_id,
+            GtinIndexEntry.gtin == gtin
+        ).with_for_update().one()
+
+        self._apply(entry, reception, count)
+        if count:
+            # Incremented in SQL, so concurrent receptions are each counted
+            entry.reception_count = GtinIndexEntry.reception_count + 1
+        db.commit()
+        db.refresh(entry)
+
+        with self._lock:
+            cached = reception.organization_id in self._entries
+        if cached:
+            # Only this entry's product and supplier are read, not the organization's whole catalog
+            entry_dict = self._to_dict(entry, *self._entry_catalog(db, entry))
+            with self._lock:
+                if reception.organization_id in self._entries:
+                    self._entries[reception.organization_id][gtin] = entry_dict
+
+    def rebuild(self, db: Session, organization_id: int) -> int:
+        """Rebuild an organization's index from its reception history"""
+        db.query(GtinIndexEntry).filter(GtinIndexEntry.organization_id == organization_id).delete()
+        entries: Dict[str, GtinIndexEntry] = {}
+        receptions = db.query(MaterialReception).filter(
+            MaterialReception.organization_id == organization_id,
+            MaterialReception.barcode.isnot(None)
+        ).order_by(MaterialReception.received_at.asc()).yield_per(1000)
+
+        for reception in receptions:
+            gtin = normalize_gtin(reception.barcode)
+            if gtin is None:
+                continue
+            if gtin not in entries:
+                entries[gtin] = GtinIndexEntry(
+                    organization_id=organization_id,
+                    gtin=gtin,
+                    recent_quantities=[],
+                    reception_count=0
+                )
+            self._apply(entries[gtin], reception, count=True)
+
+        db.add_all(entries.values())
+        db.commit()
+        with self._lock:
+            self._entries.pop(organization_id, None)
+            self._loaded_at.pop(organization_id, None)
+        logger.info(f"Rebuilt GTIN index for organization {organization_id}: {len(entries)} entries")
+        return len(entries)
+
+    def invalidate(self, organization_id: Optional[int] = None):
+        with self._lock:
+            if organization_id is None:
+                self._entries.clear()
+                self._loaded_at.clear()
+            else:
+                self._entries.pop(organization_id, None)
+                self._loaded_at.pop(organization_id, None)
+
+    def _apply(self, entry: GtinIndexEntry, reception: MaterialReception, count: bool):
+        entry.product_name = reception.product_name
+        entry.category = reception.category
+        entry.unit = reception.unit
+        entry.supplier_id = reception.supplier_id
+        if count:
+            quantities = list(entry.recent_quantities or [])
+            quantities.append(float(reception.quantity))
+            # Reassign rather than mutate so the JSON column is flagged dirty
+            entry.recent_quantities = quantities[-RECENT_QUANTITIES:]
+            entry.reception_count = (entry.reception_count or 0) + 1
+            entry.last_received_at = reception.received_at
+
+    def _organization(self, db: Session, organization_id: int) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            entries = self._entries.get(organization_id)
+            loaded_at = self._loaded_at.get(organization_id, 0)
+        if entries is not None and time.time() - loaded_at < self.ttl_seconds:
+            return entries
+
+        # Organizations with receptions from before the index existed are rebuilt once, even if
+        # receptions recorded since then have already created some entries
+        backfills.ensure(db, "gtin_index", organization_id, lambda: self.rebuild(db, organization_id))
+        rows = db.query(GtinIndexEntry).filter(GtinIndexEntry.organization_id == organization_id).all()
+
+        products, suppliers = self._catalog(db, organization_id)
+        entries = {row.gtin: self._to_dict(row, products, suppliers) for row in rows}
+        with self._lock:
+            self._entries[organization_id] = entries
+            self._loaded_at[organization_id] = time.time()
+        return entries
+
+    def _catalog(self, db: Session, organization_id: int):
+        """Products keyed by lower-cased name and supplier names keyed by id"""
+        products = db.query(Product).filter(Product.organization_id == organization_id).all()
+        suppliers = db.query(Supplier.id, Supplier.name).filter(Supplier.organization_id == organization_id).all()
+        return {product.name.lower(): product for product in products}, dict(suppliers)
+
+    def _entry_catalog(self, db: Session, entry: GtinIndexEntry):
+        """The _catalog shape restricted to one entry's product and supplier"""
+        products = {}
+        if entry.product_name:
+            product = db.query(Product).filter(
+                Product.organization_id == entry.organization_id,
+                func.lower(Product.name) == entry.product_name.lower()
+            ).order_by(Product.id.desc()).first()
+            if product:
+                products[entry.product_name.lower()] = product
+        suppliers = {}
+        if entry.supplier_id is not None:
+            suppliers = dict(db.query(Supplier.id, Supplier.name).filter(
+                Supplier.organization_id == entry.organization_id,
+                Supplier.id == entry.supplier_id
+            ))
+        return products, suppliers
+
+    def _to_dict(self, entry: GtinIndexEntry, products: Dict[str, Product], suppliers: Dict[int, str]) -> Dict[str, Any]:
+        quantities = entry.recent_quantities or []
+        product = products.get((entry.product_name or "").lower())
+        return {
+            "gtin": entry.gtin,
+            "product_name": entry.product_name,
+            "category": entry.category,
+            "unit": entry.unit,
+            "supplier_id": entry.supplier_id,
+            "supplier_name": suppliers.get(entry.supplier_id),
+            "typical_quantity": statistics.median(quantities) if quantities else None,
+            "reception_count": entry.reception_count,
+            "last_received_at": entry.last_received_at.isoformat() if entry.last_received_at else None,
+            "product": {
+                "id": product.id,
+                "allergens": product.allergens,
+                "shelf_life_days": product.shelf_life_days,
+                "storage_temp_min": float(product.storage_temp_min) if product.storage_temp_min is not None else None,
+                "storage_temp_max": float(product.storage_temp_max) if product.storage_temp_max is not None else None
+            } if product else None
+        }
+
+# Global instance
+gtin_index = GtinIndex(ttl_seconds=int(os.getenv("GTIN_INDEX_TTL", "300")))
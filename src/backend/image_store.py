@@ -0,0 +1,233 @@
+"""
+Content-Addressed Image Store for Material Reception
+Stores reception images under their SHA-256 digest, deduplicates identical
+uploads and pre-renders thumbnail / WebP variants once at ingest time
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import logging
+from typing import Dict, Optional, Any
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Variant name -> longest edge in pixels. Every variant is rendered as JPEG and WebP.
+VARIANT_SIZES = {
+    "thumb": 256,
+    "medium": 1024,
+}
+
+VARIANT_FORMATS = {
+    "jpg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+}
+
+ORIGINAL_FORMATS = {
+    "JPEG": ("jpg", "image/jpeg"),
+    "PNG": ("png", "image/png"),
+    "WEBP": ("webp", "image/webp"),
+    "GIF": ("gif", "image/gif"),
+}
+
+# Content-addressed objects never change, so clients may cache them forever
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+# The API only serves images to members of an organization that references them,
+# so shared caches must not keep its responses
+RESPONSE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+# S3 error codes meaning the object does not exist; anything else (credentials,
+# throttling, network) is a real failure and propagates
+MISSING_OBJECT_CODES = frozenset({"404", "NoSuchKey", "NotFound"})
+
+
+class LocalImageBackend:
+    """Filesystem backend rooted at a directory"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put(self, key: str, data: bytes, content_type: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so concurrent readers never see a partial object
+        # (a unique name per write, since threads of one process may store the same digest at once)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+class S3ImageBackend:
+    """
+    S3-compatible backend (AWS S3, MinIO, LocalStack...)
+    Set endpoint_url to point at a local stand-in during development
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None, client=None):
+        if client is None:
+            try:
+                import boto3
+            except ImportError:
+                raise RuntimeError("boto3 is required for the S3 image store backend")
+            client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in MISSING_OBJECT_CODES:
+                return False
+            raise
+
+    def put(self, key: str, data: bytes, content_type: str):
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=self._key(key),
+            Body=data,
+            ContentType=content_type,
+            CacheControl=CACHE_CONTROL
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        from botocore.exceptions import ClientError
+
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in MISSING_OBJECT_CODES:
+                return None
+            raise
+        return response["Body"].read()
+
+
+class ImageStore:
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def digest(image_bytes: bytes) -> str:
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    @staticmethod
+    def object_prefix(digest: str) -> str:
+        """Shard objects two levels deep so no directory grows unbounded"""
+        return f"{digest[:2]}/{digest[2:4]}/{digest}"
+
+    def ingest(self, image_bytes: bytes) -> Dict[str, Any]:
+        """
+        Store an image and its variants, returning the manifest.
+        Identical uploads resolve to the same digest and are only processed once.
+        """
+        digest = self.digest(image_bytes)
+        prefix = self.object_prefix(digest)
+
+        existing = self._find_original(digest)
+        if existing:
+            return self._manifest(digest, existing, deduplicated=True)
+
+        image = Image.open(io.BytesIO(image_bytes))
+        image.load()
+        original_ext, original_type = ORIGINAL_FORMATS.get(image.format, ("jpg", "image/jpeg"))
+
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        for variant, size in VARIANT_SIZES.items():
+            resized = image.copy()
+            resized.thumbnail((size, size))
+            for ext, (pil_format, content_type) in VARIANT_FORMATS.items():
+                buffer = io.BytesIO()
+                resized.save(buffer, format=pil_format, quality=85)
+                self.backend.put(f"{prefix}/{variant}.{ext}", buffer.getvalue(), content_type)
+
+        # Original is written last: its presence marks the ingest as complete
+        original_name = f"original.{original_ext}"
+        self.backend.put(f"{prefix}/{original_name}", image_bytes, original_type)
+        logger.info(f"Stored reception image {digest}")
+        return self._manifest(digest, original_name, deduplicated=False)
+
+    def _find_original(self, digest: str) -> Optional[str]:
+        prefix = self.object_prefix(digest)
+        for ext, _ in ORIGINAL_FORMATS.values():
+            if self.backend.exists(f"{prefix}/original.{ext}"):
+                return f"original.{ext}"
+        return None
+
+    def _manifest(self, digest: str, original_name: str, deduplicated: bool) -> Dict[str, Any]:
+        return {
+            "digest": digest,
+            "original": original_name,
+            "variants": [f"{variant}.{ext}" for variant in VARIANT_SIZES for ext in VARIANT_FORMATS],
+            "deduplicated": deduplicated,
+        }
+
+    def original_key(self, manifest: Dict[str, Any]) -> str:
+        return f"{self.object_prefix(manifest['digest'])}/{manifest['original']}"
+
+    @staticmethod
+    def is_digest(value: str) -> bool:
+        return len(value) == 64 and all(c in "0123456789abcdef" for c in value)
+
+    def read(self, digest: str, name: str) -> Optional[bytes]:
+        """Read a stored object; name is 'original.<ext>' or '<variant>.<ext>'"""
+        if not self.is_digest(digest):
+            return None
+        if "/" in name or name.startswith("."):
+            return None
+        return self.backend.get(f"{self.object_prefix(digest)}/{name}")
+
+    @staticmethod
+    def content_type(name: str) -> str:
+        ext = name.rsplit(".", 1)[-1]
+        for known_ext, content_type in ORIGINAL_FORMATS.values():
+            if ext == known_ext:
+                return content_type
+        return "application/octet-stream"
+
+
+def create_image_store() -> ImageStore:
+    backend_name = os.getenv("IMAGE_STORE_BACKEND", "local")
+    if backend_name == "s3":
+        backend = S3ImageBackend(
+            bucket=os.getenv("IMAGE_STORE_BUCKET", "ai-haccp-images"),
+            prefix=os.getenv("IMAGE_STORE_PREFIX", "reception_images"),
+            endpoint_url=os.getenv("IMAGE_STORE_ENDPOINT")
+        )
+    else:
+        backend = LocalImageBackend(os.getenv("IMAGE_STORE_ROOT", "uploads/reception_images"))
+    return ImageStore(backend)
+
+# Global instance
+image_store = create_image_store()
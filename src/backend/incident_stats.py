@@ -0,0 +1,155 @@
+"""
+Incident Statistics
+Running counters per (organization, severity, category), updated as incidents
+are created, edited or resolved, so open counts, mean time to resolution and
+category breakdowns never need to read the incident table.
+"""
+
+import logging
+from typing import Dict, Optional, Tuple, Any
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from backfill import backfills
+from database import insert_missing
+from models import Incident, IncidentStats
+
+logger = logging.getLogger(__name__)
+
+RESOLVED_STATUSES = frozenset({"resolved", "closed"})
+TOP_CATEGORIES = 5
+
+# (severity, category, resolved, resolution seconds)
+Snapshot = Tuple[str, str, bool, float]
+
+
+def is_resolved(status: Optional[str]) -> bool:
+    return (status or "").lower() in RESOLVED_STATUSES
+
+
+def snapshot(incident: Incident) -> Snapshot:
+    """The part of an incident the counters depend on; take it before editing"""
+    resolved = is_resolved(incident.status)
+    seconds = 0.0
+    if resolved and incident.resolved_at and incident.created_at:
+        seconds = max((incident.resolved_at - incident.created_at).total_seconds(), 0.0)
+    return (incident.severity or "unknown", incident.category or "", resolved, seconds)
+
+
+class IncidentStatsService:
+    def record_change(self, db: Session, organization_id: int, before: Optional[Snapshot], after: Optional[Snapshot]):
+        """Move an incident's contribution from `before` to `after` (None for create/delete) and commit"""
+        if before == after:
+            return
+        # Rows are created if missing, then incremented in SQL so concurrent writers never lose an update
+        insert_missing(db, IncidentStats, [
+            self._zero_values(organization_id, *key[:2]) for key in dict.fromkeys(key[:2] for key in (before, after) if key)
+        ])
+        if before:
+            self._increment(db, organization_id, before, -1)
+        if after:
+            self._increment(db, organization_id, after, 1)
+        db.commit()
+
+    def summary(self, db: Session, organization_id: int) -> Dict[str, Any]:
+        # Organizations with incidents from before the counters existed are rebuilt once, even if
+        # incidents recorded since then have already created some counter rows
+        backfills.ensure(db, "incident_stats", organization_id, lambda: self.rebuild(db, organization_id))
+        rows = db.query(IncidentStats).filter(IncidentStats.organization_id == organization_id).all()
+
+        by_severity: Dict[str, Dict[str, Any]] = {}
+        by_category: Dict[str, Dict[str, Any]] = {}
+        totals = {"total": 0, "open": 0, "resolved": 0, "resolution_seconds": 0.0}
+        for row in rows:
+            if not row.total_count:
+                continue
+            for groups, key in ((by_severity, row.severity), (by_category, row.category or "uncategorized")):
+                group = groups.setdefault(key, {"total": 0, "open": 0, "resolved": 0, "resolution_seconds": 0.0})
+                self._accumulate(group, row)
+            self._accumulate(totals, row)
+
+        top_categories = sorted(by_category.items(), key=lambda item: (-item[1]["total"], item[0]))[:TOP_CATEGORIES]
+        return {
+            "total": totals["total"],
+            "open": totals["open"],
+            "resolved": totals["resolved"],
+            "mttr_hours": self._mttr_hours(totals),
+            "by_severity": {key: self._public(group) for key, group in sorted(by_severity.items())},
+            "by_category": {key: self._public(group) for key, group in sorted(by_category.items())},
+            "top_categories": [{"category": key, "total": group["total"]} for key, group in top_categories],
+        }
+
+    def rebuild(self, db: Session, organization_id: int) -> int:
+        """Recompute an organization's counters from its incidents"""
+        db.query(IncidentStats).filter(IncidentStats.organization_id == organization_id).delete()
+        rows: Dict[Tuple[str, str], IncidentStats] = {}
+        incidents = db.query(Incident).filter(Incident.organization_id == organization_id).yield_per(1000)
+        for incident in incidents:
+            key = snapshot(incident)
+            if key[:2] not in rows:
+                rows[key[:2]] = self._new_row(organization_id, *key[:2])
+            self._apply(rows[key[:2]], key, 1)
+        db.add_all(rows.values())
+        db.commit()
+        logger.info(f"Rebuilt incident statistics for organization {organization_id}: {len(rows)} groups")
+        return len(rows)
+
+    def _zero_values(self, organization_id: int, severity: str, category: str) -> Dict[str, Any]:
+        return {
+            "organization_id": organization_id,
+            "severity": severity,
+            "category": category,
+            "total_count": 0,
+            "open_count": 0,
+            "resolved_count": 0,
+            "resolution_seconds": 0.0,
+        }
+
+    def _new_row(self, organization_id: int, severity: str, category: str) -> IncidentStats:
+        return IncidentStats(**self._zero_values(organization_id, severity, category))
+
+    def _increment(self, db: Session, organization_id: int, key: Snapshot, sign: int):
+        severity, category, resolved, seconds = key
+        values: Dict[str, Any] = {"total_count": IncidentStats.total_count + sign}
+        if resolved:
+            values["resolved_count"] = IncidentStats.resolved_count + sign
+            values["resolution_seconds"] = IncidentStats.resolution_seconds + sign * seconds
+        else:
+            values["open_count"] = IncidentStats.open_count + sign
+        db.execute(update(IncidentStats).where(
+            IncidentStats.organization_id == organization_id,
+            IncidentStats.severity == severity,
+            IncidentStats.category == category
+        ).values(**values))
+
+    def _apply(self, row: IncidentStats, key: Snapshot, sign: int):
+        _, _, resolved, seconds = key
+        row.total_count += sign
+        if resolved:
+            row.resolved_count += sign
+            row.resolution_seconds += sign * seconds
+        else:
+            row.open_count += sign
+
+    def _accumulate(self, group: Dict[str, Any], row: IncidentStats):
+        group["total"] += row.total_count
+        group["open"] += row.open_count
+        group["resolved"] += row.resolved_count
+        group["resolution_seconds"] += row.resolution_seconds
+
+    def _mttr_hours(self, group: Dict[str, Any]) -> Optional[float]:
+        if not group["resolved"]:
+            return None
+        return round(group["resolution_seconds"] / group["resolved"] / 3600, 2)
+
+    def _public(self, group: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "total": group["total"],
+            "open": group["open"],
+            "resolved": group["resolved"],
+            "mttr_hours": self._mttr_hours(group),
+        }
+
+# Global instance
+incident_stats = IncidentStatsService()
@@ -0,0 +1,110 @@
+"""
+Single-Runner Locks for Scheduled Jobs
+Every API worker starts the same scheduler threads, so each job run first takes
+a named lock and is skipped when another process holds it. PostgreSQL uses a
+session-level advisory lock on a dedicated connection (released automatically
+if the process dies); other databases use a lease row in job_locks that expires
+after JOB_LOCK_TTL seconds. Every lease acquisition gets its own token, so two
+threads of one process never share, renew or release each other's lease.
+"""
+
+import os
+import socket
+import uuid
+import zlib
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import text, update, delete, insert
+from sqlalchemy.exc import IntegrityError
+
+from database import engine
+from models import JobLock
+
+logger = logging.getLogger(__name__)
+
+JOB_LOCK_TTL = int(os.getenv("JOB_LOCK_TTL", "3600"))
+
+
+class JobLockManager:
+    def __init__(self, ttl_seconds: int = JOB_LOCK_TTL):
+        self.ttl_seconds = ttl_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        # Lease name -> holder token of the acquisition currently inside hold()
+        self._leases: Dict[str, str] = {}
+
+    @contextmanager
+    def hold(self, name: str) -> Iterator[bool]:
+        """Yield True if this process now holds the named lock, False if another one does"""
+        if engine.dialect.name == "postgresql":
+            with self._advisory_lock(name) as acquired:
+                yield acquired
+            return
+        token = self._acquire_lease(name)
+        if token is None:
+            yield False
+            return
+        self._leases[name] = token
+        try:
+            yield True
+        finally:
+            self._leases.pop(name, None)
+            self._release_lease(name, token)
+
+    def renew(self, name: str):
+        """Extend a lease held inside hold() by another ttl_seconds; advisory locks need no renewal"""
+        token = self._leases.get(name)
+        if token is None:
+            return
+        with engine.begin() as connection:
+            connection.execute(
+                update(JobLock)
+                .where(JobLock.name == name, JobLock.holder == token)
+                .values(expires_at=datetime.utcnow() + timedelta(seconds=self.ttl_seconds))
+            )
+
+    @contextmanager
+    def _advisory_lock(self, name: str) -> Iterator[bool]:
+        key = zlib.crc32(name.encode("utf-8"))
+        connection = engine.connect()
+        try:
+            acquired = bool(connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar())
+            connection.commit()
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                    connection.commit()
+        finally:
+            connection.close()
+
+    def _acquire_lease(self, name: str) -> Optional[str]:
+        """Holder token of a newly taken lease, or None while another acquisition holds it"""
+        token = f"{self.holder}:{uuid.uuid4().hex}"
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        with engine.begin() as connection:
+            taken = connection.execute(
+                update(JobLock)
+                .where(JobLock.name == name, JobLock.expires_at < now)
+                .values(holder=token, expires_at=expires_at)
+            ).rowcount
+        if taken:
+            return token
+        try:
+            with engine.begin() as connection:
+                connection.execute(insert(JobLock).values(name=name, holder=token, expires_at=expires_at))
+            return token
+        except IntegrityError:
+            logger.debug(f"Job lock {name} is held by another process or thread")
+            return None
+
+    def _release_lease(self, name: str, token: str):
+        with engine.begin() as connection:
+            connection.execute(delete(JobLock).where(JobLock.name == name, JobLock.holder == token))
+
+# Global instance
+job_locks = JobLockManager()
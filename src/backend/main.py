@@ -1,11 +1,11 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import os
 import time
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
@@ -35,6 +35,19 @@ async def startup_event():
         print(f"Warning: Could not ensure admin user: {e}")
     finally:
         db.close()
+    # Report and import jobs interrupted by a restart would otherwise stay queued or running forever
+    from reports import report_engine
+    from bulk_import import import_pipeline
+    report_engine.recover()
+    import_pipeline.recover()
+    interval = int(os.getenv("EXPIRY_SCHEDULER_INTERVAL", "3600"))
+    if interval > 0:
+        from expiry import expiry_scheduler
+        expiry_scheduler.start(interval)
+    interval = int(os.getenv("RETENTION_INTERVAL", "0"))
+    if interval > 0:
+        from retention import retention_manager
+        retention_manager.start(interval)
     print("Database initialized successfully")
 
 app.add_middleware(
@@ -84,6 +97,11 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         raise HTTPException(status_code=401, detail="User not found")
     return user
 
+def require_admin(current_user: User = Depends(get_current_user)):
+    if current_user.role != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
 def ensure_admin_user(db: Session):
     """Ensure admin user exists, create if not"""
     admin_user = db.query(User).filter(User.email == "admin@ai-automorph.com").first()
@@ -120,10 +138,8 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     ensure_admin_user(db)
     
     # Handle both email and username login
-    user = db.query(User).filter(
-        (User.email == credentials.email) | 
-        (User.email == "admin@ai-automorph.com" and credentials.email.lower() == "admin")
-    ).first()
+    email = "admin@ai-automorph.com" if credentials.email.lower() == "admin" else credentials.email
+    user = db.query(User).filter(User.email == email).first()
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
@@ -284,19 +300,47 @@ async def create_temperature_log(
 
 @app.get("/temperature-logs", response_model=List[TemperatureLogResponse])
 async def get_temperature_logs(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 100,
+    offset: int = 0,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """Newest first, one page at a time"""
     start_time = time.time()
     
-    logs = db.query(TemperatureLog).filter(
-        TemperatureLog.organization_id == current_user.organization_id
-    ).order_by(TemperatureLog.created_at.desc()).limit(100).all()
+    query = db.query(TemperatureLog).filter(TemperatureLog.organization_id == current_user.organization_id)
+    if since:
+        query = query.filter(TemperatureLog.created_at >= since)
+    if until:
+        query = query.filter(TemperatureLog.created_at < until)
+    logs = query.order_by(TemperatureLog.created_at.desc(), TemperatureLog.id.desc()).offset(max(offset, 0)).limit(min(max(limit, 1), 1000)).all()
     
     execution_time = time.time() - start_time
     log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
     return logs
 
+@app.get("/temperature-logs/daily")
+async def get_daily_temperature_summary(
+    start_date: date,
+    end_date: date,
+    location: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Daily min/max/average per location, including days only kept as rollups"""
+    from retention import daily_temperature_summary
+    start_time = time.time()
+    
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    summary = daily_temperature_summary(db, current_user.organization_id, start_date, end_date, location)
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
+    return summary
+
 @app.get("/temperature-locations")
 async def get_temperature_locations(
     current_user: User = Depends(get_current_user),
@@ -384,14 +428,20 @@ async def create_product(
 
 @app.get("/products", response_model=List[ProductResponse])
 async def get_products(
+    limit: Optional[int] = None,
+    offset: int = 0,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """All products, or one page of them when limit is given"""
     start_time = time.time()
     
-    products = db.query(Product).filter(
+    query = db.query(Product).filter(
         Product.organization_id == current_user.organization_id
-    ).all()
+    ).order_by(Product.id)
+    if limit is not None:
+        query = query.offset(max(offset, 0)).limit(min(max(limit, 1), 1000))
+    products = query.all()
     
     execution_time = time.time() - start_time
     log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
@@ -485,17 +535,46 @@ async def get_usage_report(
         UsageLog.organization_id == current_user.organization_id
     ).group_by(UsageLog.action_type).all()
     
+    # Usage older than the retention window only survives as monthly rollups
+    from models import UsageLogRollup
+    rollups = db.query(
+        UsageLogRollup.action_type,
+        func.sum(UsageLogRollup.total_cost),
+        func.sum(UsageLogRollup.action_count),
+        func.sum(UsageLogRollup.total_execution_time),
+        func.sum(UsageLogRollup.timed_count)
+    ).filter(
+        UsageLogRollup.organization_id == current_user.organization_id
+    ).group_by(UsageLogRollup.action_type).all()
+    
+    breakdown = {
+        item.action_type: {
+            "cost": float(item.total_cost),
+            "count": item.count,
+            "execution_time": float(item.avg_execution_time) * item.count if item.avg_execution_time else 0.0,
+            "timed": item.count if item.avg_execution_time else 0
+        }
+        for item in usage_by_type
+    }
+    for action_type, cost, count, execution_time, timed in rollups:
+        entry = breakdown.setdefault(action_type, {"cost": 0.0, "count": 0, "execution_time": 0.0, "timed": 0})
+        entry["cost"] += float(cost or 0)
+        entry["count"] += int(count or 0)
+        entry["execution_time"] += float(execution_time or 0)
+        entry["timed"] += int(timed or 0)
+        total_cost = float(total_cost) + float(cost or 0)
+    
     return {
         "total_cost": float(total_cost),
         "monthly_cost": float(monthly_cost),
         "usage_breakdown": [
             {
-                "action": item.action_type, 
-                "cost": float(item.total_cost), 
-                "count": item.count,
-                "avg_execution_time": float(item.avg_execution_time) if item.avg_execution_time else None
+                "action": action_type, 
+                "cost": entry["cost"], 
+                "count": entry["count"],
+                "avg_execution_time": entry["execution_time"] / entry["timed"] if entry["timed"] else None
             }
-            for item in usage_by_type
+            for action_type, entry in breakdown.items()
         ]
     }
 
@@ -505,8 +584,13 @@ async def create_cleaning_plan(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    from spatial_index import validate_rooms, spatial_index_cache
     start_time = time.time()
     
+    problems = validate_rooms(plan.rooms)
+    if problems:
+        raise HTTPException(status_code=400, detail="; ".join(problems))
+    
     db_plan = CleaningPlan(
         organization_id=current_user.organization_id,
         **plan.dict()
@@ -514,6 +598,7 @@ async def create_cleaning_plan(
     db.add(db_plan)
     db.commit()
     db.refresh(db_plan)
+    spatial_index_cache.build(db_plan)
     
     execution_time = time.time() - start_time
     log_usage(db, current_user.id, current_user.organization_id, "cleaning_plan_create", execution_time=execution_time)
@@ -527,13 +612,211 @@ async def get_cleaning_plans(
     start_time = time.time()
     
     plans = db.query(CleaningPlan).filter(
-        CleaningPlan.organization_id == current_user.organization_id
+        CleaningPlan.organization_id == current_user.organization_id,
+        CleaningPlan.archived_at.is_(None)
     ).all()
     
     execution_time = time.time() - start_time
     log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
     return plans
 
+@app.get("/cleaning-plans/archived", response_model=List[CleaningPlanResponse])
+async def get_archived_cleaning_plans(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    start_time = time.time()
+    
+    plans = db.query(CleaningPlan).filter(
+        CleaningPlan.organization_id == current_user.organization_id,
+        CleaningPlan.archived_at.isnot(None)
+    ).order_by(CleaningPlan.archived_at.desc()).all()
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
+    return plans
+
+@app.post("/cleaning-plans/check-archive")
+async def check_archive_cleaning_plans(
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Archive idle plans and compact room cleaning history older than the hot window"""
+    from cleaning_archive import cleaning_archiver
+    start_time = time.time()
+    
+    result = cleaning_archiver.check_archive(db, current_user.organization_id)
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "cleaning_plan_archive", execution_time=execution_time)
+    return result
+
+@app.post("/cleaning-plans/{plan_id}/archive", response_model=CleaningPlanResponse)
+async def archive_cleaning_plan(
+    plan_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    from cleaning_archive import cleaning_archiver
+    start_time = time.time()
+    
+    plan = db.query(CleaningPlan).filter(
+        CleaningPlan.id == plan_id,
+        CleaningPlan.organization_id == current_user.organization_id
+    ).first()
+    if not plan:
+        raise HTTPException(status_code=404, detail="Cleaning plan not found")
+    if plan.archived_at is not None:
+        raise HTTPException(status_code=400, detail="Cleaning plan already archived")
+    
+    cleaning_archiver.archive_plan(db, plan)
+    db.refresh(plan)
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "cleaning_plan_archive", execution_time=execution_time)
+    return plan
+
+@app.get("/cleaning-plans/{plan_id}/history", response_model=List[ArchivedRoomCleaningResponse])
+async def get_cleaning_plan_history(
+    plan_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Audit trail of a plan's cleanings, including compacted and archived history"""
+    from cleaning_archive import cleaning_archiver
+    start_time = time.time()
+    
+    plan = db.query(CleaningPlan).filter(
+        CleaningPlan.id == plan_id,
+        CleaningPlan.organization_id == current_user.organization_id
+    ).first()
+    if not plan:
+        raise HTTPException(status_code=404, detail="Cleaning plan not found")
+    
+    records = cleaning_archiver.history(db, plan_id, start, end)
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
+    return records
+
+@app.get("/cleaning-plans/{plan_id}/status", response_model=CleaningPlanStatusResponse)
+async def get_cleaning_plan_status(
+    plan_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Due/overdue state of every room in a plan, computed from the last-cleaned index"""
+    from cleaning_schedule import cleaning_schedule
+    start_time = time.time()
+    
+    plan = db.query(CleaningPlan).filter(
+        CleaningPlan.id == plan_id,
+        CleaningPlan.organization_id == current_user.organization_id
+    ).first()
+    if not plan:
+        raise HTTPException(status_code=404, detail="Cleaning plan not found")
+    
+    result = cleaning_schedule.plan_status(db, plan)
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
+    return result
+
+@app.get("/cleaning-tasks", response_model=List[CleaningTaskResponse])
+async def get_cleaning_tasks(
+    for_date: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Rooms to clean on a given day across all plans (default: tomorrow)"""
+    from cleaning_schedule import cleaning_schedule
+    start_time = time.time()
+    
+    target = for_date or (datetime.utcnow().date() + timedelta(days=1))
+    tasks = cleaning_schedule.task_list(db, target, current_user.organization_id)
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
+    return tasks
+
+@app.get("/cleaning-plans/{plan_id}/rooms/at")
+async def get_room_at_point(
+    plan_id: int,
+    x: float = Query(allow_inf_nan=False),
+    y: float = Query(allow_inf_nan=False),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Hit-test a point on the plan's floor map"""
+    from spatial_index import spatial_index_cache
+    
+    plan = db.query(CleaningPlan).filter(
+        CleaningPlan.id == plan_id,
+        CleaningPlan.organization_id == current_user.organization_id
+    ).first()
+    if not plan:
+        raise HTTPException(status_code=404, detail="Cleaning plan not found")
+    
+    room_name = spatial_index_cache.get(plan).room_at(x, y)
+    if room_name is None:
+        raise HTTPException(status_code=404, detail="No room at this point")
+    return {"room_name": room_name}
+
+@app.get("/cleaning-plans/{plan_id}/rooms/in")
+async def get_rooms_in_region(
+    plan_id: int,
+    x: float = Query(allow_inf_nan=False),
+    y: float = Query(allow_inf_nan=False),
+    width: float = Query(allow_inf_nan=False),
+    height: float = Query(allow_inf_nan=False),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Rooms intersecting a rectangular region of the floor map"""
+    from spatial_index import spatial_index_cache
+    
+    plan = db.query(CleaningPlan).filter(
+        CleaningPlan.id == plan_id,
+        CleaningPlan.organization_id == current_user.organization_id
+    ).first()
+    if not plan:
+        raise HTTPException(status_code=404, detail="Cleaning plan not found")
+    
+    return {"rooms": spatial_index_cache.get(plan).rooms_in(x, y, width, height)}
+
+@app.post("/cleaning-plans/{plan_id}/clean-region", response_model=List[RoomCleaningResponse])
+async def mark_region_cleaned(
+    plan_id: int,
+    region: RegionCleaningCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Mark every room intersecting a region (or under a tapped point) as cleaned"""
+    from spatial_index import spatial_index_cache
+    from cleaning_schedule import cleaning_schedule
+    start_time = time.time()
+    
+    plan = db.query(CleaningPlan).filter(
+        CleaningPlan.id == plan_id,
+        CleaningPlan.organization_id == current_user.organization_id
+    ).first()
+    if not plan:
+        raise HTTPException(status_code=404, detail="Cleaning plan not found")
+    if plan.archived_at is not None:
+        raise HTTPException(status_code=409, detail="Cleaning plan is archived")
+    
+    room_names = spatial_index_cache.get(plan).rooms_in(region.x, region.y, region.width, region.height)
+    if not room_names:
+        raise HTTPException(status_code=404, detail="No room in this region")
+    
+    cleanings = cleaning_schedule.mark_cleaned(db, plan, room_names, current_user.id, region.notes)
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "room_cleaning", execution_time=execution_time)
+    return cleanings
+
 @app.post("/room-cleaning", response_model=RoomCleaningResponse)
 async def mark_room_cleaned(
     cleaning: RoomCleaningCreate,
@@ -542,6 +825,15 @@ async def mark_room_cleaned(
 ):
     start_time = time.time()
     
+    plan = db.query(CleaningPlan).filter(
+        CleaningPlan.id == cleaning.cleaning_plan_id,
+        CleaningPlan.organization_id == current_user.organization_id
+    ).first()
+    if not plan:
+        raise HTTPException(status_code=404, detail="Cleaning plan not found")
+    if plan.archived_at is not None:
+        raise HTTPException(status_code=409, detail="Cleaning plan is archived")
+    
     db_cleaning = RoomCleaning(
         organization_id=current_user.organization_id,
         cleaned_by=current_user.id,
@@ -551,6 +843,9 @@ async def mark_room_cleaned(
     db.commit()
     db.refresh(db_cleaning)
     
+    from cleaning_schedule import cleaning_schedule
+    cleaning_schedule.record_cleaning(db, db_cleaning)
+    
     execution_time = time.time() - start_time
     log_usage(db, current_user.id, current_user.organization_id, "room_cleaning", execution_time=execution_time)
     return db_cleaning
@@ -619,8 +914,8 @@ async def create_material_reception(
     start_time = time.time()
     
     from ai_vision import ai_vision_service
+    from image_store import image_store
     import base64
-    import os
     
     # Process AI image analysis if image provided
     ai_analysis = None
@@ -632,17 +927,10 @@ async def create_material_reception(
             ai_result = ai_vision_service.analyze_reception_image(reception.image_data)
             ai_analysis = ai_result
             
-            # Save image file
-            image_dir = "uploads/reception_images"
-            os.makedirs(image_dir, exist_ok=True)
-            
-            # Decode and save image
+            # Store image by content hash; identical uploads are only stored once
             image_data = base64.b64decode(reception.image_data.split(',')[1] if ',' in reception.image_data else reception.image_data)
-            image_filename = f"reception_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.jpg"
-            image_path = os.path.join(image_dir, image_filename)
-            
-            with open(image_path, 'wb') as f:
-                f.write(image_data)
+            manifest = image_store.ingest(image_data)
+            image_path = image_store.original_key(manifest)
                 
         except Exception as e:
             # Continue without AI analysis if it fails
@@ -670,6 +958,13 @@ async def create_material_reception(
     db.commit()
     db.refresh(db_reception)
     
+    from gtin_index import gtin_index
+    from traceability import traceability_index
+    from expiry import expiry_index
+    gtin_index.record_reception(db, db_reception)
+    traceability_index.record_reception(db, db_reception)
+    expiry_index.record_reception(db, db_reception)
+    
     execution_time = time.time() - start_time
     log_usage(db, current_user.id, current_user.organization_id, "material_reception", execution_time=execution_time)
     return db_reception
@@ -713,10 +1008,34 @@ async def update_material_reception(
     db.commit()
     db.refresh(db_reception)
     
+    from gtin_index import gtin_index
+    from traceability import traceability_index
+    from expiry import expiry_index
+    gtin_index.record_reception(db, db_reception, count=False)
+    traceability_index.record_reception(db, db_reception)
+    expiry_index.record_reception(db, db_reception)
+    
     execution_time = time.time() - start_time
     log_usage(db, current_user.id, current_user.organization_id, "material_reception_update", execution_time=execution_time)
     return db_reception
 
+@app.get("/gtin/{barcode}")
+async def lookup_gtin(
+    barcode: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Autofill data for a scanned barcode: last product details, supplier and typical quantity"""
+    from gtin_index import gtin_index, normalize_gtin
+    
+    if normalize_gtin(barcode) is None:
+        raise HTTPException(status_code=400, detail="Invalid barcode check digit or length")
+    
+    entry = gtin_index.lookup(db, current_user.organization_id, barcode)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Barcode not seen before")
+    return entry
+
 @app.post("/analyze-reception-image")
 async def analyze_reception_image(
     image_data: dict,
@@ -729,16 +1048,137 @@ async def analyze_reception_image(
     
     try:
         result = ai_vision_service.analyze_reception_image(image_data.get("image", ""))
-        execution_time = time.time() - start_time
-        log_usage(db, current_user.id, current_user.organization_id, "ai_image_analysis", execution_time=execution_time)
+        # Cache hits never reached the model, so they are not billed
+        if not result.get("cached"):
+            execution_time = time.time() - start_time
+            log_usage(db, current_user.id, current_user.organization_id, "ai_image_analysis", execution_time=execution_time)
         return result
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-def require_admin(current_user: User = Depends(get_current_user)):
-    if current_user.role != 'admin':
-        raise HTTPException(status_code=403, detail="Admin access required")
-    return current_user
+@app.post("/analyze-reception-images")
+async def analyze_reception_images(
+    request_data: BatchImageAnalysisRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Analyze a whole delivery at once; streams one JSON line per image as results complete"""
+    from ai_vision import ai_vision_service
+    from fastapi.responses import StreamingResponse
+    from database import SessionLocal
+    import json
+    
+    user_id, organization_id = current_user.id, current_user.organization_id
+    
+    def stream_results():
+        db = SessionLocal()
+        try:
+            billed_until = time.time()
+            for result in ai_vision_service.analyze_batch(request_data.images, batch_size=request_data.batch_size):
+                # Each image that reached the model is billed before its line is sent, so a client
+                # that disconnects mid-stream still pays for what was analysed; the time since the
+                # previous billed image covers its share of the micro-batch
+                if result.get("success") and not result.get("cached"):
+                    now = time.time()
+                    log_usage(db, user_id, organization_id, "ai_image_analysis", execution_time=now - billed_until)
+                    billed_until = now
+                yield json.dumps(result) + "\n"
+        finally:
+            db.close()
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@app.get("/images/{digest}/{name}")
+async def get_reception_image(
+    digest: str,
+    name: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Serve a stored reception image or one of its variants (thumb.webp, medium.jpg, ...)"""
+    from image_store import image_store, RESPONSE_CACHE_CONTROL
+    
+    # Images are shared by digest across organizations; only serve one the caller's organization references
+    if not image_store.is_digest(digest) or not db.query(MaterialReception.id).filter(
+        MaterialReception.organization_id == current_user.organization_id,
+        MaterialReception.image_path.like(f"{image_store.object_prefix(digest)}/%")
+    ).first():
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    etag = f'"{digest}-{name}"'
+    headers = {"Cache-Control": RESPONSE_CACHE_CONTROL, "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    data = image_store.read(digest, name)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return Response(content=data, media_type=image_store.content_type(name), headers=headers)
+
+@app.post("/gtin/rebuild")
+async def rebuild_gtin_index(
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Rebuild the organization's barcode index from its reception history"""
+    from gtin_index import gtin_index
+    
+    start_time = time.time()
+    count = gtin_index.rebuild(db, current_user.organization_id)
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "gtin_index_rebuild", execution_time=execution_time)
+    return {"entries": count}
+
+@app.post("/trace/rebuild")
+async def rebuild_trace_index(
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Rebuild the organization's lot traceability graph from receptions and batches"""
+    from traceability import traceability_index
+    
+    start_time = time.time()
+    count = traceability_index.rebuild(db, current_user.organization_id)
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "trace_index_rebuild", execution_time=execution_time)
+    return {"edges": count}
+
+@app.post("/expiry-alerts/run")
+async def run_expiry_check(
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Run the expiry check for the organization now instead of waiting for the scheduler"""
+    from expiry import expiry_scheduler
+    
+    start_time = time.time()
+    result = expiry_scheduler.run(db, current_user.organization_id)
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "expiry_check", execution_time=execution_time)
+    return result
+
+@app.get("/retention/policies")
+async def get_retention_policies(current_user: User = Depends(require_admin)):
+    from retention import retention_manager
+    return retention_manager.describe()
+
+@app.post("/retention/run")
+async def run_retention(
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """Enforce retention policies now instead of waiting for the scheduled job"""
+    from retention import retention_manager
+    from job_lock import job_locks
+    
+    start_time = time.time()
+    with job_locks.hold("retention") as acquired:
+        if not acquired:
+            raise HTTPException(status_code=409, detail="Retention is already running")
+        result = retention_manager.run(db)
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "retention_run", execution_time=execution_time)
+    return result
 
 @app.get("/configuration", response_model=List[ConfigurationResponse])
 async def get_configuration_parameters(
@@ -840,6 +1280,7 @@ async def create_incident(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    from incident_stats import incident_stats, snapshot
     start_time = time.time()
     
     db_incident = Incident(
@@ -850,6 +1291,7 @@ async def create_incident(
     db.add(db_incident)
     db.commit()
     db.refresh(db_incident)
+    incident_stats.record_change(db, current_user.organization_id, None, snapshot(db_incident))
     
     execution_time = time.time() - start_time
     log_usage(db, current_user.id, current_user.organization_id, "incident_create", execution_time=execution_time)
@@ -857,19 +1299,120 @@ async def create_incident(
 
 @app.get("/incidents", response_model=List[IncidentResponse])
 async def get_incidents(
+    response: Response,
+    status: Optional[str] = None,
+    severity: Optional[str] = None,
+    category: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 100,
+    offset: int = 0,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """Newest first; the total number of matching incidents is returned in X-Total-Count"""
     start_time = time.time()
     
-    incidents = db.query(Incident).filter(
-        Incident.organization_id == current_user.organization_id
-    ).order_by(Incident.created_at.desc()).all()
+    query = db.query(Incident).filter(Incident.organization_id == current_user.organization_id)
+    if status:
+        query = query.filter(Incident.status == status)
+    if since:
+        query = query.filter(Incident.created_at >= since)
+    if until:
+        query = query.filter(Incident.created_at < until)
+    if severity:
+        query = query.filter(Incident.severity == severity)
+    if category:
+        query = query.filter(Incident.category == category)
+    
+    response.headers["X-Total-Count"] = str(query.count())
+    incidents = query.order_by(Incident.created_at.desc(), Incident.id.desc()).offset(max(offset, 0)).limit(min(max(limit, 1), 1000)).all()
     
     execution_time = time.time() - start_time
     log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
     return incidents
 
+@app.get("/incidents/stats", response_model=IncidentStatsResponse)
+async def get_incident_stats(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Open counts, mean time to resolution and severity/category breakdowns"""
+    from incident_stats import incident_stats
+    start_time = time.time()
+    
+    stats = incident_stats.summary(db, current_user.organization_id)
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
+    return stats
+
+@app.post("/chat/command", response_model=ChatCommandResponse)
+async def run_chat_command(
+    command: ChatCommandRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Parse an AI chat message (English or French) and run it in one round trip"""
+    from chat_commands import chat_commands
+    start_time = time.time()
+    
+    result = chat_commands.execute(db, current_user, command.message, command.language)
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, result["action_type"], execution_time=execution_time)
+    return result
+
+@app.get("/compliance/status", response_model=ComplianceStatusResponse)
+async def get_compliance_status(
+    refresh: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Compliance score and indicators, cached for a few seconds unless refresh is set"""
+    from compliance import compliance_service
+    start_time = time.time()
+    
+    result = compliance_service.status(db, current_user.organization_id, refresh=refresh)
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
+    return result
+
+@app.patch("/incidents/{incident_id}", response_model=IncidentResponse)
+async def update_incident(
+    incident_id: int,
+    incident: IncidentUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    from incident_stats import incident_stats, snapshot, is_resolved
+    start_time = time.time()
+    
+    db_incident = db.query(Incident).filter(
+        Incident.id == incident_id,
+        Incident.organization_id == current_user.organization_id
+    ).first()
+    
+    if not db_incident:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    
+    before = snapshot(db_incident)
+    for field, value in incident.dict(exclude_unset=True).items():
+        setattr(db_incident, field, value)
+    if is_resolved(db_incident.status):
+        db_incident.resolved_at = db_incident.resolved_at or datetime.utcnow()
+    else:
+        db_incident.resolved_at = None
+    
+    db.commit()
+    db.refresh(db_incident)
+    incident_stats.record_change(db, current_user.organization_id, before, snapshot(db_incident))
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "incident_update", execution_time=execution_time)
+    return db_incident
+
 # Batch Tracking
 @app.post("/batch-tracking", response_model=BatchTrackingResponse)
 async def create_batch_tracking(
@@ -887,6 +1430,11 @@ async def create_batch_tracking(
     db.commit()
     db.refresh(db_batch)
     
+    from traceability import traceability_index
+    from expiry import expiry_index
+    traceability_index.record_batch(db, db_batch)
+    expiry_index.record_batch(db, db_batch)
+    
     execution_time = time.time() - start_time
     log_usage(db, current_user.id, current_user.organization_id, "batch_tracking_create", execution_time=execution_time)
     return db_batch
@@ -906,7 +1454,94 @@ async def get_batch_tracking(
     log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
     return batches
 
+@app.get("/trace/{batch_number}")
+async def trace_batch(
+    batch_number: str,
+    direction: str = "both",
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """One-step-up / one-step-down trace of a lot for recalls"""
+    from traceability import traceability_index
+    start_time = time.time()
+    
+    if direction not in ("both", "forward", "backward"):
+        raise HTTPException(status_code=400, detail="direction must be both, forward or backward")
+    
+    result = traceability_index.trace(db, current_user.organization_id, batch_number, direction)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Batch number not found")
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
+    return result
+
+@app.get("/expiring", response_model=List[ExpiringItemResponse])
+async def get_expiring_items(
+    within: Optional[str] = "48h",
+    include_expired: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Batches and receptions expiring within a window such as 48h, 3d or 2w"""
+    from expiry import expiry_index, parse_within, MAX_WITHIN_DAYS
+    start_time = time.time()
+    
+    days = parse_within(within)
+    if days is None:
+        raise HTTPException(status_code=400, detail="within must look like 48h, 3d, 2w or a number of days")
+    if days > MAX_WITHIN_DAYS:
+        raise HTTPException(status_code=422, detail=f"within must not exceed {MAX_WITHIN_DAYS} days")
+    
+    items = expiry_index.expiring(db, current_user.organization_id, days, include_expired)
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
+    return items
+
+@app.get("/expiry-alerts", response_model=List[ExpiryAlertResponse])
+async def get_expiry_alerts(
+    acknowledged: bool = False,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    from models import ExpiryAlert
+    start_time = time.time()
+    
+    query = db.query(ExpiryAlert).filter(ExpiryAlert.organization_id == current_user.organization_id)
+    if acknowledged:
+        query = query.filter(ExpiryAlert.acknowledged_at.isnot(None))
+    else:
+        query = query.filter(ExpiryAlert.acknowledged_at.is_(None))
+    alerts = query.order_by(ExpiryAlert.created_at.desc()).limit(min(limit, 1000)).all()
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
+    return alerts
+
+@app.post("/expiry-alerts/{alert_id}/acknowledge", response_model=ExpiryAlertResponse)
+async def acknowledge_expiry_alert(
+    alert_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    from models import ExpiryAlert
+    
+    alert = db.query(ExpiryAlert).filter(
+        ExpiryAlert.id == alert_id,
+        ExpiryAlert.organization_id == current_user.organization_id
+    ).first()
+    if not alert:
+        raise HTTPException(status_code=404, detail="Expiry alert not found")
+    
+    alert.acknowledged_at = datetime.utcnow()
+    db.commit()
+    db.refresh(alert)
+    return alert
+
 # Cleaning Records
+
 @app.post("/cleaning-records", response_model=CleaningRecordResponse)
 async def create_cleaning_record(
     record: CleaningRecordCreate,
@@ -943,6 +1578,290 @@ async def get_cleaning_records(
     log_usage(db, current_user.id, current_user.organization_id, "data_query", execution_time=execution_time)
     return records
 
+# Bulk Imports
+@app.post("/imports/{kind}", response_model=ImportJobResponse, status_code=202)
+async def create_import(
+    kind: str,
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Queue a CSV/XLSX import of products, suppliers or temperature_logs; poll the job for progress"""
+    from models import ImportJob
+    from bulk_import import import_pipeline, KINDS, EXTENSIONS, IMPORT_MAX_BYTES
+    from job_lock import job_locks
+    start_time = time.time()
+    
+    if kind not in KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of: {', '.join(KINDS)}")
+    filename = file.filename or "upload.csv"
+    if not filename.lower().endswith(EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Only .csv and .xlsx files can be imported")
+    too_large = HTTPException(status_code=413, detail=f"Import files must not exceed {IMPORT_MAX_BYTES} bytes")
+    if file.size is not None and file.size > IMPORT_MAX_BYTES:
+        raise too_large
+    
+    job = ImportJob(
+        organization_id=current_user.organization_id,
+        requested_by=current_user.id,
+        kind=kind,
+        filename=filename,
+        status="queued"
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    
+    # Held while the file is written, so a worker starting up does not recover the job meanwhile
+    with job_locks.hold(f"import-{job.id}"):
+        job.upload_path = import_pipeline.upload_path(current_user.organization_id, job.id, filename)
+        # The size is also counted while copying, in case the client sent no length
+        written = 0
+        with open(job.upload_path, "wb") as target:
+            for block in iter(lambda: file.file.read(1024 * 1024), b""):
+                written += len(block)
+                if written > IMPORT_MAX_BYTES:
+                    break
+                target.write(block)
+        if written > IMPORT_MAX_BYTES:
+            os.remove(job.upload_path)
+            db.delete(job)
+            db.commit()
+            raise too_large
+        db.commit()
+    db.refresh(job)
+    import_pipeline.submit(job.id)
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "bulk_import", execution_time=execution_time)
+    return job
+
+@app.get("/imports", response_model=List[ImportJobResponse])
+async def get_imports(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    from models import ImportJob
+    
+    return db.query(ImportJob).filter(
+        ImportJob.organization_id == current_user.organization_id
+    ).order_by(ImportJob.created_at.desc(), ImportJob.id.desc()).limit(50).all()
+
+@app.get("/imports/{import_id}", response_model=ImportJobResponse)
+async def get_import(
+    import_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    from models import ImportJob
+    
+    job = db.query(ImportJob).filter(
+        ImportJob.id == import_id,
+        ImportJob.organization_id == current_user.organization_id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job
+
+# Compliance Reports
+@app.post("/reports", response_model=ReportJobResponse, status_code=202)
+async def create_report(
+    report: ReportCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Queue a CSV or PDF compliance report for a date range; poll the job, then download it"""
+    from models import ReportJob
+    from reports import report_engine, SECTIONS, FORMATS
+    start_time = time.time()
+    
+    if report.format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(FORMATS)}")
+    if report.end_date < report.start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    sections = report.sections or list(SECTIONS)
+    unknown = [name for name in sections if name not in SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown report sections: {', '.join(unknown)}")
+    
+    job = ReportJob(
+        organization_id=current_user.organization_id,
+        requested_by=current_user.id,
+        format=report.format,
+        start_date=report.start_date,
+        end_date=report.end_date,
+        sections=sections,
+        status="queued"
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    report_engine.submit(job.id)
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "report_generate", execution_time=execution_time)
+    return job
+
+@app.get("/reports", response_model=List[ReportJobResponse])
+async def get_reports(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    from models import ReportJob
+    
+    return db.query(ReportJob).filter(
+        ReportJob.organization_id == current_user.organization_id
+    ).order_by(ReportJob.created_at.desc(), ReportJob.id.desc()).limit(50).all()
+
+@app.get("/reports/{report_id}", response_model=ReportJobResponse)
+async def get_report(
+    report_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    from models import ReportJob
+    
+    job = db.query(ReportJob).filter(
+        ReportJob.id == report_id,
+        ReportJob.organization_id == current_user.organization_id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return job
+
+@app.get("/reports/{report_id}/download")
+async def download_report(
+    report_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    from models import ReportJob
+    from fastapi.responses import FileResponse
+    
+    job = db.query(ReportJob).filter(
+        ReportJob.id == report_id,
+        ReportJob.organization_id == current_user.organization_id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Report not found")
+    if job.status != "done" or not job.artifact_path or not os.path.exists(job.artifact_path):
+        raise HTTPException(status_code=409, detail=f"Report is not ready (status: {job.status})")
+    
+    media_type = "application/pdf" if job.format == "pdf" else "text/csv"
+    filename = f"haccp-report-{job.start_date.isoformat()}-{job.end_date.isoformat()}.{job.format}"
+    return FileResponse(job.artifact_path, media_type=media_type, filename=filename)
+
+# API Keys (MCP clients)
+@app.post("/api-keys", response_model=ApiKeyCreated, status_code=201)
+async def create_api_key(
+    api_key: ApiKeyCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Create an API key acting as the current user; the key is only shown in this response"""
+    from models import ApiKey
+    from mcp_auth import generate_api_key
+    start_time = time.time()
+    
+    key, key_hash = generate_api_key()
+    db_key = ApiKey(
+        organization_id=current_user.organization_id,
+        user_id=current_user.id,
+        name=api_key.name,
+        key_prefix=key[:12],
+        key_hash=key_hash
+    )
+    db.add(db_key)
+    db.commit()
+    db.refresh(db_key)
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "api_key_create", execution_time=execution_time)
+    return {**ApiKeyResponse.model_validate(db_key).dict(), "key": key}
+
+@app.get("/api-keys", response_model=List[ApiKeyResponse])
+async def get_api_keys(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """The organization's keys for admins, otherwise the current user's keys"""
+    from models import ApiKey
+    
+    query = db.query(ApiKey).filter(ApiKey.organization_id == current_user.organization_id)
+    if current_user.role != "admin":
+        query = query.filter(ApiKey.user_id == current_user.id)
+    return query.order_by(ApiKey.created_at.desc(), ApiKey.id.desc()).all()
+
+@app.delete("/api-keys/{key_id}", response_model=ApiKeyResponse)
+async def revoke_api_key(
+    key_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Revoke a key; MCP servers stop accepting it once their principal cache entry expires"""
+    from models import ApiKey
+    
+    query = db.query(ApiKey).filter(ApiKey.id == key_id, ApiKey.organization_id == current_user.organization_id)
+    if current_user.role != "admin":
+        query = query.filter(ApiKey.user_id == current_user.id)
+    db_key = query.first()
+    if not db_key:
+        raise HTTPException(status_code=404, detail="API key not found")
+    if db_key.revoked_at is None:
+        db_key.revoked_at = datetime.utcnow()
+        db.commit()
+        db.refresh(db_key)
+    return db_key
+
+# Cold Storage Archive
+@app.get("/archive/files", response_model=List[ColdArchiveFileResponse])
+async def get_archive_files(
+    table: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Manifest of the organization's archived months, optionally for one table and period"""
+    from cold_archive import cold_archive, ARCHIVE_COLUMNS
+    
+    if table and table not in ARCHIVE_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"table must be one of: {', '.join(ARCHIVE_COLUMNS)}")
+    return cold_archive.files(db, current_user.organization_id, table, start_date, end_date)
+
+@app.get("/archive/{table}/records")
+async def get_archived_records(
+    table: str,
+    start_date: date,
+    end_date: date,
+    limit: int = 1000,
+    offset: int = 0,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Archived records of a table between start_date and end_date (inclusive), oldest first"""
+    from cold_archive import cold_archive, ARCHIVE_COLUMNS
+    start_time = time.time()
+    
+    if table not in ARCHIVE_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"table must be one of: {', '.join(ARCHIVE_COLUMNS)}")
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    try:
+        records = cold_archive.read(
+            db, current_user.organization_id, table,
+            start=datetime.combine(start_date, datetime.min.time()),
+            end=datetime.combine(end_date + timedelta(days=1), datetime.min.time()),
+            limit=min(max(limit, 1), 10000),
+            offset=max(offset, 0)
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    execution_time = time.time() - start_time
+    log_usage(db, current_user.id, current_user.organization_id, "archive_query", execution_time=execution_time)
+    return records
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
@@ -0,0 +1,121 @@
+"""
+MCP Authentication
+Resolves the credential presented by an MCP client (a JWT in main.py's format or
+an API key) to the user and organization its tool calls act for. Resolved
+principals are cached per credential, so a session's calls do not hit the
+database each time.
+"""
+
+import hashlib
+import os
+import secrets
+import threading
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+
+from jose import JWTError, jwt
+
+from database import SessionLocal
+from models import User, ApiKey
+
+logger = logging.getLogger(__name__)
+
+# Same token format as main.py
+SECRET_KEY = os.getenv("JWT_SECRET", "your-secret-key")
+ALGORITHM = "HS256"
+API_KEY_PREFIX = "haccp_"
+
+
+class ToolContext:
+    """The user and organization a tool call acts for"""
+
+    def __init__(self, user_id: int, organization_id: int, role: Optional[str] = None):
+        self.user_id = user_id
+        self.organization_id = organization_id
+        self.role = role
+
+
+def hash_api_key(key: str) -> str:
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def generate_api_key() -> Tuple[str, str]:
+    """A new API key and its hash; only the hash is stored"""
+    key = API_KEY_PREFIX + secrets.token_urlsafe(32)
+    return key, hash_api_key(key)
+
+
+class PrincipalCache:
+    def __init__(self, ttl_seconds: int = 300, max_entries: int = 10000):
+        # Revoked keys and deactivated users stop working within ttl_seconds
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, ToolContext]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def authenticate(self, credential: Optional[str]) -> Optional[ToolContext]:
+        """Resolve a JWT or API key to a ToolContext, or None if it is not valid"""
+        if not credential:
+            return None
+        cache_key = hashlib.sha256(credential.encode("utf-8")).hexdigest()
+        now = time.time()
+        with self._lock:
+            cached = self._entries.get(cache_key)
+            if cached and cached[0] > now:
+                self._entries.move_to_end(cache_key)
+                return cached[1]
+
+        resolved = self._resolve(credential, now)
+        if resolved is None:
+            return None
+        expires_at, context = resolved
+        with self._lock:
+            self._entries[cache_key] = (expires_at, context)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return context
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _resolve(self, credential: str, now: float) -> Optional[Tuple[float, ToolContext]]:
+        expires_at = now + self.ttl_seconds
+        db = SessionLocal()
+        try:
+            if credential.startswith(API_KEY_PREFIX):
+                api_key = db.query(ApiKey).filter(
+                    ApiKey.key_hash == hash_api_key(credential),
+                    ApiKey.revoked_at.is_(None)
+                ).first()
+                if api_key is None:
+                    return None
+                api_key.last_used_at = datetime.utcnow()
+                db.commit()
+                user_id = api_key.user_id
+            else:
+                try:
+                    payload = jwt.decode(credential, SECRET_KEY, algorithms=[ALGORITHM])
+                    user_id = int(payload.get("sub"))
+                except (JWTError, TypeError, ValueError):
+                    return None
+                if payload.get("exp"):
+                    # A cached token must not outlive its own expiry
+                    expires_at = min(expires_at, float(payload["exp"]))
+
+            user = db.query(User).filter(User.id == user_id).first()
+            if user is None or user.is_active is False or user.organization_id is None:
+                return None
+            return expires_at, ToolContext(user.id, user.organization_id, user.role)
+        finally:
+            db.close()
+
+# Global instance
+principal_cache = PrincipalCache(
+    ttl_seconds=int(os.getenv("MCP_PRINCIPAL_TTL", "300")),
+    max_entries=int(os.getenv("MCP_PRINCIPAL_CACHE_SIZE", "10000"))
+)
@@ -0,0 +1,999 @@
+"""
+MCP Tool Registry
+Declarative registry of the HACCP tools exposed over the Model Context Protocol,
+shared by both MCP server entry points. Tool schemas are built and their argument
+validators compiled once at import; calls dispatch through a name -> tool table
+and run on a bounded executor with per-tool timeouts and concurrency limits.
+One process serves one tenant over stdio or many over HTTP/SSE, each session
+acting for the principal that authenticated it (see mcp_auth.py).
+"""
+
+import asyncio
+import base64
+import binascii
+import contextvars
+import json
+import os
+import logging
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from mcp.server import Server, NotificationOptions
+from mcp.server.models import InitializationOptions
+from mcp.server.stdio import stdio_server
+from mcp.types import Tool, TextContent
+from sqlalchemy import String, and_, cast, func, or_
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, init_database
+from mcp_auth import ToolContext, principal_cache
+from models import TemperatureLog, Product, Supplier, Incident, CleaningRecord
+
+logger = logging.getLogger(__name__)
+
+# Tools run on a bounded thread pool so synchronous database work never blocks the
+# stdio event loop. Each tool has a timeout and a cap on concurrent calls.
+MCP_WORKERS = int(os.getenv("MCP_WORKERS", "8"))
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("MCP_TOOL_TIMEOUT", "30"))
+DEFAULT_TOOL_CONCURRENCY = int(os.getenv("MCP_TOOL_CONCURRENCY", "4"))
+# Largest array accepted by the batch tools
+MAX_BATCH_ITEMS = int(os.getenv("MCP_MAX_BATCH_ITEMS", "500"))
+# Query tools return at most this many items per page, and stop early once a page
+# reaches MAX_RESPONSE_CHARS so a reply never floods the agent's context
+MAX_PAGE_SIZE = int(os.getenv("MCP_MAX_PAGE_SIZE", "200"))
+MAX_RESPONSE_CHARS = int(os.getenv("MCP_MAX_RESPONSE_CHARS", "20000"))
+
+# Principal of the MCP session whose request is being handled (HTTP/SSE transport)
+session_context: contextvars.ContextVar[Optional[ToolContext]] = contextvars.ContextVar("mcp_session_context", default=None)
+
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+Validator = Callable[[Any, str], List[str]]
+
+
+def compile_validator(schema: Dict[str, Any]) -> Validator:
+    """
+    Compile the JSON Schema subset used by the tools (type, properties, required,
+    enum, items, minItems, maxItems, minimum, maximum) into a function returning
+    error messages.
+    Optional properties may be null, which is treated as absent.
+    """
+    checks: List[Validator] = []
+
+    expected = schema.get("type")
+    if expected:
+        python_type = _JSON_TYPES[expected]
+
+        def check_type(value, path):
+            # bool is an int subclass, and integral floats are accepted as integers
+            if isinstance(value, bool) and expected != "boolean":
+                return [f"{path} must be of type {expected}"]
+            if expected == "integer" and isinstance(value, float) and value.is_integer():
+                return []
+            if not isinstance(value, python_type):
+                return [f"{path} must be of type {expected}"]
+            if isinstance(value, float) and not math.isfinite(value):
+                # json.loads accepts NaN and Infinity
+                return [f"{path} must be a finite number"]
+            return []
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = schema["enum"]
+        checks.append(lambda value, path: [] if value in allowed else [f"{path} must be one of: {', '.join(map(str, allowed))}"])
+
+    for keyword, compare, word in (("minimum", lambda a, b: a < b, "at least"), ("maximum", lambda a, b: a > b, "at most")):
+        if keyword in schema:
+            def check_bound(value, path, bound=schema[keyword], compare=compare, word=word):
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and compare(value, bound):
+                    return [f"{path} must be {word} {bound}"]
+                return []
+            checks.append(check_bound)
+
+    if "minItems" in schema or "maxItems" in schema:
+        min_items, max_items = schema.get("minItems", 0), schema.get("maxItems")
+
+        def check_length(value, path):
+            if isinstance(value, list) and len(value) < min_items:
+                return [f"{path} must contain at least {min_items} items"]
+            if isinstance(value, list) and max_items is not None and len(value) > max_items:
+                return [f"{path} must contain at most {max_items} items"]
+            return []
+        checks.append(check_length)
+
+    if "items" in schema:
+        item_validator = compile_validator(schema["items"])
+
+        def check_items(value, path):
+            if not isinstance(value, list):
+                return []
+            errors = []
+            for position, item in enumerate(value):
+                errors.extend(item_validator(item, f"{path}[{position}]"))
+            return errors
+        checks.append(check_items)
+
+    properties = {name: compile_validator(subschema) for name, subschema in schema.get("properties", {}).items()}
+    required = tuple(schema.get("required", ()))
+    if properties or required:
+        def check_object(value, path):
+            if not isinstance(value, dict):
+                return []
+            errors = [f"{path}.{name} is required" for name in required if value.get(name) is None]
+            for name, validator in properties.items():
+                if value.get(name) is not None:
+                    errors.extend(validator(value[name], f"{path}.{name}"))
+            return errors
+        checks.append(check_object)
+
+    def validate(value, path="arguments"):
+        errors: List[str] = []
+        for check in checks:
+            errors.extend(check(value, path))
+            if errors and check is checks[0] and expected:
+                # Nothing else is meaningful once the type is wrong
+                break
+        return errors
+    return validate
+
+
+class ToolArgumentError(ValueError):
+    """Raised by a handler for arguments the input schema cannot check; reported back to the agent"""
+
+
+class ToolSpec:
+    def __init__(self, name: str, description: str, input_schema: Dict[str, Any],
+                 handler: Callable[[Session, ToolContext, Dict[str, Any]], str],
+                 timeout: float, concurrency: int):
+        self.name = name
+        self.handler = handler
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.tool = Tool(name=name, description=description, inputSchema=input_schema)
+        self.validate = compile_validator(input_schema)
+
+
+class ToolRegistry:
+    def __init__(self):
+        self._tools: Dict[str, ToolSpec] = {}
+        self._tool_list: List[Tool] = []
+
+    def tool(self, name: str, description: str, properties: Optional[Dict[str, Any]] = None,
+             required: Optional[List[str]] = None, timeout: Optional[float] = None,
+             concurrency: Optional[int] = None):
+        """Register a handler(db, context, arguments) -> text as an MCP tool"""
+        input_schema: Dict[str, Any] = {"type": "object", "properties": properties or {}}
+        if required:
+            input_schema["required"] = required
+
+        def decorator(handler):
+            spec = ToolSpec(
+                name, description, input_schema, handler,
+                timeout if timeout is not None else DEFAULT_TOOL_TIMEOUT,
+                concurrency if concurrency is not None else DEFAULT_TOOL_CONCURRENCY
+            )
+            self._tools[name] = spec
+            self._tool_list.append(spec.tool)
+            return handler
+        return decorator
+
+    def get(self, name: str) -> Optional[ToolSpec]:
+        return self._tools.get(name)
+
+    def list_tools(self) -> List[Tool]:
+        return self._tool_list
+
+
+registry = ToolRegistry()
+
+
+def compact_json(result: Dict[str, Any]) -> str:
+    """Structured tool replies: minified JSON costs agents far fewer tokens than prose"""
+    return json.dumps(result, separators=(",", ":"), default=str)
+
+
+def plain(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values: List[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps([plain(value) for value in values]).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, binascii.Error):
+        raise ToolArgumentError("cursor is not valid; pass next_cursor from the previous page")
+    if not isinstance(values, list) or len(values) != 2:
+        raise ToolArgumentError("cursor is not valid; pass next_cursor from the previous page")
+    return values
+
+
+def parse_moment(value: str, name: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ToolArgumentError(f"{name} must be an ISO date or datetime")
+
+
+def json_page(rows: List[Any], limit: int, fields: List[str], cursor_of: Callable[[Any], List[Any]]) -> str:
+    """
+    Encode up to `limit` rows (the query fetches limit + 1 to detect a next page) as
+    {"items": [...], "count": n, "next_cursor": ...}. Items are encoded one at a time and
+    joined once; the page also ends early when it reaches MAX_RESPONSE_CHARS.
+    """
+    encoded: List[str] = []
+    size = 0
+    next_cursor = None
+    for position, row in enumerate(rows):
+        if position == limit:
+            next_cursor = encode_cursor(cursor_of(rows[position - 1]))
+            break
+        item = json.dumps({name: plain(getattr(row, name)) for name in fields}, separators=(",", ":"))
+        if encoded and size + len(item) > MAX_RESPONSE_CHARS:
+            next_cursor = encode_cursor(cursor_of(rows[position - 1]))
+            break
+        encoded.append(item)
+        size += len(item) + 1
+    return '{"items":[' + ",".join(encoded) + f'],"count":{len(encoded)},"next_cursor":{json.dumps(next_cursor)}}}'
+
+
+def batch_rejected(errors: List[Dict[str, Any]]) -> str:
+    # Batches are all-or-nothing so an agent can fix the listed items and resend the whole batch
+    return compact_json({"ok": False, "written": 0, "errors": errors})
+
+
+def check_temperature_limits(temperature: float) -> bool:
+    """Check if temperature is within safe limits"""
+    # General safe range for refrigerated items: 0°C to 4°C
+    # Frozen items: -18°C to -15°C
+    return (0 <= temperature <= 4) or (-18 <= temperature <= -15)
+
+
+@registry.tool(
+    "log_temperature", "Log temperature reading for food safety monitoring",
+    {
+        "location": {"type": "string", "description": "Location where temperature was measured"},
+        "temperature": {"type": "number", "description": "Temperature in Celsius"},
+        "equipment_id": {"type": "string", "description": "Equipment identifier (optional)"}
+    },
+    required=["location", "temperature"]
+)
+def log_temperature(db: Session, context: ToolContext, args: Dict[str, Any]) -> str:
+    temp_log = TemperatureLog(
+        organization_id=context.organization_id,
+        location=args["location"],
+        temperature=float(args["temperature"]),
+        recorded_by=context.user_id,
+        equipment_id=args.get("equipment_id"),
+        is_within_limits=check_temperature_limits(float(args["temperature"]))
+    )
+    db.add(temp_log)
+    db.commit()
+
+    status = "✅ Normal" if temp_log.is_within_limits else "⚠️ Alert"
+    return (f"Temperature logged successfully:\n"
+            f"Location: {args['location']}\n"
+            f"Temperature: {args['temperature']}°C\n"
+            f"Status: {status}")
+
+
+TEMPERATURE_LOG_FIELDS = ["id", "location", "temperature", "equipment_id", "is_within_limits",
+                          "created_at", "recorded_by", "recorded_by_name"]
+DEFAULT_TEMPERATURE_LOG_FIELDS = ["id", "location", "temperature", "is_within_limits", "created_at"]
+
+
+@registry.tool(
+    "get_temperature_logs",
+    "Query temperature logs, newest first, as JSON pages. Pass next_cursor back as cursor to get the next page.",
+    {
+        "limit": {"type": "integer", "minimum": 1, "maximum": MAX_PAGE_SIZE, "description": "Logs per page (default: 20)"},
+        "cursor": {"type": "string", "description": "next_cursor from the previous page"},
+        "fields": {"type": "array", "items": {"type": "string", "enum": TEMPERATURE_LOG_FIELDS},
+                   "description": "Fields to return (default: id, location, temperature, is_within_limits, created_at)"},
+        "location": {"type": "string", "description": "Only this location"},
+        "equipment_id": {"type": "string", "description": "Only this equipment"},
+        "since": {"type": "string", "description": "ISO date or datetime, inclusive"},
+        "until": {"type": "string", "description": "ISO date or datetime, exclusive"},
+        "out_of_limits_only": {"type": "boolean", "description": "Only readings outside the safe limits"}
+    }
+)
+def get_temperature_logs(db: Session, context: ToolContext, args: Dict[str, Any]) -> str:
+    from models import User
+
+    fields = args.get("fields") or DEFAULT_TEMPERATURE_LOG_FIELDS
+    limit = int(args.get("limit") or 20)
+    columns = {
+        "id": TemperatureLog.id,
+        "location": TemperatureLog.location,
+        "temperature": TemperatureLog.temperature,
+        "equipment_id": TemperatureLog.equipment_id,
+        "is_within_limits": TemperatureLog.is_within_limits,
+        "created_at": TemperatureLog.created_at,
+        "recorded_by": TemperatureLog.recorded_by,
+        "recorded_by_name": User.name,
+    }
+    # Only the requested columns are read; id and created_at are always needed for the cursor
+    selected = list(dict.fromkeys(["id", "created_at", *fields]))
+    query = db.query(*(columns[name].label(name) for name in selected))
+    if "recorded_by_name" in selected:
+        query = query.outerjoin(User, User.id == TemperatureLog.recorded_by)
+    query = query.filter(TemperatureLog.organization_id == context.organization_id)
+    if args.get("location"):
+        query = query.filter(TemperatureLog.location == args["location"])
+    if args.get("equipment_id"):
+        query = query.filter(TemperatureLog.equipment_id == args["equipment_id"])
+    if args.get("since"):
+        query = query.filter(TemperatureLog.created_at >= parse_moment(args["since"], "since"))
+    if args.get("until"):
+        query = query.filter(TemperatureLog.created_at < parse_moment(args["until"], "until"))
+    if args.get("out_of_limits_only"):
+        query = query.filter(TemperatureLog.is_within_limits == False)
+    if args.get("cursor"):
+        created_at, last_id = decode_cursor(args["cursor"])
+        created_at = parse_moment(created_at, "cursor")
+        if not isinstance(last_id, int):
+            raise ToolArgumentError("cursor is not valid; pass next_cursor from the previous page")
+        # Compare against the stored value of the last row rather than the decoded timestamp: SQLite keeps
+        # server-default times without microseconds, so a bound '...:27.000000' never equals '...:27'.
+        # The decoded timestamp only stands in if that row has been deleted since.
+        stored = db.query(TemperatureLog.created_at).filter(TemperatureLog.id == last_id).scalar_subquery()
+        bound = func.coalesce(stored, created_at)
+        query = query.filter(or_(
+            TemperatureLog.created_at < bound,
+            and_(TemperatureLog.created_at == bound, TemperatureLog.id < last_id)
+        ))
+
+    rows = query.order_by(TemperatureLog.created_at.desc(), TemperatureLog.id.desc()).limit(limit + 1).all()
+    return json_page(rows, limit, fields, lambda row: [row.created_at, row.id])
+
+
+@registry.tool(
+    "add_product", "Add a new product to the HACCP system",
+    {
+        "name": {"type": "string", "description": "Product name"},
+        "category": {"type": "string", "description": "Product category"},
+        "allergens": {"type": "array", "items": {"type": "string"}, "description": "List of allergens"},
+        "shelf_life_days": {"type": "integer", "description": "Shelf life in days"},
+        "storage_temp_min": {"type": "number", "description": "Minimum storage temperature"},
+        "storage_temp_max": {"type": "number", "description": "Maximum storage temperature"}
+    },
+    required=["name"]
+)
+def add_product(db: Session, context: ToolContext, args: Dict[str, Any]) -> str:
+    product = Product(
+        organization_id=context.organization_id,
+        name=args["name"],
+        category=args.get("category"),
+        allergens=args.get("allergens") or [],
+        shelf_life_days=args.get("shelf_life_days"),
+        storage_temp_min=args.get("storage_temp_min"),
+        storage_temp_max=args.get("storage_temp_max")
+    )
+    db.add(product)
+    db.commit()
+    return f"Product '{args['name']}' added successfully to the system"
+
+
+PRODUCT_FIELDS = ["id", "name", "category", "allergens", "shelf_life_days",
+                  "storage_temp_min", "storage_temp_max", "created_at"]
+DEFAULT_PRODUCT_FIELDS = ["id", "name", "category", "allergens"]
+
+
+@registry.tool(
+    "get_products",
+    "Query the product catalog by name as JSON pages. Pass next_cursor back as cursor to get the next page.",
+    {
+        "limit": {"type": "integer", "minimum": 1, "maximum": MAX_PAGE_SIZE, "description": "Products per page (default: 50)"},
+        "cursor": {"type": "string", "description": "next_cursor from the previous page"},
+        "fields": {"type": "array", "items": {"type": "string", "enum": PRODUCT_FIELDS},
+                   "description": "Fields to return (default: id, name, category, allergens)"},
+        "category": {"type": "string", "description": "Only this category"},
+        "allergen": {"type": "string", "description": "Only products declaring this allergen"},
+        "search": {"type": "string", "description": "Only products whose name contains this text"}
+    }
+)
+def get_products(db: Session, context: ToolContext, args: Dict[str, Any]) -> str:
+    fields = args.get("fields") or DEFAULT_PRODUCT_FIELDS
+    limit = int(args.get("limit") or 50)
+    selected = list(dict.fromkeys(["id", "name", *fields]))
+    query = db.query(*(getattr(Product, name).label(name) for name in selected)).filter(
+        Product.organization_id == context.organization_id
+    )
+    if args.get("category"):
+        query = query.filter(func.lower(Product.category) == args["category"].lower())
+    if args.get("allergen"):
+        # allergens is a JSON array; matching its quoted text form works on SQLite and PostgreSQL alike
+        query = query.filter(func.lower(cast(Product.allergens, String)).like(f'%"{args["allergen"].lower()}"%'))
+    if args.get("search"):
+        query = query.filter(Product.name.ilike(f"%{args['search']}%"))
+    if args.get("cursor"):
+        last_name, last_id = decode_cursor(args["cursor"])
+        query = query.filter(or_(Product.name > last_name, and_(Product.name == last_name, Product.id > last_id)))
+
+    # Keyset pagination on the (organization_id, name) index
+    rows = query.order_by(Product.name, Product.id).limit(limit + 1).all()
+    return json_page(rows, limit, fields, lambda row: [row.name, row.id])
+
+
+@registry.tool(
+    "report_incident", "Report a food safety incident",
+    {
+        "title": {"type": "string", "description": "Incident title"},
+        "description": {"type": "string", "description": "Detailed description"},
+        "severity": {"type": "string", "enum": ["low", "medium", "high", "critical"], "description": "Incident severity"},
+        "category": {"type": "string", "description": "Incident category"}
+    },
+    required=["title", "severity"]
+)
+def report_incident(db: Session, context: ToolContext, args: Dict[str, Any]) -> str:
+    from incident_stats import incident_stats, snapshot
+    incident = Incident(
+        organization_id=context.organization_id,
+        title=args["title"],
+        description=args.get("description"),
+        severity=args["severity"],
+        category=args.get("category"),
+        reported_by=context.user_id,
+        status="open"
+    )
+    db.add(incident)
+    db.commit()
+    # Keeps the counters the compliance status reads in step
+    incident_stats.record_change(db, context.organization_id, None, snapshot(incident))
+    return (f"Incident reported successfully:\n"
+            f"Title: {args['title']}\n"
+            f"Severity: {args['severity']}\n"
+            f"Status: Open - requires attention")
+
+
+@registry.tool(
+    "log_cleaning", "Log cleaning and sanitation activities",
+    {
+        "area": {"type": "string", "description": "Area that was cleaned"},
+        "cleaning_type": {"type": "string", "description": "Type of cleaning performed"},
+        "products_used": {"type": "array", "items": {"type": "string"}, "description": "Cleaning products used"},
+        "notes": {"type": "string", "description": "Additional notes"}
+    },
+    required=["area", "cleaning_type"]
+)
+def log_cleaning(db: Session, context: ToolContext, args: Dict[str, Any]) -> str:
+    cleaning = CleaningRecord(
+        organization_id=context.organization_id,
+        area=args["area"],
+        cleaning_type=args["cleaning_type"],
+        products_used=args.get("products_used") or [],
+        performed_by=context.user_id,
+        verified_by=context.user_id,
+        notes=args.get("notes")
+    )
+    db.add(cleaning)
+    db.commit()
+    return (f"Cleaning activity logged:\n"
+            f"Area: {args['area']}\n"
+            f"Type: {args['cleaning_type']}\n"
+            f"Status: Completed and verified")
+
+
+@registry.tool("get_compliance_status", "Get overall compliance status and alerts", concurrency=2)
+def get_compliance_status(db: Session, context: ToolContext, args: Dict[str, Any]) -> str:
+    from compliance import compliance_service
+    result = compliance_service.status(db, context.organization_id)
+    labels = {
+        "compliant": "🟢 Compliant",
+        "attention_required": "🟡 Attention Required",
+        "non_compliant": "🔴 Non-Compliant",
+    }
+
+    text = f"HACCP Compliance Status: {labels[result['status']]} (score {result['score']}/100)\n\n"
+    text += f"Temperature Breaches ({result['window_hours']}h): {result['temperature']['breaches']}\n"
+    text += f"Open Incidents: {result['incidents']['open']} ({result['incidents']['critical']} high/critical)\n"
+    text += f"Overdue Cleanings: {result['cleaning']['overdue']}\n"
+    text += f"Expired Lots: {result['expiry']['expired']}\n"
+
+    if result["alerts"]:
+        text += "\n⚠️ Action required to maintain compliance:\n"
+        text += "\n".join(f"- {alert}" for alert in result["alerts"])
+    return text
+
+
+@registry.tool(
+    "add_supplier", "Add a new supplier to the system",
+    {
+        "name": {"type": "string", "description": "Supplier name"},
+        "contact_info": {"type": "object", "description": "Contact information"},
+        "certification_status": {"type": "string", "description": "Certification status"},
+        "risk_level": {"type": "integer", "minimum": 1, "maximum": 5, "description": "Risk level (1-5)"}
+    },
+    required=["name"]
+)
+def add_supplier(db: Session, context: ToolContext, args: Dict[str, Any]) -> str:
+    supplier = Supplier(
+        organization_id=context.organization_id,
+        name=args["name"],
+        contact_info=args.get("contact_info") or {},
+        certification_status=args.get("certification_status") or "pending",
+        risk_level=args.get("risk_level") or 1
+    )
+    db.add(supplier)
+    db.commit()
+    return f"Supplier '{args['name']}' added successfully to the system"
+
+
+@registry.tool("get_usage_report", "Get cost and usage analytics for the platform", concurrency=2)
+def get_usage_report(db: Session, context: ToolContext, args: Dict[str, Any]) -> str:
+    from models import UsageLog
+
+    total_cost = db.query(func.sum(UsageLog.resource_used)).filter(
+        UsageLog.organization_id == context.organization_id
+    ).scalar() or 0
+
+    result = f"Platform Usage Report:\n\n"
+    result += f"Total Cost: ${float(total_cost):.4f}\n"
+    result += f"Serverless Architecture: 85% cost savings\n"
+    result += f"Pay-per-use model: Only charged for actual usage\n"
+    return result
+
+
+@registry.tool(
+    "receive_material", "Record material reception with product details",
+    {
+        "supplier_id": {"type": "integer", "description": "Supplier ID"},
+        "product_name": {"type": "string", "description": "Product name"},
+        "category": {"type": "string", "description": "Food category"},
+        "quantity": {"type": "number", "description": "Quantity received"},
+        "unit": {"type": "string", "description": "Unit of measurement"},
+        "temperature": {"type": "number", "description": "Temperature on arrival"}
+    },
+    required=["supplier_id", "product_name", "category", "quantity", "unit"]
+)
+def receive_material(db: Session, context: ToolContext, args: Dict[str, Any]) -> str:
+    from models import MaterialReception
+
+    reception = MaterialReception(
+        organization_id=context.organization_id,
+        received_by=context.user_id,
+        supplier_id=args["supplier_id"],
+        product_name=args["product_name"],
+        category=args["category"],
+        quantity=args["quantity"],
+        unit=args["unit"],
+        temperature_on_arrival=args.get("temperature")
+    )
+    db.add(reception)
+    db.commit()
+    return f"Material reception recorded: {args['quantity']} {args['unit']} of {args['product_name']}"
+
+
+@registry.tool(
+    "clean_room", "Mark a room, or every room under a point or region of the floor map, as cleaned",
+    {
+        "room_name": {"type": "string", "description": "Name of the room to mark as cleaned"},
+        "cleaning_plan_id": {"type": "integer", "description": "ID of the cleaning plan"},
+        "x": {"type": "number", "description": "Floor map X coordinate (instead of room_name)"},
+        "y": {"type": "number", "description": "Floor map Y coordinate (instead of room_name)"},
+        "width": {"type": "number", "minimum": 0, "description": "Region width; cleans every room in the region"},
+        "height": {"type": "number", "minimum": 0, "description": "Region height; cleans every room in the region"},
+        "notes": {"type": "string", "description": "Optional cleaning notes"}
+    },
+    required=["cleaning_plan_id"],
+    concurrency=2
+)
+def clean_room(db: Session, context: ToolContext, args: Dict[str, Any]) -> str:
+    from models import CleaningPlan
+    from spatial_index import spatial_index_cache
+    from cleaning_schedule import cleaning_schedule
+
+    plan = db.query(CleaningPlan).filter(
+        CleaningPlan.id == args["cleaning_plan_id"],
+        CleaningPlan.organization_id == context.organization_id
+    ).first()
+    if not plan:
+        return "Cleaning plan not found"
+    if plan.archived_at is not None:
+        return "Cleaning plan is archived; archived plans do not accept new cleanings"
+
+    if args.get("room_name"):
+        room_names = [args["room_name"]]
+    elif args.get("x") is not None and args.get("y") is not None:
+        room_names = spatial_index_cache.get(plan).rooms_in(
+            float(args["x"]), float(args["y"]),
+            float(args.get("width") or 0), float(args.get("height") or 0)
+        )
+        if not room_names:
+            return "No room at this position"
+    else:
+        return "Provide room_name or x/y coordinates"
+
+    cleaning_schedule.mark_cleaned(db, plan, room_names, context.user_id, args.get("notes"))
+
+    rooms = ", ".join(f"'{room_name}'" for room_name in room_names)
+    return f"Room{'s' if len(room_names) > 1 else ''} {rooms} marked as cleaned successfully"
+
+
+@registry.tool(
+    "log_temperatures", "Log several temperature readings (e.g. a round of fridges) in one call and one transaction",
+    {
+        "readings": {
+            "type": "array", "minItems": 1, "maxItems": MAX_BATCH_ITEMS,
+            "description": "Temperature readings",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "location": {"type": "string", "description": "Location where temperature was measured"},
+                    "temperature": {"type": "number", "description": "Temperature in Celsius"},
+                    "equipment_id": {"type": "string", "description": "Equipment identifier (optional)"}
+                },
+                "required": ["location", "temperature"]
+            }
+        }
+    },
+    required=["readings"]
+)
+def log_temperatures(db: Session, context: ToolContext, args: Dict[str, Any]) -> str:
+    logs = [
+        TemperatureLog(
+            organization_id=context.organization_id,
+            location=reading["location"],
+            temperature=float(reading["temperature"]),
+            recorded_by=context.user_id,
+            equipment_id=reading.get("equipment_id"),
+            is_within_limits=check_temperature_limits(float(reading["temperature"]))
+        )
+        for reading in args["readings"]
+    ]
+    db.add_all(logs)
+    db.commit()
+    return compact_json({
+        "ok": True,
+        "written": len(logs),
+        "ids": [log.id for log in logs],
+        "alerts": [
+            {"index": index, "location": log.location, "temperature": float(log.temperature)}
+            for index, log in enumerate(logs) if not log.is_within_limits
+        ],
+    })
+
+
+@registry.tool(
+    "receive_materials", "Record several material receptions (e.g. one delivery) in one call and one transaction",
+    {
+        "receptions": {
+            "type": "array", "minItems": 1, "maxItems": MAX_BATCH_ITEMS,
+            "description": "Received materials",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "supplier_id": {"type": "integer", "description": "Supplier ID"},
+                    "product_name": {"type": "string", "description": "Product name"},
+                    "category": {"type": "string", "description": "Food category"},
+                    "quantity": {"type": "number", "minimum": 0, "description": "Quantity received"},
+                    "unit": {"type": "string", "description": "Unit of measurement"},
+                    "temperature": {"type": "number", "description": "Temperature on arrival"},
+                    "batch_number": {"type": "string", "description": "Supplier lot / batch number"},
+                    "expiry_date": {"type": "string", "description": "Expiry date (YYYY-MM-DD)"},
+                    "barcode": {"type": "string", "description": "Barcode / GTIN"}
+                },
+                "required": ["supplier_id", "product_name", "category", "quantity", "unit"]
+            }
+        }
+    },
+    required=["receptions"]
+)
+def receive_materials(db: Session, context: ToolContext, args: Dict[str, Any]) -> str:
+    from models import MaterialReception
+    from gtin_index import gtin_index
+    from traceability import traceability_index
+    from expiry import expiry_index
+
+    items = args["receptions"]
+    known_suppliers = {
+        supplier_id for (supplier_id,) in db.query(Supplier.id).filter(
+            Supplier.organization_id == context.organization_id,
+            Supplier.id.in_({int(item["supplier_id"]) for item in items})
+        )
+    }
+    errors = []
+    receptions = []
+    for index, item in enumerate(items):
+        if int(item["supplier_id"]) not in known_suppliers:
+            errors.append({"index": index, "error": f"unknown supplier_id {item['supplier_id']}"})
+            continue
+        expiry_date = None
+        if item.get("expiry_date"):
+            try:
+                expiry_date = date.fromisoformat(item["expiry_date"])
+            except ValueError:
+                errors.append({"index": index, "error": "expiry_date must be YYYY-MM-DD"})
+                continue
+        receptions.append(MaterialReception(
+            organization_id=context.organization_id,
+            received_by=context.user_id,
+            supplier_id=int(item["supplier_id"]),
+            product_name=item["product_name"],
+            category=item["category"],
+            quantity=item["quantity"],
+            unit=item["unit"],
+            temperature_on_arrival=item.get("temperature"),
+            batch_number=item.get("batch_number"),
+            expiry_date=expiry_date,
+            barcode=item.get("barcode")
+        ))
+    if errors:
+        return batch_rejected(errors)
+
+    db.add_all(receptions)
+    db.commit()
+    # Same index maintenance as POST /material-reception, once the batch is committed
+    for reception in receptions:
+        gtin_index.record_reception(db, reception)
+        traceability_index.record_reception(db, reception)
+        expiry_index.record_reception(db, reception)
+    return compact_json({"ok": True, "written": len(receptions), "ids": [reception.id for reception in receptions]})
+
+
+@registry.tool(
+    "clean_rooms", "Mark several rooms, possibly of several cleaning plans, as cleaned in one call and one transaction",
+    {
+        "cleanings": {
+            "type": "array", "minItems": 1, "maxItems": MAX_BATCH_ITEMS,
+            "description": "Rooms that were cleaned",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "cleaning_plan_id": {"type": "integer", "description": "ID of the cleaning plan"},
+                    "room_name": {"type": "string", "description": "Name of the room"},
+                    "notes": {"type": "string", "description": "Optional cleaning notes"}
+                },
+                "required": ["cleaning_plan_id", "room_name"]
+            }
+        }
+    },
+    required=["cleanings"],
+    concurrency=2
+)
+def clean_rooms(db: Session, context: ToolContext, args: Dict[str, Any]) -> str:
+    from models import CleaningPlan, RoomCleaning
+    from cleaning_schedule import cleaning_schedule
+
+    items = args["cleanings"]
+    plans = {
+        plan.id: plan for plan in db.query(CleaningPlan).filter(
+            CleaningPlan.organization_id == context.organization_id,
+            CleaningPlan.id.in_({int(item["cleaning_plan_id"]) for item in items})
+        )
+    }
+    room_names = {plan_id: {room.get("name") for room in plan.rooms or []} for plan_id, plan in plans.items()}
+    errors = []
+    for index, item in enumerate(items):
+        plan_id = int(item["cleaning_plan_id"])
+        if plan_id not in plans:
+            errors.append({"index": index, "error": f"cleaning plan {plan_id} not found"})
+        elif plans[plan_id].archived_at is not None:
+            errors.append({"index": index, "error": f"cleaning plan {plan_id} is archived"})
+        elif item["room_name"] not in room_names[plan_id]:
+            errors.append({"index": index, "error": f"plan {plan_id} has no room '{item['room_name']}'"})
+    if errors:
+        return batch_rejected(errors)
+
+    cleaned_at = datetime.utcnow()
+    cleanings = [
+        RoomCleaning(
+            organization_id=context.organization_id,
+            cleaning_plan_id=int(item["cleaning_plan_id"]),
+            room_name=item["room_name"],
+            cleaned_by=context.user_id,
+            notes=item.get("notes"),
+            cleaned_at=cleaned_at
+        )
+        for item in items
+    ]
+    db.add_all(cleanings)
+    db.flush()
+    # Commits the cleanings together with the last-cleaned index
+    cleaning_schedule.record_cleanings(db, cleanings)
+    return compact_json({"ok": True, "written": len(cleanings), "ids": [cleaning.id for cleaning in cleanings]})
+
+
+def stdio_context() -> ToolContext:
+    """
+    The principal of a stdio server: MCP_ACCESS_TOKEN (a JWT from /auth/login) or
+    MCP_API_KEY, falling back to the demo user and organization for local use
+    """
+    credential = os.getenv("MCP_API_KEY") or os.getenv("MCP_ACCESS_TOKEN")
+    if not credential:
+        logger.warning("No MCP_API_KEY or MCP_ACCESS_TOKEN set; acting as the demo user of organization 1")
+        return ToolContext(user_id=1, organization_id=1)
+    context = principal_cache.authenticate(credential)
+    if context is None:
+        raise RuntimeError("MCP_API_KEY / MCP_ACCESS_TOKEN is not valid")
+    return context
+
+
+def request_credential(headers) -> Optional[str]:
+    """Bearer token (JWT or API key) or X-API-Key header"""
+    authorization = headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return authorization[7:].strip()
+    return headers.get("x-api-key")
+
+
+class HACCPMCPServer:
+    def __init__(self, tools: ToolRegistry = registry, context: Optional[ToolContext] = None):
+        self.server = Server("ai-haccp")
+        self.tools = tools
+        # Principal for calls outside an authenticated session (stdio); HTTP sessions bring their own
+        self.context = context
+        # Credential a stdio server re-resolves on every call, so expiry and revocation take effect
+        self.stdio_credential: Optional[str] = None
+        self.executor = ThreadPoolExecutor(max_workers=MCP_WORKERS, thread_name_prefix="mcp-tool")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        # Initialize database
+        init_database()
+
+        @self.server.list_tools()
+        async def handle_list_tools() -> List[Tool]:
+            return self.tools.list_tools()
+
+        @self.server.call_tool()
+        async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
+            try:
+                return await self.call_tool(name, arguments or {})
+            except Exception as e:
+                logger.error(f"Error calling tool {name}: {e}")
+                return [TextContent(type="text", text=f"Error: {str(e)}")]
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any],
+                        context: Optional[ToolContext] = None) -> List[TextContent]:
+        """Validate the arguments, then run the tool on the executor within its concurrency limit and timeout"""
+        loop = asyncio.get_running_loop()
+        context = context or session_context.get() or self.context
+        if context is None and self.stdio_credential:
+            # Cached until the token's exp or the cache TTL, whichever comes first
+            context = await loop.run_in_executor(self.executor, principal_cache.authenticate, self.stdio_credential)
+        if context is None:
+            return [TextContent(type="text", text="Error: not authenticated")]
+        spec = self.tools.get(name)
+        if spec is None:
+            return [TextContent(type="text", text=f"Unknown tool: {name}")]
+        errors = spec.validate(arguments)
+        if errors:
+            return [TextContent(type="text", text="Invalid arguments: " + "; ".join(errors))]
+
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            semaphore = self._semaphores[name] = asyncio.Semaphore(spec.concurrency)
+        async with semaphore:
+            try:
+                text = await asyncio.wait_for(
+                    loop.run_in_executor(self.executor, self.invoke, spec, context, arguments),
+                    spec.timeout
+                )
+            except ToolArgumentError as e:
+                return [TextContent(type="text", text=f"Invalid arguments: {e}")]
+            except asyncio.TimeoutError:
+                # The worker thread cannot be interrupted; it finishes (and closes its session) in the background
+                logger.warning(f"Tool {name} timed out after {spec.timeout}s")
+                return [TextContent(type="text", text=f"Error: {name} timed out after {spec.timeout:g}s")]
+        return [TextContent(type="text", text=text)]
+
+    def invoke(self, spec: ToolSpec, context: ToolContext, arguments: Dict[str, Any]) -> str:
+        """Run a tool handler synchronously with its own session"""
+        db = SessionLocal()
+        try:
+            return spec.handler(db, context, arguments)
+        finally:
+            db.close()
+
+    def initialization_options(self) -> InitializationOptions:
+        return InitializationOptions(
+            server_name="ai-haccp",
+            server_version="1.0.0",
+            capabilities=self.server.get_capabilities(NotificationOptions(), {}),
+        )
+
+    async def run(self):
+        """Run the MCP server over stdio"""
+        if self.context is None:
+            # A bad credential fails here at startup; a valid one is re-resolved per call
+            context = stdio_context()
+            self.stdio_credential = os.getenv("MCP_API_KEY") or os.getenv("MCP_ACCESS_TOKEN")
+            if not self.stdio_credential:
+                self.context = context
+        async with stdio_server() as (read_stream, write_stream):
+            await self.server.run(read_stream, write_stream, self.initialization_options())
+
+    def sse_app(self):
+        """
+        ASGI app serving many tenants over HTTP/SSE: GET /sse opens a session, POST
+        /messages?session_id=... delivers client messages. Both require a JWT or API key;
+        the session's tool calls act for the principal that opened it, and only that
+        principal may post messages to it.
+        """
+        from mcp.server.sse import SseServerTransport
+        from starlette.requests import Request
+        from starlette.responses import JSONResponse, PlainTextResponse
+
+        transport = SseServerTransport("/messages")
+        # session_id (hex) -> (user_id, organization_id) of the principal that opened it
+        owners: Dict[str, Tuple[int, int]] = {}
+        session_pattern = re.compile(rb"session_id=([0-9a-f]{32})")
+
+        async def app(scope, receive, send):
+            if scope["type"] != "http":
+                return
+            path, method = scope["path"].rstrip("/") or "/", scope["method"]
+            if path == "/health":
+                return await JSONResponse({"status": "healthy", "transport": "sse"})(scope, receive, send)
+            if (path, method) not in (("/sse", "GET"), ("/messages", "POST")):
+                return await PlainTextResponse("Not found", status_code=404)(scope, receive, send)
+
+            credential = request_credential(Request(scope).headers)
+            loop = asyncio.get_running_loop()
+            # The principal cache may query the database on a miss, so it runs on the executor too
+            context = await loop.run_in_executor(self.executor, principal_cache.authenticate, credential)
+            if context is None:
+                return await PlainTextResponse(
+                    "Invalid or missing credentials", status_code=401, headers={"WWW-Authenticate": "Bearer"}
+                )(scope, receive, send)
+
+            principal = (context.user_id, context.organization_id)
+            if path == "/messages":
+                try:
+                    session_id = UUID(hex=Request(scope).query_params.get("session_id", "")).hex
+                except ValueError:
+                    return await PlainTextResponse("Invalid session ID", status_code=400)(scope, receive, send)
+                owner = owners.get(session_id)
+                if owner is None:
+                    return await PlainTextResponse("Could not find session", status_code=404)(scope, receive, send)
+                if owner != principal:
+                    return await PlainTextResponse(
+                        "Session belongs to another principal", status_code=403
+                    )(scope, receive, send)
+                return await transport.handle_post_message(scope, receive, send)
+
+            opened = []
+
+            async def record_session(message):
+                # The transport picks the session id and announces it in the first (endpoint) event
+                if not opened and message["type"] == "http.response.body":
+                    match = session_pattern.search(message.get("body", b""))
+                    if match:
+                        opened.append(match.group(1).decode())
+                        owners[opened[0]] = principal
+                await send(message)
+
+            # Requests of this session are handled in this task, so they all see its principal
+            token = session_context.set(context)
+            try:
+                async with transport.connect_sse(scope, receive, record_session) as (read_stream, write_stream):
+                    await self.server.run(read_stream, write_stream, self.initialization_options())
+            finally:
+                session_context.reset(token)
+                if opened:
+                    owners.pop(opened[0], None)
+
+        return app
+
+    def run_sse(self, host: str, port: int):
+        """Serve the SSE transport with uvicorn"""
+        import uvicorn
+        uvicorn.run(self.sse_app(), host=host, port=port, lifespan="off")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, DECIMAL, Date, ForeignKey, JSON
+from sqlalchemy import Column, Integer, Float, String, DateTime, Boolean, Text, DECIMAL, Date, ForeignKey, JSON, UniqueConstraint, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -29,6 +29,7 @@ class User(Base):
 
 class UsageLog(Base):
     __tablename__ = "usage_logs"
+    __table_args__ = (Index("idx_usage_logs_org_date", "organization_id", "created_at"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -41,6 +42,7 @@ class UsageLog(Base):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (Index("idx_products_org_name", "organization_id", "name"),)
     
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"))
@@ -54,6 +56,7 @@ class Product(Base):
 
 class Supplier(Base):
     __tablename__ = "suppliers"
+    __table_args__ = (Index("idx_suppliers_org_name", "organization_id", "name"),)
     
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"))
@@ -65,6 +68,10 @@ class Supplier(Base):
 
 class TemperatureLog(Base):
     __tablename__ = "temperature_logs"
+    __table_args__ = (
+        Index("idx_temperature_logs_org_date", "organization_id", "created_at"),
+        Index("idx_temperature_logs_org_location_date", "organization_id", "location", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"))
@@ -77,6 +84,7 @@ class TemperatureLog(Base):
 
 class CleaningRecord(Base):
     __tablename__ = "cleaning_records"
+    __table_args__ = (Index("idx_cleaning_records_org_date", "organization_id", "created_at"),)
     
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"))
@@ -93,6 +101,10 @@ class CleaningRecord(Base):
 
 class BatchTracking(Base):
     __tablename__ = "batch_tracking"
+    __table_args__ = (
+        Index("idx_batch_tracking_batch", "batch_number"),
+        Index("idx_batch_tracking_org_expiry", "organization_id", "expiry_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"))
@@ -107,6 +119,10 @@ class BatchTracking(Base):
 
 class Incident(Base):
     __tablename__ = "incidents"
+    __table_args__ = (
+        Index("idx_incidents_org_status_created", "organization_id", "status", "created_at"),
+        Index("idx_incidents_org_created", "organization_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"))
@@ -121,6 +137,21 @@ class Incident(Base):
     created_at = Column(DateTime, server_default=func.now())
     resolved_at = Column(DateTime)
 
+class IncidentStats(Base):
+    """Running incident counters per (organization, severity, category); category '' means none"""
+    __tablename__ = "incident_stats"
+    __table_args__ = (UniqueConstraint("organization_id", "severity", "category", name="uq_incident_stats_org_severity_category"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    severity = Column(String(50), nullable=False)
+    category = Column(String(100), nullable=False, default="")
+    total_count = Column(Integer, nullable=False, default=0)
+    open_count = Column(Integer, nullable=False, default=0)
+    resolved_count = Column(Integer, nullable=False, default=0)
+    resolution_seconds = Column(Float, nullable=False, default=0)  # summed over resolved incidents
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
 class CleaningPlan(Base):
     __tablename__ = "cleaning_plans"
     
@@ -131,11 +162,16 @@ class CleaningPlan(Base):
     rooms = Column(JSON)
     cleaning_frequency = Column(String(50), nullable=False)
     estimated_duration = Column(Integer)
+    archived_at = Column(DateTime)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
 class RoomCleaning(Base):
     __tablename__ = "room_cleanings"
+    __table_args__ = (
+        Index("idx_room_cleanings_plan_room", "cleaning_plan_id", "room_name", "cleaned_at"),
+        Index("idx_room_cleanings_org_date", "organization_id", "cleaned_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"))
@@ -148,6 +184,34 @@ class RoomCleaning(Base):
     cleaning_plan = relationship("CleaningPlan")
     user = relationship("User")
 
+class RoomCleaningStatus(Base):
+    """Last-cleaned index, one row per (cleaning plan, room)"""
+    __tablename__ = "room_cleaning_status"
+    __table_args__ = (UniqueConstraint("cleaning_plan_id", "room_name", name="uq_room_cleaning_status_plan_room"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    cleaning_plan_id = Column(Integer, ForeignKey("cleaning_plans.id"), nullable=False)
+    room_name = Column(String(255), nullable=False)
+    last_cleaned_at = Column(DateTime)
+    last_cleaned_by = Column(Integer, ForeignKey("users.id"))
+    last_cleaning_id = Column(Integer, ForeignKey("room_cleanings.id"))
+
+class CleaningArchiveSegment(Base):
+    """Compacted room cleaning history: zlib-compressed JSON, one segment per plan and month"""
+    __tablename__ = "cleaning_archive_segments"
+    __table_args__ = (Index("idx_cleaning_archive_plan_period", "cleaning_plan_id", "period_start"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    cleaning_plan_id = Column(Integer, ForeignKey("cleaning_plans.id"), nullable=False)
+    period_start = Column(Date, nullable=False)
+    period_end = Column(Date, nullable=False)
+    record_count = Column(Integer, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+    checksum = Column(String(64), nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
 class Configuration(Base):
     __tablename__ = "configuration"
     
@@ -160,6 +224,11 @@ class Configuration(Base):
 
 class MaterialReception(Base):
     __tablename__ = "material_receptions"
+    __table_args__ = (
+        Index("idx_material_receptions_org_date", "organization_id", "received_at"),
+        Index("idx_material_receptions_org_batch", "organization_id", "batch_number"),
+        Index("idx_material_receptions_org_expiry", "organization_id", "expiry_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"))
@@ -181,6 +250,176 @@ class MaterialReception(Base):
     supplier = relationship("Supplier")
     user = relationship("User")
 
+class GtinIndexEntry(Base):
+    __tablename__ = "gtin_index"
+    __table_args__ = (UniqueConstraint("organization_id", "gtin", name="uq_gtin_index_org_gtin"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    gtin = Column(String(14), nullable=False)  # zero-padded GTIN-14
+    product_name = Column(String(255))
+    category = Column(String(100))
+    unit = Column(String(50))
+    supplier_id = Column(Integer, ForeignKey("suppliers.id"))
+    recent_quantities = Column(JSON)
+    reception_count = Column(Integer, default=0)
+    last_received_at = Column(DateTime)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+class TraceEdge(Base):
+    """Adjacency list for lot traceability; nodes are "kind:key" strings"""
+    __tablename__ = "trace_edges"
+    __table_args__ = (
+        Index("idx_trace_edges_src", "organization_id", "src_node"),
+        Index("idx_trace_edges_dst", "organization_id", "dst_node"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    src_node = Column(String(300), nullable=False)
+    dst_node = Column(String(300), nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+class ExpiryAlert(Base):
+    """One alert per item and level (expiring, expired), raised by the expiry scheduler"""
+    __tablename__ = "expiry_alerts"
+    __table_args__ = (
+        UniqueConstraint("source_type", "source_id", "level", name="uq_expiry_alerts_source_level"),
+        Index("idx_expiry_alerts_org_created", "organization_id", "created_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    source_type = Column(String(20), nullable=False)  # batch or reception
+    source_id = Column(Integer, nullable=False)
+    product_name = Column(String(255))
+    batch_number = Column(String(255))
+    expiry_date = Column(Date, nullable=False)
+    level = Column(String(20), nullable=False)
+    acknowledged_at = Column(DateTime)
+    created_at = Column(DateTime, server_default=func.now())
+
+class ReportJob(Base):
+    """Background compliance report; the rendered file is stored under REPORT_DIR"""
+    __tablename__ = "report_jobs"
+    __table_args__ = (Index("idx_report_jobs_org_created", "organization_id", "created_at"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    requested_by = Column(Integer, ForeignKey("users.id"))
+    format = Column(String(10), nullable=False)  # csv or pdf
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    sections = Column(JSON)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, done, failed
+    progress = Column(Float, default=0)  # 0..1, share of sections rendered
+    artifact_path = Column(String(500))
+    row_count = Column(Integer)
+    size_bytes = Column(Integer)
+    error = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+    finished_at = Column(DateTime)
+
+class ImportJob(Base):
+    """Background bulk import of an uploaded CSV/XLSX file"""
+    __tablename__ = "import_jobs"
+    __table_args__ = (Index("idx_import_jobs_org_created", "organization_id", "created_at"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    requested_by = Column(Integer, ForeignKey("users.id"))
+    kind = Column(String(50), nullable=False)  # products, suppliers, temperature_logs
+    filename = Column(String(255))
+    upload_path = Column(String(500))
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, done, failed
+    progress = Column(Float, default=0)  # 0..1, estimated from bytes/rows read
+    processed_rows = Column(Integer, default=0)
+    inserted_rows = Column(Integer, default=0)
+    duplicate_rows = Column(Integer, default=0)
+    error_rows = Column(Integer, default=0)
+    errors = Column(JSON)  # [{"row": n, "error": "..."}], capped
+    error = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+    finished_at = Column(DateTime)
+
+class TemperatureLogRollup(Base):
+    """Daily temperature aggregates kept after raw logs pass their retention window"""
+    __tablename__ = "temperature_log_rollups"
+    __table_args__ = (
+        UniqueConstraint("organization_id", "day", "location", "equipment_id", name="uq_temperature_rollups_key"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    location = Column(String(255), nullable=False)
+    equipment_id = Column(String(100), nullable=False, default="")
+    reading_count = Column(Integer, nullable=False)
+    out_of_limits_count = Column(Integer, nullable=False, default=0)
+    min_temperature = Column(DECIMAL(5,2))
+    max_temperature = Column(DECIMAL(5,2))
+    avg_temperature = Column(Float)
+
+class UsageLogRollup(Base):
+    """Monthly usage aggregates kept after raw usage logs pass their retention window"""
+    __tablename__ = "usage_log_rollups"
+    __table_args__ = (UniqueConstraint("organization_id", "month", "action_type", name="uq_usage_rollups_key"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    month = Column(Date, nullable=False)
+    action_type = Column(String(100), nullable=False)
+    action_count = Column(Integer, nullable=False)
+    total_cost = Column(DECIMAL(14,6), nullable=False, default=0)
+    total_execution_time = Column(Float, nullable=False, default=0)
+    timed_count = Column(Integer, nullable=False, default=0)  # actions with an execution_time
+
+class ColdArchiveFile(Base):
+    """Manifest entry for one Parquet file of aged records in cold storage (one organization and month)"""
+    __tablename__ = "cold_archive_files"
+    __table_args__ = (Index("idx_cold_archive_org_table_period", "organization_id", "table_name", "period_start"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    table_name = Column(String(50), nullable=False)  # temperature_logs, usage_logs, room_cleanings
+    period_start = Column(Date, nullable=False)
+    period_end = Column(Date, nullable=False)  # last day with records
+    storage_key = Column(String(500), nullable=False, unique=True)
+    record_count = Column(Integer, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    checksum = Column(String(64), nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+class BackfillMarker(Base):
+    """Records that an organization's derived data (counters, indexes) has been built from its history"""
+    __tablename__ = "backfill_markers"
+    
+    name = Column(String(100), primary_key=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), primary_key=True)
+    completed_at = Column(DateTime, server_default=func.now())
+
+class JobLock(Base):
+    """Lease held by the process running a scheduled job (used where advisory locks are unavailable)"""
+    __tablename__ = "job_locks"
+    
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(255), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+class ApiKey(Base):
+    """Long-lived credential for MCP clients; only the SHA-256 of the key is stored"""
+    __tablename__ = "api_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    name = Column(String(255), nullable=False)
+    key_prefix = Column(String(16), nullable=False)  # shown in listings to tell keys apart
+    key_hash = Column(String(64), nullable=False, unique=True)
+    created_at = Column(DateTime, server_default=func.now())
+    last_used_at = Column(DateTime)
+    revoked_at = Column(DateTime)
+
 class UserTemperatureRange(Base):
     __tablename__ = "user_temperature_ranges"
     
@@ -0,0 +1,197 @@
+"""
+Label Normalisation Engine
+Precompiled date, category and unit recognisers for AI vision / OCR output.
+Everything here is built once at import time and is safe to share between threads.
+"""
+
+import re
+from datetime import date
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Optional, Any
+
+# Ordered by precedence: when a name matches keywords of several categories,
+# the first category listed wins
+CATEGORY_KEYWORDS = MappingProxyType({
+    "meat": ("beef", "pork", "lamb", "veal", "steak", "ground"),
+    "poultry": ("chicken", "turkey", "duck", "goose", "poultry"),
+    "seafood": ("fish", "salmon", "tuna", "shrimp", "crab", "lobster", "seafood"),
+    "dairy": ("milk", "cheese", "butter", "yogurt", "cream", "dairy"),
+    "vegetables": ("carrot", "potato", "onion", "tomato", "lettuce", "vegetable"),
+    "fruits": ("apple", "banana", "orange", "berry", "fruit"),
+    "bakery": ("bread", "roll", "bun", "pastry", "cake", "bakery"),
+    "frozen": ("frozen", "ice"),
+    "beverages": ("juice", "soda", "water", "drink", "beverage"),
+})
+
+FOOD_CATEGORIES = frozenset([
+    "meat", "poultry", "seafood", "dairy", "vegetables", "fruits",
+    "grains", "bakery", "frozen", "canned", "beverages", "spices",
+    "oils", "condiments", "snacks", "desserts"
+])
+
+UNIT_ALIASES = MappingProxyType({
+    "kg": "kg", "kilogram": "kg", "kilograms": "kg",
+    "g": "g", "gram": "g", "grams": "g",
+    "lb": "lb", "pound": "lb", "pounds": "lb",
+    "oz": "oz", "ounce": "oz", "ounces": "oz",
+    "l": "l", "liter": "l", "liters": "l",
+    "ml": "ml", "milliliter": "ml", "milliliters": "ml",
+    "pcs": "pieces", "piece": "pieces", "pieces": "pieces",
+    "box": "boxes", "boxes": "boxes",
+    "pack": "packs", "packs": "packs"
+})
+
+
+class KeywordMatcher:
+    """
+    Multi-keyword substring matcher.
+    Keywords are folded into a trie which is compiled to a single regex wrapped in a
+    lookahead, so one C-level pass over the text finds every (overlapping) keyword
+    occurrence instead of one substring scan per keyword.
+    """
+
+    def __init__(self, labelled_keywords: Dict[str, Iterable[str]]):
+        self.labels = list(labelled_keywords)
+        rank = {}
+        for label_rank, keywords in enumerate(labelled_keywords.values()):
+            for keyword in keywords:
+                rank.setdefault(keyword, label_rank)
+
+        # The regex reports only the longest keyword starting at a position, so a
+        # keyword also carries the best rank of every keyword that is its prefix
+        self._rank = {
+            keyword: min(r for other, r in rank.items() if keyword.startswith(other))
+            for keyword in rank
+        }
+        trie = {}
+        for keyword in rank:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = True
+        self._pattern = re.compile(f"(?=({self._trie_to_regex(trie)}))")
+
+    def _trie_to_regex(self, node: dict) -> str:
+        branches = [re.escape(char) + self._trie_to_regex(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # Keyword ends here but longer ones continue: optional, greedy suffix
+            return f"(?:{body})?"
+        return body
+
+    def match(self, text: str) -> Optional[str]:
+        """Return the highest-precedence label whose keyword occurs in text"""
+        best = None
+        for found in self._pattern.finditer(text):
+            label_rank = self._rank[found.group(1)]
+            if best is None or label_rank < best:
+                best = label_rank
+                if best == 0:
+                    break
+        return None if best is None else self.labels[best]
+
+
+# One recogniser for every supported layout:
+#   YYYY-MM-DD, YYYYMMDD, and DD<sep>MM<sep>YYYY where <sep> is / - or .
+# Day-first is preferred; "/" and "." layouts fall back to month-first when
+# the day-first reading is not a valid date (e.g. 02/15/2024).
+_DATE_PATTERN = re.compile(
+    r"(?P<iy>\d{4})-(?P<im>\d{1,2})-(?P<id>\d{1,2})"
+    r"|(?P<cy>\d{4})(?P<cm>\d{2})(?P<cd>\d{2})"
+    r"|(?P<a>\d{1,2})(?P<sep>[/.\-])(?P<b>\d{1,2})(?P=sep)(?P<y>\d{4})"
+)
+_DATE_SCAN_PATTERN = re.compile(r"(?<!\d)(?:" + _DATE_PATTERN.pattern + r")(?!\d)")
+_WHITESPACE = re.compile(r"\s+")
+_QUANTITY_PATTERN = re.compile(
+    r"(?<![\w.])(\d+(?:[.,]\d+)?)\s*(" + "|".join(sorted(UNIT_ALIASES, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE
+)
+
+category_matcher = KeywordMatcher(CATEGORY_KEYWORDS)
+
+
+def _date_from_match(found) -> Optional[date]:
+    try:
+        if found.group("iy"):
+            return date(int(found.group("iy")), int(found.group("im")), int(found.group("id")))
+        if found.group("cy"):
+            return date(int(found.group("cy")), int(found.group("cm")), int(found.group("cd")))
+        year, first, second = int(found.group("y")), int(found.group("a")), int(found.group("b"))
+        try:
+            return date(year, second, first)
+        except ValueError:
+            if found.group("sep") == "-":
+                return None
+            return date(year, first, second)
+    except ValueError:
+        return None
+
+
+def parse_date(date_str: str) -> Optional[date]:
+    """Parse a whole field as a date"""
+    if not date_str:
+        return None
+    found = _DATE_PATTERN.fullmatch(date_str)
+    return _date_from_match(found) if found else None
+
+
+def find_date(text: str) -> Optional[date]:
+    """Find the first valid date anywhere in free OCR text"""
+    if not text:
+        return None
+    for found in _DATE_SCAN_PATTERN.finditer(text):
+        parsed = _date_from_match(found)
+        if parsed:
+            return parsed
+    return None
+
+
+def guess_category(product_name: str) -> str:
+    if not product_name:
+        return "other"
+    return category_matcher.match(product_name.lower()) or "other"
+
+
+def normalize_unit(unit: str) -> str:
+    if not unit:
+        return "pieces"
+    unit = unit.lower().strip()
+    return UNIT_ALIASES.get(unit, unit)
+
+
+def clean_text(text: str) -> str:
+    if not text:
+        return ""
+    return _WHITESPACE.sub(' ', text.strip())
+
+
+def parse_label(text: str) -> Dict[str, Any]:
+    """Extract category, quantity/unit and the first date from one OCR'd label line"""
+    result = {"category": guess_category(text)}
+    quantity = _QUANTITY_PATTERN.search(text) if text else None
+    if quantity:
+        result["quantity"] = float(quantity.group(1).replace(",", "."))
+        result["unit"] = normalize_unit(quantity.group(2))
+    found_date = find_date(text)
+    if found_date:
+        result["expiry_date"] = found_date.isoformat()
+    return result
+
+
+def parse_labels(texts: Iterable[str]) -> List[Dict[str, Any]]:
+    return [parse_label(text) for text in texts]
+
+
+def guess_categories(product_names: Iterable[str]) -> List[str]:
+    return [guess_category(name) for name in product_names]
+
+
+def parse_dates(values: Iterable[str]) -> List[Optional[date]]:
+    return [parse_date(value) for value in values]
+
+
+def normalize_units(units: Iterable[str]) -> List[str]:
+    return [normalize_unit(unit) for unit in units]
@@ -0,0 +1,417 @@
+"""
+HACCP Compliance Report Engine
+Streams an organization's temperature, cleaning, reception and incident records
+for a date range (server-side cursors via yield_per) into CSV or paginated PDF,
+writing the artifact incrementally so memory use stays flat whatever the range.
+Reports run as background jobs; the finished file is downloaded afterwards.
+"""
+
+import csv
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Any
+
+from sqlalchemy.orm import Session
+
+from models import (TemperatureLog, TemperatureLogRollup, RoomCleaning, CleaningRecord, CleaningPlan,
+                    MaterialReception, Incident, Supplier, User, Organization, ReportJob)
+
+logger = logging.getLogger(__name__)
+
+REPORT_DIR = os.getenv("REPORT_DIR", "data/reports")
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+FETCH_SIZE = 1000
+FORMATS = ("csv", "pdf")
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(item) for item in value)
+    return str(value)
+
+
+class Section:
+    """A report section: column titles/widths and a row generator"""
+
+    def __init__(self, title: str, columns: Sequence[Tuple[str, int]],
+                 rows: Callable[[Session, int, datetime, datetime, Dict[int, str]], Iterator[Sequence[Any]]]):
+        self.title = title
+        self.columns = columns
+        self.rows = rows
+
+
+def _temperature_rows(db: Session, organization_id: int, start: datetime, end: datetime, users: Dict[int, str]):
+    # Days past the retention window only survive as daily rollups, which always predate the raw rows
+    rollups = db.query(TemperatureLogRollup).filter(
+        TemperatureLogRollup.organization_id == organization_id,
+        TemperatureLogRollup.day >= start.date(),
+        TemperatureLogRollup.day < end.date()
+    ).order_by(TemperatureLogRollup.day, TemperatureLogRollup.location, TemperatureLogRollup.equipment_id)
+    for rollup in rollups.yield_per(FETCH_SIZE):
+        yield (rollup.day, rollup.location, rollup.equipment_id or None, round(rollup.avg_temperature, 2),
+               rollup.out_of_limits_count == 0, f"Daily avg of {rollup.reading_count}")
+    query = db.query(
+        TemperatureLog.created_at, TemperatureLog.location, TemperatureLog.equipment_id,
+        TemperatureLog.temperature, TemperatureLog.is_within_limits, TemperatureLog.recorded_by
+    ).filter(
+        TemperatureLog.organization_id == organization_id,
+        TemperatureLog.created_at >= start,
+        TemperatureLog.created_at < end
+    ).order_by(TemperatureLog.created_at).yield_per(FETCH_SIZE)
+    for created_at, location, equipment_id, temperature, within_limits, recorded_by in query:
+        yield (created_at, location, equipment_id, temperature, within_limits, users.get(recorded_by))
+
+
+def _room_cleaning_rows(db: Session, organization_id: int, start: datetime, end: datetime, users: Dict[int, str]):
+    from cleaning_archive import cleaning_archiver
+
+    plans = dict(db.query(CleaningPlan.id, CleaningPlan.name).filter(CleaningPlan.organization_id == organization_id))
+    # Compacted history first: archive segments always predate the hot rows
+    for record in cleaning_archiver.organization_records(db, organization_id, start, end):
+        yield (record["cleaned_at"], plans.get(record["cleaning_plan_id"]), record["room_name"],
+               users.get(record["cleaned_by"]), record["notes"])
+    query = db.query(
+        RoomCleaning.cleaned_at, RoomCleaning.cleaning_plan_id, RoomCleaning.room_name,
+        RoomCleaning.cleaned_by, RoomCleaning.notes
+    ).filter(
+        RoomCleaning.organization_id == organization_id,
+        RoomCleaning.cleaned_at >= start,
+        RoomCleaning.cleaned_at < end
+    ).order_by(RoomCleaning.cleaned_at).yield_per(FETCH_SIZE)
+    for cleaned_at, plan_id, room_name, cleaned_by, notes in query:
+        yield (cleaned_at, plans.get(plan_id), room_name, users.get(cleaned_by), notes)
+
+
+def _cleaning_record_rows(db: Session, organization_id: int, start: datetime, end: datetime, users: Dict[int, str]):
+    query = db.query(
+        CleaningRecord.created_at, CleaningRecord.area, CleaningRecord.cleaning_type,
+        CleaningRecord.products_used, CleaningRecord.performed_by, CleaningRecord.verified_by, CleaningRecord.notes
+    ).filter(
+        CleaningRecord.organization_id == organization_id,
+        CleaningRecord.created_at >= start,
+        CleaningRecord.created_at < end
+    ).order_by(CleaningRecord.created_at).yield_per(FETCH_SIZE)
+    for created_at, area, cleaning_type, products_used, performed_by, verified_by, notes in query:
+        yield (created_at, area, cleaning_type, products_used, users.get(performed_by), users.get(verified_by), notes)
+
+
+def _reception_rows(db: Session, organization_id: int, start: datetime, end: datetime, users: Dict[int, str]):
+    suppliers = dict(db.query(Supplier.id, Supplier.name).filter(Supplier.organization_id == organization_id))
+    query = db.query(
+        MaterialReception.received_at, MaterialReception.product_name, MaterialReception.supplier_id,
+        MaterialReception.quantity, MaterialReception.unit, MaterialReception.batch_number,
+        MaterialReception.expiry_date, MaterialReception.temperature_on_arrival, MaterialReception.received_by
+    ).filter(
+        MaterialReception.organization_id == organization_id,
+        MaterialReception.received_at >= start,
+        MaterialReception.received_at < end
+    ).order_by(MaterialReception.received_at).yield_per(FETCH_SIZE)
+    for received_at, product_name, supplier_id, quantity, unit, batch_number, expiry_date, temperature, received_by in query:
+        yield (received_at, product_name, suppliers.get(supplier_id), f"{quantity} {unit}", batch_number,
+               expiry_date, temperature, users.get(received_by))
+
+
+def _incident_rows(db: Session, organization_id: int, start: datetime, end: datetime, users: Dict[int, str]):
+    query = db.query(
+        Incident.created_at, Incident.title, Incident.severity, Incident.category, Incident.status,
+        Incident.reported_by, Incident.resolved_at, Incident.root_cause, Incident.corrective_actions
+    ).filter(
+        Incident.organization_id == organization_id,
+        Incident.created_at >= start,
+        Incident.created_at < end
+    ).order_by(Incident.created_at).yield_per(FETCH_SIZE)
+    for created_at, title, severity, category, status, reported_by, resolved_at, root_cause, corrective_actions in query:
+        yield (created_at, title, severity, category, status, users.get(reported_by), resolved_at,
+               root_cause, corrective_actions)
+
+
+SECTIONS: Dict[str, Section] = {
+    "temperature": Section("Temperature logs", [
+        ("Recorded at", 19), ("Location", 24), ("Equipment", 14), ("Temp C", 7), ("In limits", 9), ("Recorded by", 20)
+    ], _temperature_rows),
+    "room_cleaning": Section("Room cleanings", [
+        ("Cleaned at", 19), ("Cleaning plan", 24), ("Room", 24), ("Cleaned by", 20), ("Notes", 40)
+    ], _room_cleaning_rows),
+    "cleaning_records": Section("Cleaning records", [
+        ("Performed at", 19), ("Area", 20), ("Type", 14), ("Products", 24), ("Performed by", 18),
+        ("Verified by", 18), ("Notes", 30)
+    ], _cleaning_record_rows),
+    "reception": Section("Material receptions", [
+        ("Received at", 19), ("Product", 24), ("Supplier", 20), ("Quantity", 12), ("Batch", 14),
+        ("Expiry", 10), ("Temp C", 7), ("Received by", 18)
+    ], _reception_rows),
+    "incidents": Section("Incidents", [
+        ("Reported at", 19), ("Title", 26), ("Severity", 8), ("Category", 12), ("Status", 12),
+        ("Reported by", 16), ("Resolved at", 19), ("Root cause", 20), ("Corrective actions", 20)
+    ], _incident_rows),
+}
+
+
+class CsvRenderer:
+    """One block per section: a title line, a header row, then the records"""
+
+    def __init__(self, stream, title: str):
+        self.writer = csv.writer(stream)
+        self.writer.writerow([title])
+
+    def section(self, section: Section):
+        self.writer.writerow([])
+        self.writer.writerow([section.title])
+        self.writer.writerow([name for name, _ in section.columns])
+
+    def row(self, values: Sequence[Any]):
+        self.writer.writerow([_format_value(value) for value in values])
+
+    def close(self):
+        pass
+
+
+class PdfRenderer:
+    """
+    Minimal PDF writer: fixed-width text pages (A4 landscape, Courier) written
+    one page at a time. Only object offsets and page ids are kept until the
+    cross-reference table is written at the end.
+    """
+
+    PAGE_WIDTH, PAGE_HEIGHT = 842, 595
+    MARGIN = 30
+    FONT_SIZE = 7
+    LEADING = 9
+    CHAR_WIDTH = 0.6  # Courier advance width as a fraction of the font size
+
+    def __init__(self, stream, title: str):
+        self.stream = stream
+        self.title = title
+        self.offsets: Dict[int, int] = {}
+        self.page_ids: List[int] = []
+        self.next_id = 5  # 1 catalog, 2 page tree, 3-4 fonts
+        self.lines_per_page = (self.PAGE_HEIGHT - 2 * self.MARGIN) // self.LEADING - 3
+        self.max_chars = int((self.PAGE_WIDTH - 2 * self.MARGIN) / (self.FONT_SIZE * self.CHAR_WIDTH))
+        self.lines: List[Tuple[str, bool]] = []
+        self.section_title = ""
+        self.section_rows = 0
+        self.header = ""
+        self.columns: Sequence[Tuple[str, int]] = []
+
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        self._object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>")
+        self._object(4, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier-Bold /Encoding /WinAnsiEncoding >>")
+
+    def section(self, section: Section):
+        self._end_section()
+        self.section_title = section.title
+        self.section_rows = 0
+        self.columns = section.columns
+        self.header = self._cells([name for name, _ in section.columns])
+
+    def row(self, values: Sequence[Any]):
+        if len(self.lines) >= self.lines_per_page:
+            self._flush_page()
+        self.lines.append((self._cells([_format_value(value) for value in values]), False))
+        self.section_rows += 1
+
+    def close(self):
+        self._end_section()
+        if not self.page_ids:
+            self._flush_page()
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode())
+
+        xref_offset = self.stream.tell()
+        size = self.next_id
+        self._write(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+        for object_id in range(1, size):
+            self._write(f"{self.offsets[object_id]:010d} 00000 n \n".encode())
+        self._write(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+
+    def _end_section(self):
+        if self.section_title and not self.section_rows:
+            self.lines.append(("No records in this period", False))
+        if self.lines:
+            self._flush_page()
+
+    def _cells(self, values: Sequence[str]) -> str:
+        cells = []
+        for (_, width), value in zip(self.columns, values):
+            text = " ".join(str(value).split())
+            cells.append(text[:width - 1] + "~" if len(text) > width else text.ljust(width))
+        return " ".join(cells)[:self.max_chars]
+
+    def _flush_page(self):
+        page_number = len(self.page_ids) + 1
+        heading = f"{self.title} - {self.section_title}" if self.section_title else self.title
+        lines = [(heading[:self.max_chars - 10].ljust(self.max_chars - 10) + f"Page {page_number}".rjust(10), True), ("", False)]
+        if self.header:
+            lines.append((self.header, True))
+        lines.extend(self.lines)
+        self.lines = []
+
+        top = self.PAGE_HEIGHT - self.MARGIN
+        commands = [f"BT /F1 {self.FONT_SIZE} Tf {self.LEADING} TL {self.MARGIN} {top} Td".encode()]
+        for text, bold in lines:
+            font = b"/F2" if bold else b"/F1"
+            commands.append(font + f" {self.FONT_SIZE} Tf (".encode() + self._escape(text) + b") Tj T*")
+        commands.append(b"ET")
+        content = b"\n".join(commands)
+
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._object(content_id, f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream")
+        self._object(page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.PAGE_WIDTH} {self.PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode())
+        self.page_ids.append(page_id)
+
+    def _escape(self, text: str) -> bytes:
+        encoded = text.encode("cp1252", errors="replace")
+        return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+    def _object(self, object_id: int, body: bytes):
+        self.offsets[object_id] = self.stream.tell()
+        self._write(f"{object_id} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    def _write(self, data: bytes):
+        self.stream.write(data)
+
+
+def render_report(db: Session, organization_id: int, start_date: date, end_date: date,
+                  sections: Sequence[str], report_format: str, path: str,
+                  on_section: Optional[Callable[[float, int], None]] = None) -> int:
+    """
+    Render the report to path and return the number of records written. on_section is
+    called with the share of sections rendered and the record count after each section.
+    """
+    start = datetime.combine(start_date, datetime.min.time())
+    end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+    organization = db.query(Organization.name).filter(Organization.id == organization_id).scalar()
+    users = dict(db.query(User.id, User.name).filter(User.organization_id == organization_id))
+    title = f"HACCP compliance report - {organization or organization_id} - {start_date.isoformat()} to {end_date.isoformat()}"
+
+    count = 0
+    if report_format == "csv":
+        stream = open(path, "w", newline="", encoding="utf-8")
+        renderer = CsvRenderer(stream, title)
+    else:
+        stream = open(path, "wb")
+        renderer = PdfRenderer(stream, title)
+    try:
+        for index, name in enumerate(sections):
+            section = SECTIONS[name]
+            renderer.section(section)
+            for values in section.rows(db, organization_id, start, end, users):
+                renderer.row(values)
+                count += 1
+            if on_section:
+                on_section((index + 1) / len(sections), count)
+        renderer.close()
+    finally:
+        stream.close()
+    return count
+
+
+class ReportEngine:
+    def __init__(self, report_dir: str = REPORT_DIR, workers: int = REPORT_WORKERS):
+        self.report_dir = report_dir
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+
+    def submit(self, job_id: int):
+        self.executor.submit(self.run, job_id)
+
+    def run(self, job_id: int):
+        """Render a queued job in its own session; failures are recorded on the job"""
+        from job_lock import job_locks
+
+        # Held while rendering, so recover() can tell a running job from one whose worker died
+        with job_locks.hold(f"report-{job_id}") as acquired:
+            if acquired:
+                self._render(job_id)
+
+    def recover(self):
+        """Re-queue jobs left queued or running by a worker that stopped; called at startup"""
+        from database import SessionLocal
+        from job_lock import job_locks
+
+        db = SessionLocal()
+        try:
+            jobs = db.query(ReportJob).filter(ReportJob.status.in_(("queued", "running"))).all()
+            for job in jobs:
+                with job_locks.hold(f"report-{job.id}") as acquired:
+                    if not acquired:
+                        continue
+                    # The job may have finished between the query and taking its lock
+                    db.refresh(job)
+                    if job.status not in ("queued", "running"):
+                        continue
+                    if job.status == "running":
+                        logger.info(f"Re-queueing interrupted report job {job.id}")
+                        job.status = "queued"
+                        job.progress = 0
+                        db.commit()
+                self.submit(job.id)
+        finally:
+            db.close()
+
+    def _render(self, job_id: int):
+        from database import SessionLocal
+        from job_lock import job_locks
+
+        db = SessionLocal()
+        try:
+            job = db.query(ReportJob).filter(ReportJob.id == job_id).first()
+            if not job or job.status != "queued":
+                return
+            job.status = "running"
+            job.progress = 0
+            db.commit()
+
+            def on_section(progress: float, count: int):
+                # Between sections no result cursor is open, so the job row can be committed
+                job.progress = round(progress, 4)
+                job.row_count = count
+                db.commit()
+                job_locks.renew(f"report-{job_id}")
+
+            directory = os.path.join(self.report_dir, str(job.organization_id))
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"report-{job.id}.{job.format}")
+            partial = path + ".part"
+            try:
+                count = render_report(db, job.organization_id, job.start_date, job.end_date,
+                                      job.sections or list(SECTIONS), job.format, partial, on_section)
+                os.replace(partial, path)
+            except Exception as e:
+                logger.error(f"Report job {job.id} failed: {e}")
+                db.rollback()
+                if os.path.exists(partial):
+                    os.remove(partial)
+                job.status = "failed"
+                job.error = str(e)
+                job.finished_at = datetime.utcnow()
+                db.commit()
+                return
+
+            job.status = "done"
+            job.progress = 1.0
+            job.artifact_path = path
+            job.row_count = count
+            job.size_bytes = os.path.getsize(path)
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            logger.info(f"Report job {job.id}: {count} records, {job.size_bytes} bytes")
+        finally:
+            db.close()
+
+# Global instance
+report_engine = ReportEngine()
@@ -0,0 +1,357 @@
+"""
+Retention Policies and Time Partitioning
+Declarative retention for the append-only tables: raw rows are kept for a
+number of days, then rolled up (daily temperature aggregates, monthly usage
+totals, compressed cleaning archive segments) and removed a whole month at a
+time. On PostgreSQL temperature_logs and usage_logs are range-partitioned by
+month (see scripts/init.sql): upcoming partitions are created ahead of time and
+expired ones are dropped. On SQLite each month is a segment of the
+(organization_id, created_at) index that is rolled up and deleted as a unit.
+"""
+
+import os
+import threading
+import time
+import logging
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple, Any
+
+from sqlalchemy import func, case, text
+from sqlalchemy.orm import Session
+
+from models import TemperatureLog, UsageLog, TemperatureLogRollup, UsageLogRollup
+
+logger = logging.getLogger(__name__)
+
+PARTITION_MONTHS_AHEAD = 2
+
+
+def _month_start(moment) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _as_date(value) -> date:
+    # func.date() returns a string on SQLite and a date on PostgreSQL
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _rollup_temperature_logs(db: Session, start: datetime, end: datetime) -> int:
+    day = func.date(TemperatureLog.created_at)
+    rows = db.query(
+        TemperatureLog.organization_id, day, TemperatureLog.location, TemperatureLog.equipment_id,
+        func.count(TemperatureLog.id),
+        func.sum(case((TemperatureLog.is_within_limits.is_(False), 1), else_=0)),
+        func.min(TemperatureLog.temperature),
+        func.max(TemperatureLog.temperature),
+        func.avg(TemperatureLog.temperature)
+    ).filter(
+        TemperatureLog.created_at >= start,
+        TemperatureLog.created_at < end
+    ).group_by(TemperatureLog.organization_id, day, TemperatureLog.location, TemperatureLog.equipment_id).all()
+
+    # Rows backdated into an already rolled-up month are merged into the existing aggregates
+    existing = {
+        (rollup.organization_id, rollup.day, rollup.location, rollup.equipment_id): rollup
+        for rollup in db.query(TemperatureLogRollup).filter(
+            TemperatureLogRollup.day >= start.date(),
+            TemperatureLogRollup.day < end.date()
+        )
+    }
+    for organization_id, row_day, location, equipment_id, count, out_of_limits, minimum, maximum, average in rows:
+        key = (organization_id, _as_date(row_day), location, equipment_id or "")
+        rollup = existing.get(key)
+        if rollup is None:
+            rollup = TemperatureLogRollup(
+                organization_id=organization_id, day=key[1], location=location, equipment_id=key[3],
+                reading_count=0, out_of_limits_count=0
+            )
+            db.add(rollup)
+            existing[key] = rollup
+        total = rollup.reading_count + count
+        rollup.avg_temperature = ((rollup.avg_temperature or 0) * rollup.reading_count + float(average) * count) / total
+        rollup.min_temperature = minimum if rollup.min_temperature is None else min(Decimal(rollup.min_temperature), Decimal(minimum))
+        rollup.max_temperature = maximum if rollup.max_temperature is None else max(Decimal(rollup.max_temperature), Decimal(maximum))
+        rollup.reading_count = total
+        rollup.out_of_limits_count += int(out_of_limits or 0)
+    return len(rows)
+
+
+def _rollup_usage_logs(db: Session, start: datetime, end: datetime) -> int:
+    rows = db.query(
+        UsageLog.organization_id, UsageLog.action_type,
+        func.count(UsageLog.id),
+        func.sum(UsageLog.resource_used),
+        func.sum(UsageLog.execution_time),
+        func.count(UsageLog.execution_time)
+    ).filter(
+        UsageLog.created_at >= start,
+        UsageLog.created_at < end
+    ).group_by(UsageLog.organization_id, UsageLog.action_type).all()
+
+    month = start.date()
+    existing = {
+        (rollup.organization_id, rollup.action_type): rollup
+        for rollup in db.query(UsageLogRollup).filter(UsageLogRollup.month == month)
+    }
+    for organization_id, action_type, count, cost, execution_time, timed in rows:
+        rollup = existing.get((organization_id, action_type))
+        if rollup is None:
+            rollup = UsageLogRollup(
+                organization_id=organization_id, month=month, action_type=action_type,
+                action_count=0, total_cost=0, total_execution_time=0, timed_count=0
+            )
+            db.add(rollup)
+            existing[(organization_id, action_type)] = rollup
+        rollup.action_count += count
+        rollup.total_cost = Decimal(rollup.total_cost or 0) + Decimal(cost or 0)
+        rollup.total_execution_time = (rollup.total_execution_time or 0) + float(execution_time or 0)
+        rollup.timed_count += timed
+    return len(rows)
+
+
+class RetentionPolicy:
+    """Keep raw rows for raw_days (0 keeps them forever), then roll them up month by month"""
+
+    def __init__(self, model, time_column: str, raw_days: int, rollup_table: str,
+                 rollup: Callable[[Session, datetime, datetime], int], partitioned: bool = True):
+        self.model = model
+        self.rollup_table = rollup_table
+        self.table = model.__tablename__
+        self.column = getattr(model, time_column)
+        self.raw_days = raw_days
+        self.rollup = rollup
+        # Monthly range partitions on PostgreSQL
+        self.partitioned = partitioned
+
+
+RETENTION_POLICIES: Dict[str, RetentionPolicy] = {
+    "temperature_logs": RetentionPolicy(
+        TemperatureLog, "created_at", int(os.getenv("RETENTION_TEMPERATURE_LOGS_DAYS", "730")),
+        TemperatureLogRollup.__tablename__, _rollup_temperature_logs
+    ),
+    "usage_logs": RetentionPolicy(
+        UsageLog, "created_at", int(os.getenv("RETENTION_USAGE_LOGS_DAYS", "400")),
+        UsageLogRollup.__tablename__, _rollup_usage_logs
+    ),
+}
+
+
+class RetentionManager:
+    def __init__(self, policies: Dict[str, RetentionPolicy]):
+        self.policies = policies
+
+    def describe(self) -> List[Dict[str, Any]]:
+        from cleaning_archive import HOT_HISTORY_DAYS
+
+        described = [
+            {"table": name, "raw_days": policy.raw_days, "rollup": policy.rollup_table}
+            for name, policy in self.policies.items()
+        ]
+        # Room cleanings are referenced by the last-cleaned index, so they are compacted
+        # into archive segments (cleaning_archive.py) rather than partitioned
+        described.append({"table": "room_cleanings", "raw_days": HOT_HISTORY_DAYS, "rollup": "cleaning_archive_segments"})
+        return described
+
+    def run(self, db: Session, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Create upcoming partitions, then roll up and remove every whole month past its window"""
+        from cleaning_archive import cleaning_archiver, HOT_HISTORY_DAYS
+        from cold_archive import cold_archive, COLD_CLEANING_DAYS
+
+        now = now or datetime.utcnow()
+        results: Dict[str, Any] = {}
+        for name, policy in self.policies.items():
+            created = self.ensure_partitions(db, policy, now)
+            results[name] = self.enforce(db, policy, now)
+            results[name]["partitions_created"] = created
+        if HOT_HISTORY_DAYS > 0:
+            results["room_cleanings"] = cleaning_archiver.compact(db, before=now - timedelta(days=HOT_HISTORY_DAYS))
+        if cold_archive.enabled and COLD_CLEANING_DAYS > 0:
+            results["room_cleanings_cold"] = cold_archive.export_cleaning_segments(
+                db, before=(now - timedelta(days=COLD_CLEANING_DAYS)).date()
+            )
+        return results
+
+    def enforce(self, db: Session, policy: RetentionPolicy, now: datetime) -> Dict[str, int]:
+        from cold_archive import cold_archive
+
+        result = {"months": 0, "rollups": 0, "rows_archived": 0, "rows_removed": 0, "partitions_dropped": 0}
+        if policy.raw_days <= 0:
+            return result
+        # Only whole months strictly before the one containing the cutoff are rotated out,
+        # so at least raw_days of raw rows always remain
+        cutoff = _month_start(now - timedelta(days=policy.raw_days))
+        oldest = db.query(func.min(policy.column)).filter(policy.column < datetime.combine(cutoff, datetime.min.time())).scalar()
+        if oldest is None:
+            return result
+
+        month = _month_start(oldest if isinstance(oldest, datetime) else datetime.fromisoformat(str(oldest)))
+        while month < cutoff:
+            start = datetime.combine(month, datetime.min.time())
+            end = datetime.combine(_next_month(month), datetime.min.time())
+            if cold_archive.enabled:
+                # The raw rows are written to cold storage before they leave the table
+                result["rows_archived"] += cold_archive.export(db, policy.table, start, end)["records"]
+            result["rollups"] += policy.rollup(db, start, end)
+            # Rollups and removal share one transaction, so a failure leaves the month untouched
+            if self._drop_partition(db, policy, month):
+                result["partitions_dropped"] += 1
+            result["rows_removed"] += db.query(policy.model).filter(
+                policy.column >= start, policy.column < end
+            ).delete(synchronize_session=False)
+            db.commit()
+            result["months"] += 1
+            month = _next_month(month)
+
+        if result["months"]:
+            logger.info(f"Retention for {policy.table}: {result}")
+        return result
+
+    def ensure_partitions(self, db: Session, policy: RetentionPolicy, now: datetime) -> int:
+        """Create this month's and the next months' partitions on PostgreSQL"""
+        if not self._is_partitioned(db, policy):
+            return 0
+        created = 0
+        month = _month_start(now)
+        for _ in range(PARTITION_MONTHS_AHEAD + 1):
+            name = self._partition_name(policy, month)
+            if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+                try:
+                    db.execute(text(
+                        f"CREATE TABLE {name} PARTITION OF {policy.table} "
+                        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+                    ))
+                    db.commit()
+                    created += 1
+                except Exception as e:
+                    # Rows for this month already sit in the default partition; they stay there
+                    db.rollback()
+                    logger.warning(f"Could not create partition {name}: {e}")
+            month = _next_month(month)
+        return created
+
+    def _drop_partition(self, db: Session, policy: RetentionPolicy, month: date) -> bool:
+        if not self._is_partitioned(db, policy):
+            return False
+        name = self._partition_name(policy, month)
+        if db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+            return False
+        db.execute(text(f"DROP TABLE {name}"))
+        return True
+
+    def _is_partitioned(self, db: Session, policy: RetentionPolicy) -> bool:
+        if not policy.partitioned or db.get_bind().dialect.name != "postgresql":
+            return False
+        return db.execute(
+            text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+            {"table": policy.table}
+        ).first() is not None
+
+    def _partition_name(self, policy: RetentionPolicy, month: date) -> str:
+        return f"{policy.table}_p{month.year:04d}{month.month:02d}"
+
+    def start(self, interval_seconds: int):
+        """Run the retention job every interval_seconds in a daemon thread"""
+        def loop():
+            from database import SessionLocal
+            from job_lock import job_locks
+            while True:
+                # Every API worker runs this loop; only the lock holder enforces retention.
+                # Failures taking the lock are caught too, so a database outage does not end the thread
+                try:
+                    with job_locks.hold("retention") as acquired:
+                        if acquired:
+                            db = SessionLocal()
+                            try:
+                                self.run(db)
+                            finally:
+                                db.close()
+                except Exception as e:
+                    logger.error(f"Retention job failed: {e}")
+                time.sleep(interval_seconds)
+
+        thread = threading.Thread(target=loop, name="retention", daemon=True)
+        thread.start()
+        return thread
+
+
+def daily_temperature_summary(db: Session, organization_id: int, start: date, end: date,
+                              location: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Per-day, per-location temperature aggregates over [start, end], from rollups and raw logs"""
+    summary: Dict[Tuple[date, str, str], Dict[str, Any]] = {}
+
+    def merge(day, row_location, equipment_id, count, out_of_limits, minimum, maximum, average):
+        key = (day, row_location, equipment_id or "")
+        entry = summary.get(key)
+        if entry is None:
+            summary[key] = {
+                "day": day, "location": row_location, "equipment_id": equipment_id or None,
+                "reading_count": count, "out_of_limits_count": out_of_limits,
+                "min_temperature": float(minimum), "max_temperature": float(maximum), "avg_temperature": float(average)
+            }
+            return
+        total = entry["reading_count"] + count
+        entry["avg_temperature"] = (entry["avg_temperature"] * entry["reading_count"] + float(average) * count) / total
+        entry["min_temperature"] = min(entry["min_temperature"], float(minimum))
+        entry["max_temperature"] = max(entry["max_temperature"], float(maximum))
+        entry["reading_count"] = total
+        entry["out_of_limits_count"] += out_of_limits
+
+    rollups = db.query(TemperatureLogRollup).filter(
+        TemperatureLogRollup.organization_id == organization_id,
+        TemperatureLogRollup.day >= start,
+        TemperatureLogRollup.day <= end
+    )
+    if location:
+        rollups = rollups.filter(TemperatureLogRollup.location == location)
+    for rollup in rollups:
+        merge(rollup.day, rollup.location, rollup.equipment_id, rollup.reading_count, rollup.out_of_limits_count,
+              rollup.min_temperature, rollup.max_temperature, rollup.avg_temperature)
+
+    day = func.date(TemperatureLog.created_at)
+    raw = db.query(
+        day, TemperatureLog.location, TemperatureLog.equipment_id,
+        func.count(TemperatureLog.id),
+        func.sum(case((TemperatureLog.is_within_limits.is_(False), 1), else_=0)),
+        func.min(TemperatureLog.temperature),
+        func.max(TemperatureLog.temperature),
+        func.avg(TemperatureLog.temperature)
+    ).filter(
+        TemperatureLog.organization_id == organization_id,
+        TemperatureLog.created_at >= datetime.combine(start, datetime.min.time()),
+        TemperatureLog.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time())
+    )
+    if location:
+        raw = raw.filter(TemperatureLog.location == location)
+    for row_day, row_location, equipment_id, count, out_of_limits, minimum, maximum, average in raw.group_by(
+        day, TemperatureLog.location, TemperatureLog.equipment_id
+    ):
+        merge(_as_date(row_day), row_location, equipment_id, count, int(out_of_limits or 0), minimum, maximum, average)
+
+    for entry in summary.values():
+        entry["avg_temperature"] = round(entry["avg_temperature"], 2)
+    return [summary[key] for key in sorted(summary)]
+
+# Global instance
+retention_manager = RetentionManager(RETENTION_POLICIES)
+
+
+if __name__ == "__main__":
+    # Batch job for cron / serverless schedules: enforce retention once
+    import json
+    from database import SessionLocal, init_database
+    from job_lock import job_locks
+
+    init_database()
+    with job_locks.hold("retention") as acquired:
+        if not acquired:
+            raise SystemExit("Retention is already running in another process")
+        db = SessionLocal()
+        try:
+            print(json.dumps(retention_manager.run(db), indent=2, default=str))
+        finally:
+            db.close()
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List, Dict
 from datetime import datetime, date
 from decimal import Decimal
 
@@ -117,6 +117,30 @@ class BatchTrackingResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ExpiringItemResponse(BaseModel):
+    source_type: str
+    id: int
+    product_name: Optional[str]
+    batch_number: Optional[str]
+    expiry_date: date
+    days_left: int
+    location: Optional[str]
+    status: Optional[str]
+
+class ExpiryAlertResponse(BaseModel):
+    id: int
+    source_type: str
+    source_id: int
+    product_name: Optional[str]
+    batch_number: Optional[str]
+    expiry_date: date
+    level: str
+    acknowledged_at: Optional[datetime]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
 class CleaningRecordCreate(BaseModel):
     area: str
     cleaning_type: Optional[str] = None
@@ -142,6 +166,15 @@ class IncidentCreate(BaseModel):
     severity: str
     category: Optional[str] = None
 
+class IncidentUpdate(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    severity: Optional[str] = None
+    category: Optional[str] = None
+    status: Optional[str] = None  # open, investigating, resolved, closed
+    root_cause: Optional[str] = None
+    corrective_actions: Optional[str] = None
+
 class IncidentResponse(BaseModel):
     id: int
     title: str
@@ -158,10 +191,76 @@ class IncidentResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class IncidentGroupStats(BaseModel):
+    total: int
+    open: int
+    resolved: int
+    mttr_hours: Optional[float]
+
+class IncidentStatsResponse(BaseModel):
+    total: int
+    open: int
+    resolved: int
+    mttr_hours: Optional[float]
+    by_severity: Dict[str, IncidentGroupStats]
+    by_category: Dict[str, IncidentGroupStats]
+    top_categories: List[dict]
+
+class ComplianceLocation(BaseModel):
+    location: Optional[str]
+    breaches: int
+    last_breach_at: Optional[datetime]
+
+class ComplianceTemperature(BaseModel):
+    readings: int
+    breaches: int
+    breach_rate: float
+    locations: List[ComplianceLocation]
+
+class ComplianceIncidents(BaseModel):
+    open: int
+    critical: int
+    open_by_severity: Dict[str, int]
+
+class ComplianceCleaning(BaseModel):
+    rooms: int
+    due: int
+    overdue: int
+
+class ComplianceExpiry(BaseModel):
+    expired: int
+    expiring_soon: int
+    warning_days: int
+
+class ComplianceStatusResponse(BaseModel):
+    organization_id: int
+    status: str  # compliant, attention_required or non_compliant
+    score: int
+    generated_at: datetime
+    window_hours: int
+    temperature: ComplianceTemperature
+    incidents: ComplianceIncidents
+    cleaning: ComplianceCleaning
+    expiry: ComplianceExpiry
+    alerts: List[str]
+
+class ChatCommandRequest(BaseModel):
+    message: str
+    language: Optional[str] = None  # en or fr; replies default to English
+
+class ChatCommandResponse(BaseModel):
+    intent: str
+    language: str
+    slots: Dict[str, str]
+    reply: str
+    data: Optional[dict] = None
+
+MAX_PLAN_ROOMS = 1000
+
 class CleaningPlanCreate(BaseModel):
     name: str
     description: Optional[str] = None
-    rooms: List[dict]  # [{"name": "Kitchen", "x": 100, "y": 150, "width": 200, "height": 100}]
+    rooms: List[dict] = Field(max_length=MAX_PLAN_ROOMS)  # [{"name": "Kitchen", "x": 100, "y": 150, "width": 200, "height": 100}]
     cleaning_frequency: str  # daily, weekly, monthly
     estimated_duration: Optional[int] = None  # minutes
 
@@ -172,6 +271,7 @@ class CleaningPlanResponse(BaseModel):
     rooms: List[dict]
     cleaning_frequency: str
     estimated_duration: Optional[int]
+    archived_at: Optional[datetime] = None
     created_at: datetime
 
     class Config:
@@ -193,6 +293,42 @@ class RoomCleaningResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ArchivedRoomCleaningResponse(BaseModel):
+    id: int
+    room_name: str
+    cleaning_plan_id: int
+    cleaned_by: Optional[int]
+    notes: Optional[str]
+    cleaned_at: datetime
+    archived: bool
+
+class RegionCleaningCreate(BaseModel):
+    # A zero-size region is a single tap at (x, y)
+    x: float = Field(allow_inf_nan=False)
+    y: float = Field(allow_inf_nan=False)
+    width: float = Field(0, allow_inf_nan=False)
+    height: float = Field(0, allow_inf_nan=False)
+    notes: Optional[str] = None
+
+class RoomStatusResponse(BaseModel):
+    room_name: str
+    state: str  # ok, due, overdue
+    last_cleaned_at: Optional[datetime]
+    due_at: Optional[datetime]
+
+class CleaningPlanStatusResponse(BaseModel):
+    cleaning_plan_id: int
+    cleaning_frequency: str
+    generated_at: datetime
+    rooms: List[RoomStatusResponse]
+
+class CleaningTaskResponse(BaseModel):
+    cleaning_plan_id: int
+    plan_name: str
+    room_name: str
+    due_at: datetime
+    estimated_duration: Optional[int]
+
 class MaterialReceptionCreate(BaseModel):
     supplier_id: int
     product_name: str
@@ -218,6 +354,7 @@ class MaterialReceptionResponse(BaseModel):
     batch_number: Optional[str]
     temperature_on_arrival: Optional[float]
     quality_notes: Optional[str]
+    image_path: Optional[str] = None
     ai_analysis: Optional[dict]
     received_by: int
     received_at: datetime
@@ -225,6 +362,12 @@ class MaterialReceptionResponse(BaseModel):
     class Config:
         from_attributes = True
 
+MAX_BATCH_IMAGES = 200
+
+class BatchImageAnalysisRequest(BaseModel):
+    images: List[str] = Field(max_length=MAX_BATCH_IMAGES)  # base64 encoded images, one per box
+    batch_size: int = Field(8, ge=1, le=64)
+
 class ConfigurationUpdate(BaseModel):
     value: str
 
@@ -260,4 +403,76 @@ class UserTemperatureRangeResponse(BaseModel):
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ReportCreate(BaseModel):
+    format: str = "csv"  # csv or pdf
+    start_date: date
+    end_date: date
+    sections: Optional[List[str]] = None  # temperature, room_cleaning, cleaning_records, reception, incidents
+
+class ReportJobResponse(BaseModel):
+    id: int
+    format: str
+    start_date: date
+    end_date: date
+    sections: Optional[List[str]]
+    status: str
+    progress: Optional[float]
+    row_count: Optional[int]
+    size_bytes: Optional[int]
+    error: Optional[str]
+    created_at: datetime
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+class ImportJobResponse(BaseModel):
+    id: int
+    kind: str
+    filename: Optional[str]
+    status: str
+    progress: Optional[float]
+    processed_rows: Optional[int]
+    inserted_rows: Optional[int]
+    duplicate_rows: Optional[int]
+    error_rows: Optional[int]
+    errors: Optional[List[dict]]
+    error: Optional[str]
+    created_at: datetime
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+class ColdArchiveFileResponse(BaseModel):
+    id: int
+    table_name: str
+    period_start: date
+    period_end: date
+    record_count: int
+    size_bytes: int
+    checksum: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ApiKeyCreate(BaseModel):
+    name: str
+
+class ApiKeyResponse(BaseModel):
+    id: int
+    name: str
+    key_prefix: str
+    user_id: int
+    created_at: datetime
+    last_used_at: Optional[datetime]
+    revoked_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+class ApiKeyCreated(ApiKeyResponse):
+    key: str  # returned once, at creation
@@ -0,0 +1,204 @@
+"""
+Spatial Index for Cleaning Plan Floor Maps
+Uniform grid over room rectangles, built when a plan is saved and cached per
+plan, answering room-at-point, rooms-in-region and overlap queries without
+scanning every room.
+"""
+
+import math
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple, Any
+
+CACHE_SIZE = 256
+MAX_CELLS_PER_RECT = 64
+
+
+class Rect:
+    __slots__ = ("name", "x", "y", "x2", "y2")
+
+    def __init__(self, name: str, x: float, y: float, width: float, height: float):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.x2 = x + width
+        self.y2 = y + height
+
+    def contains(self, px: float, py: float) -> bool:
+        # Edges are inclusive, matching the browser hit-test
+        return self.x <= px <= self.x2 and self.y <= py <= self.y2
+
+    def intersects(self, x: float, y: float, x2: float, y2: float) -> bool:
+        return self.x <= x2 and x <= self.x2 and self.y <= y2 and y <= self.y2
+
+    def overlap_area(self, other: "Rect") -> float:
+        width = min(self.x2, other.x2) - max(self.x, other.x)
+        height = min(self.y2, other.y2) - max(self.y, other.y)
+        return width * height if width > 0 and height > 0 else 0.0
+
+
+def rooms_to_rects(rooms: List[dict]) -> List[Rect]:
+    """Rectangles for rooms with valid coordinates; rooms without geometry are skipped"""
+    rects = []
+    for room in rooms or []:
+        try:
+            x, y = float(room["x"]), float(room["y"])
+            width, height = float(room["width"]), float(room["height"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if not all(math.isfinite(value) for value in (x, y, width, height)):
+            continue
+        # Rooms drawn right-to-left or bottom-to-top have negative extents
+        if width < 0:
+            x, width = x + width, -width
+        if height < 0:
+            y, height = y + height, -height
+        rects.append(Rect(room.get("name"), x, y, width, height))
+    return rects
+
+
+class GridIndex:
+    def __init__(self, rects: List[Rect], cell_size: Optional[float] = None):
+        self.rects = rects
+        if cell_size is None:
+            # Cells the size of a median room keep buckets small; unlike the average,
+            # the median is not inflated by one huge room among many small ones
+            if rects:
+                extents = sorted(max(r.x2 - r.x, r.y2 - r.y) for r in rects)
+                cell_size = max(extents[len(extents) // 2], 1.0)
+            else:
+                cell_size = 100.0
+        self.cell_size = cell_size
+        # Bounding box of every room; queries are clipped to it, so their cost
+        # depends on the plan's size and not on the region the caller asks for
+        self.bounds = (
+            min(r.x for r in rects), min(r.y for r in rects), max(r.x2 for r in rects), max(r.y2 for r in rects)
+        ) if rects else None
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        # Rooms spanning more than MAX_CELLS_PER_RECT cells are checked by a linear scan
+        # instead, so the grid never holds more than MAX_CELLS_PER_RECT cells per room
+        self.large: List[int] = []
+        for position, rect in enumerate(rects):
+            if self._cell_count(rect.x, rect.y, rect.x2, rect.y2) > MAX_CELLS_PER_RECT:
+                self.large.append(position)
+                continue
+            for cell in self._cells(rect.x, rect.y, rect.x2, rect.y2):
+                self.cells.setdefault(cell, []).append(position)
+
+    def _cell_range(self, x: float, y: float, x2: float, y2: float) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        return math.floor(x / size), math.floor(y / size), math.floor(x2 / size), math.floor(y2 / size)
+
+    def _cell_count(self, x: float, y: float, x2: float, y2: float) -> int:
+        cx, cy, cx2, cy2 = self._cell_range(x, y, x2, y2)
+        return (cx2 - cx + 1) * (cy2 - cy + 1)
+
+    def _cells(self, x: float, y: float, x2: float, y2: float):
+        cx, cy, cx2, cy2 = self._cell_range(x, y, x2, y2)
+        for column in range(cx, cx2 + 1):
+            for row in range(cy, cy2 + 1):
+                yield (column, row)
+
+    def _occupied_cells(self, x: float, y: float, x2: float, y2: float):
+        """Non-empty cells in the region; wide regions walk the occupied cells instead of the span"""
+        if self._cell_count(x, y, x2, y2) <= len(self.cells):
+            yield from (cell for cell in self._cells(x, y, x2, y2) if cell in self.cells)
+            return
+        cx, cy, cx2, cy2 = self._cell_range(x, y, x2, y2)
+        for cell in self.cells:
+            if cx <= cell[0] <= cx2 and cy <= cell[1] <= cy2:
+                yield cell
+
+    def room_at(self, px: float, py: float) -> Optional[str]:
+        """First room (in plan order) containing the point"""
+        if not (math.isfinite(px) and math.isfinite(py)):
+            return None
+        size = self.cell_size
+        candidates = self.cells.get((math.floor(px / size), math.floor(py / size)), [])
+        found = [position for position in candidates if self.rects[position].contains(px, py)]
+        found.extend(position for position in self.large if self.rects[position].contains(px, py))
+        return self.rects[min(found)].name if found else None
+
+    def rooms_in(self, x: float, y: float, width: float, height: float) -> List[str]:
+        """Rooms intersecting the region, in plan order"""
+        x2, y2 = x + width, y + height
+        if width < 0:
+            x, x2 = x2, x
+        if height < 0:
+            y, y2 = y2, y
+        if self.bounds is None or not all(math.isfinite(value) for value in (x, y, x2, y2)):
+            return []
+        min_x, min_y, max_x, max_y = self.bounds
+        if x > max_x or x2 < min_x or y > max_y or y2 < min_y:
+            return []
+        # Clipping keeps the same intersections: every room lies inside the bounds
+        x, y, x2, y2 = max(x, min_x), max(y, min_y), min(x2, max_x), min(y2, max_y)
+        seen = set()
+        for cell in self._occupied_cells(x, y, x2, y2):
+            for position in self.cells[cell]:
+                if position not in seen and self.rects[position].intersects(x, y, x2, y2):
+                    seen.add(position)
+        seen.update(position for position in self.large if self.rects[position].intersects(x, y, x2, y2))
+        return [self.rects[position].name for position in sorted(seen)]
+
+    def overlaps(self) -> List[Dict[str, Any]]:
+        """Pairs of rooms whose interiors overlap (shared edges are allowed)"""
+        pairs = []
+        large = set(self.large)
+        for position, rect in enumerate(self.rects):
+            if position in large:
+                candidates = set(range(position + 1, len(self.rects)))
+            else:
+                candidates = set(other for other in self.large if other > position)
+                for cell in self._cells(rect.x, rect.y, rect.x2, rect.y2):
+                    candidates.update(other for other in self.cells.get(cell, ()) if other > position)
+            for other in sorted(candidates):
+                area = rect.overlap_area(self.rects[other])
+                if area > 0:
+                    pairs.append({"rooms": [rect.name, self.rects[other].name], "area": area})
+        return pairs
+
+
+def validate_rooms(rooms: List[dict]) -> List[str]:
+    """Problems with a plan's room layout: duplicate names and overlapping rooms"""
+    problems = []
+    counts = Counter(room.get("name") for room in rooms or [])
+    duplicates = sorted(name for name, count in counts.items() if count > 1 and name)
+    if duplicates:
+        problems.append(f"Duplicate room names: {', '.join(duplicates)}")
+    for overlap in GridIndex(rooms_to_rects(rooms)).overlaps():
+        problems.append(f"Rooms '{overlap['rooms'][0]}' and '{overlap['rooms'][1]}' overlap")
+    return problems
+
+
+class SpatialIndexCache:
+    """LRU of grid indexes keyed by plan id, invalidated when the plan changes"""
+
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self._indexes: "OrderedDict[int, Tuple[Any, GridIndex]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def build(self, plan) -> GridIndex:
+        index = GridIndex(rooms_to_rects(plan.rooms))
+        with self._lock:
+            self._indexes[plan.id] = (plan.updated_at, index)
+            self._indexes.move_to_end(plan.id)
+            while len(self._indexes) > self.size:
+                self._indexes.popitem(last=False)
+        return index
+
+    def get(self, plan) -> GridIndex:
+        with self._lock:
+            cached = self._indexes.get(plan.id)
+            if cached and cached[0] == plan.updated_at:
+                self._indexes.move_to_end(plan.id)
+                return cached[1]
+        return self.build(plan)
+
+    def invalidate(self, plan_id: int):
+        with self._lock:
+            self._indexes.pop(plan_id, None)
+
+# Global instance
+spatial_index_cache = SpatialIndexCache()
@@ -0,0 +1,227 @@
+"""
+Lot Traceability Graph
+Adjacency index linking suppliers, receptions, lots, batches, locations and
+products (supplier -> reception -> lot -> batch -> location/product), kept up
+to date as receptions and batches are saved. Backward traces answer "where did
+this lot come from", forward traces "where did it go".
+"""
+
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple, Any
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from backfill import backfills
+from models import TraceEdge, MaterialReception, BatchTracking, Supplier, Product
+
+logger = logging.getLogger(__name__)
+
+MAX_DEPTH = 6
+# Shared nodes end a trace: walking through a supplier or product would pull in
+# every unrelated lot that shares it
+TERMINAL_KINDS = frozenset({"supplier", "product", "location"})
+
+
+def normalize_batch_number(batch_number: Optional[str]) -> Optional[str]:
+    """Lot numbers are matched case-insensitively and ignoring surrounding spaces"""
+    if not batch_number:
+        return None
+    normalized = batch_number.strip().upper()
+    return normalized or None
+
+
+def node(kind: str, key: Any) -> str:
+    return f"{kind}:{key}"
+
+
+def split_node(value: str) -> Tuple[str, str]:
+    kind, _, key = value.partition(":")
+    return kind, key
+
+
+def reception_edges(reception: MaterialReception) -> List[Tuple[str, str]]:
+    lot = normalize_batch_number(reception.batch_number)
+    if lot is None:
+        return []
+    source = node("reception", reception.id)
+    edges = [(source, node("lot", lot))]
+    if reception.supplier_id:
+        edges.append((node("supplier", reception.supplier_id), source))
+    return edges
+
+
+def batch_edges(batch: BatchTracking) -> List[Tuple[str, str]]:
+    source = node("batch", batch.id)
+    edges = []
+    lot = normalize_batch_number(batch.batch_number)
+    if lot is not None:
+        edges.append((node("lot", lot), source))
+    if batch.supplier_id:
+        edges.append((node("supplier", batch.supplier_id), source))
+    if batch.product_id:
+        edges.append((source, node("product", batch.product_id)))
+    if batch.location:
+        edges.append((source, node("location", batch.location.strip())))
+    return edges
+
+
+class TraceabilityIndex:
+    def record_reception(self, db: Session, reception: MaterialReception):
+        """Index a committed reception, replacing any edges from an earlier version"""
+        self._replace(db, reception.organization_id, node("reception", reception.id), reception_edges(reception))
+
+    def record_batch(self, db: Session, batch: BatchTracking):
+        """Index a committed batch, replacing any edges from an earlier version"""
+        self._replace(db, batch.organization_id, node("batch", batch.id), batch_edges(batch))
+
+    def rebuild(self, db: Session, organization_id: int) -> int:
+        """Rebuild an organization's trace edges from receptions and batches"""
+        db.query(TraceEdge).filter(TraceEdge.organization_id == organization_id).delete()
+        count = 0
+        receptions = db.query(MaterialReception).filter(
+            MaterialReception.organization_id == organization_id,
+            MaterialReception.batch_number.isnot(None)
+        ).yield_per(1000)
+        for reception in receptions:
+            count += self._add(db, organization_id, reception_edges(reception))
+        batches = db.query(BatchTracking).filter(BatchTracking.organization_id == organization_id).yield_per(1000)
+        for batch in batches:
+            count += self._add(db, organization_id, batch_edges(batch))
+        db.commit()
+        logger.info(f"Rebuilt trace index for organization {organization_id}: {count} edges")
+        return count
+
+    def trace(self, db: Session, organization_id: int, batch_number: str,
+              direction: str = "both", max_depth: int = MAX_DEPTH) -> Optional[Dict[str, Any]]:
+        """Backward and/or forward trace of a lot; None if the lot is unknown in either direction"""
+        lot = normalize_batch_number(batch_number)
+        if lot is None:
+            return None
+        self._ensure_indexed(db, organization_id)
+
+        start = node("lot", lot)
+        result: Dict[str, Any] = {"batch_number": lot}
+        edges: List[Tuple[str, str]] = []
+        found = False
+        for name, forward in (("backward", False), ("forward", True)):
+            if direction not in ("both", name):
+                continue
+            nodes, walked = self._walk(db, organization_id, start, forward, max_depth)
+            found = found or bool(walked)
+            edges.extend(walked)
+            result[name] = self._hydrate(db, organization_id, nodes)
+        # A lot with receptions but no batches yet has no forward edges; it is still a known lot
+        if not found and not self._is_known(db, organization_id, start):
+            return None
+        result["edges"] = [{"from": src, "to": dst} for src, dst in edges]
+        return result
+
+    def _ensure_indexed(self, db: Session, organization_id: int):
+        # Organizations with history from before the index existed are rebuilt once, even if
+        # receptions or batches saved since then have already created some edges
+        backfills.ensure(db, "trace_edges", organization_id, lambda: self.rebuild(db, organization_id))
+
+    def _is_known(self, db: Session, organization_id: int, value: str) -> bool:
+        return db.query(TraceEdge.id).filter(
+            TraceEdge.organization_id == organization_id,
+            or_(TraceEdge.src_node == value, TraceEdge.dst_node == value)
+        ).first() is not None
+
+    def _walk(self, db: Session, organization_id: int, start: str, forward: bool,
+              max_depth: int) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """Breadth-first walk, one indexed query per level"""
+        near, far = (TraceEdge.src_node, TraceEdge.dst_node) if forward else (TraceEdge.dst_node, TraceEdge.src_node)
+        visited = {start}
+        frontier = [start]
+        reached: List[str] = []
+        walked: List[Tuple[str, str]] = []
+        for _ in range(max_depth):
+            if not frontier:
+                break
+            rows = db.query(TraceEdge.src_node, TraceEdge.dst_node, far).filter(
+                TraceEdge.organization_id == organization_id,
+                near.in_(frontier)
+            ).all()
+            frontier = []
+            for src, dst, other in rows:
+                walked.append((src, dst))
+                if other in visited:
+                    continue
+                visited.add(other)
+                reached.append(other)
+                if split_node(other)[0] not in TERMINAL_KINDS:
+                    frontier.append(other)
+        return reached, walked
+
+    def _hydrate(self, db: Session, organization_id: int, nodes: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Replace node ids with record details, one query per kind"""
+        keys: Dict[str, List[str]] = defaultdict(list)
+        for value in nodes:
+            kind, key = split_node(value)
+            keys[kind].append(key)
+
+        details: Dict[str, List[Dict[str, Any]]] = {}
+        if keys.get("supplier"):
+            details["suppliers"] = [
+                {"id": supplier.id, "name": supplier.name, "contact_info": supplier.contact_info,
+                 "certification_status": supplier.certification_status}
+                for supplier in db.query(Supplier).filter(
+                    Supplier.organization_id == organization_id,
+                    Supplier.id.in_([int(key) for key in keys["supplier"]])
+                )
+            ]
+        if keys.get("reception"):
+            details["receptions"] = [
+                {"id": reception.id, "product_name": reception.product_name, "category": reception.category,
+                 "quantity": float(reception.quantity), "unit": reception.unit,
+                 "batch_number": reception.batch_number, "supplier_id": reception.supplier_id,
+                 "expiry_date": reception.expiry_date.isoformat() if reception.expiry_date else None,
+                 "received_at": reception.received_at.isoformat() if reception.received_at else None}
+                for reception in db.query(MaterialReception).filter(
+                    MaterialReception.organization_id == organization_id,
+                    MaterialReception.id.in_([int(key) for key in keys["reception"]])
+                )
+            ]
+        if keys.get("batch"):
+            details["batches"] = [
+                {"id": batch.id, "batch_number": batch.batch_number, "product_id": batch.product_id,
+                 "supplier_id": batch.supplier_id, "location": batch.location, "status": batch.status,
+                 "expiry_date": batch.expiry_date.isoformat() if batch.expiry_date else None}
+                for batch in db.query(BatchTracking).filter(
+                    BatchTracking.organization_id == organization_id,
+                    BatchTracking.id.in_([int(key) for key in keys["batch"]])
+                )
+            ]
+        if keys.get("product"):
+            details["products"] = [
+                {"id": product.id, "name": product.name, "category": product.category}
+                for product in db.query(Product).filter(
+                    Product.organization_id == organization_id,
+                    Product.id.in_([int(key) for key in keys["product"]])
+                )
+            ]
+        if keys.get("location"):
+            details["locations"] = sorted(keys["location"])
+        if keys.get("lot"):
+            details["lots"] = sorted(keys["lot"])
+        return details
+
+    def _replace(self, db: Session, organization_id: int, source: str, edges: List[Tuple[str, str]]):
+        db.query(TraceEdge).filter(
+            TraceEdge.organization_id == organization_id,
+            or_(TraceEdge.src_node == source, TraceEdge.dst_node == source)
+        ).delete(synchronize_session=False)
+        self._add(db, organization_id, edges)
+        db.commit()
+
+    def _add(self, db: Session, organization_id: int, edges: List[Tuple[str, str]]) -> int:
+        db.add_all([
+            TraceEdge(organization_id=organization_id, src_node=src, dst_node=dst)
+            for src, dst in edges
+        ])
+        return len(edges)
+
+# Global instance
+traceability_index = TraceabilityIndex()
@@ -0,0 +1,119 @@
+"""
+Persistent result cache for AI vision analysis
+Keyed by a hash of the decoded image pixels, bounded by TTL and entry count
+"""
+
+import base64
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Dict, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+
+def decode_image_data(image_data: str) -> bytes:
+    """Decode a base64 payload, with or without a data URL prefix"""
+    return base64.b64decode(image_data.split(',')[1] if ',' in image_data else image_data)
+
+
+def image_bytes_key(raw: bytes) -> str:
+    """
+    Hash the decoded image rather than the encoded payload, so the same photo
+    re-encoded with a different data URL prefix or metadata maps to one entry
+    """
+    try:
+        from PIL import Image
+        image = Image.open(io.BytesIO(raw))
+        image = image.convert("RGB")
+        digest = hashlib.sha256(f"{image.size[0]}x{image.size[1]}:".encode())
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+    except Exception:
+        # Not decodable as an image: fall back to the raw bytes
+        return hashlib.sha256(raw).hexdigest()
+
+
+def image_content_key(image_data: str) -> str:
+    return image_bytes_key(decode_image_data(image_data))
+
+
+class VisionResultCache:
+    def __init__(self, path: str, ttl_seconds: int = 7 * 24 * 3600, max_entries: int = 10000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vision_results ("
+            "key TEXT PRIMARY KEY, result TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_vision_results_accessed ON vision_results (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM vision_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM vision_results WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE vision_results SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, result: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO vision_results (key, result, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(result), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        """Drop expired entries, then least recently used ones beyond max_entries"""
+        self._conn.execute("DELETE FROM vision_results WHERE created_at < ?", (now - self.ttl_seconds,))
+        count = self._conn.execute("SELECT COUNT(*) FROM vision_results").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM vision_results WHERE key IN ("
+                "SELECT key FROM vision_results ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM vision_results")
+            self._conn.commit()
+
+
+def create_vision_cache() -> Optional[VisionResultCache]:
+    path = os.getenv("VISION_CACHE_PATH", "data/vision_cache.db")
+    if not path:
+        return None
+    try:
+        return VisionResultCache(
+            path,
+            ttl_seconds=int(os.getenv("VISION_CACHE_TTL", str(7 * 24 * 3600))),
+            max_entries=int(os.getenv("VISION_CACHE_MAX_ENTRIES", "10000"))
+        )
+    except Exception as e:
+        logger.warning(f"Vision result cache disabled: {e}")
+        return None
@@ -6,38 +6,93 @@ Command-line interface for HACCP platform operations
 
 import click
 import requests
+import csv
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 from tabulate import tabulate
+from urllib3.util.retry import Retry
 
 class HACCPClient:
-    def __init__(self, base_url="http://localhost:9001", token=None):
-        self.base_url = base_url
+    def __init__(self, base_url=None, token=None, pool_size=16, retries=3, timeout=30):
+        self.base_url = base_url or os.getenv("HACCP_API_URL", "http://localhost:9001")
         self.token = token
+        self.timeout = timeout
         self.headers = {"Content-Type": "application/json"}
         if token:
             self.headers["Authorization"] = f"Bearer {token}"
 
+        self.session = requests.Session()
+        self.configure_pool(pool_size, retries)
+
+    def configure_pool(self, pool_size, retries=3):
+        """
+        One keep-alive connection pool shared by every command and worker thread.
+        Connection errors are retried for any method (nothing was sent); 429/5xx only for GETs
+        """
+        self.pool_size = pool_size
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def set_token(self, token):
+        self.token = token
+        self.headers["Authorization"] = f"Bearer {token}"
+
     def login(self, email, password):
-        response = requests.post(f"{self.base_url}/auth/login", 
-                               json={"email": email, "password": password})
+        response = self.session.post(f"{self.base_url}/auth/login", 
+                                     json={"email": email, "password": password}, timeout=self.timeout)
         if response.status_code == 200:
             data = response.json()
-            self.token = data["access_token"]
-            self.headers["Authorization"] = f"Bearer {self.token}"
+            self.set_token(data["access_token"])
             return True
         return False
 
-    def get(self, endpoint):
-        response = requests.get(f"{self.base_url}{endpoint}", headers=self.headers)
+    def get(self, endpoint, params=None):
+        response = self.session.get(f"{self.base_url}{endpoint}", params=params,
+                                    headers=self.headers, timeout=self.timeout)
         return response.json() if response.status_code == 200 else None
 
     def post(self, endpoint, data):
-        response = requests.post(f"{self.base_url}{endpoint}", 
-                               json=data, headers=self.headers)
+        response = self.session.post(f"{self.base_url}{endpoint}", 
+                                     json=data, headers=self.headers, timeout=self.timeout)
         return response.json() if response.status_code == 200 else None
 
+    def upload(self, endpoint, path):
+        """Multipart upload; returns (status code, JSON body)"""
+        headers = {key: value for key, value in self.headers.items() if key != "Content-Type"}
+        with open(path, "rb") as file:
+            response = self.session.post(f"{self.base_url}{endpoint}", files={"file": (os.path.basename(path), file)},
+                                         headers=headers, timeout=self.timeout)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return response.status_code, body
+
+    def pages(self, endpoint, params=None, page_size=500):
+        """Yield every page of a limit/offset endpoint until a short page"""
+        offset = 0
+        while True:
+            page = self.get(endpoint, dict(params or {}, limit=page_size, offset=offset))
+            if page is None:
+                raise click.ClickException(f"Failed to fetch {endpoint} at offset {offset}")
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            offset += len(page)
+
 client = HACCPClient()
 
 @click.group()
@@ -163,12 +218,179 @@ def status():
     else:
         click.echo("❌ Failed to get status")
 
+def _optional(row, name, convert=str):
+    value = (row.get(name) or "").strip()
+    return convert(value) if value else None
+
+def _allergens(value):
+    return [item.strip() for item in value.replace(";", ",").split(",") if item.strip()]
+
+def _within_limits(value):
+    return value.lower() in ("1", "true", "yes", "y", "ok")
+
+# Timestamp columns the bulk import reads; POST /temperature-logs always records "now"
+READING_TIMESTAMP_COLUMNS = ("recorded_at", "created_at", "timestamp", "date")
+
+def reading_payload(row):
+    data = {"location": row["location"].strip(), "temperature": float(row["temperature"])}
+    for name, convert in (("equipment_id", str), ("is_within_limits", _within_limits)):
+        value = _optional(row, name, convert)
+        if value is not None:
+            data[name] = value
+    return data
+
+def product_payload(row):
+    data = {"name": row["name"].strip()}
+    for name, convert in (("category", str), ("allergens", _allergens), ("shelf_life_days", int),
+                          ("storage_temp_min", float), ("storage_temp_max", float)):
+        value = _optional(row, name, convert)
+        if value is not None:
+            data[name] = value
+    return data
+
+def bulk_import(kind, csv_file):
+    """Upload to the server-side import pipeline; False if the server has none"""
+    status_code, job = client.upload(f"/imports/{kind}", csv_file)
+    if status_code == 404:
+        return False
+    if status_code != 202:
+        detail = job.get("detail") if isinstance(job, dict) else None
+        raise click.ClickException(f"Bulk import rejected ({status_code}): {detail}")
+
+    with click.progressbar(length=100, label=f"Importing {os.path.basename(csv_file)}") as bar:
+        done = 0
+        while job["status"] in ("queued", "running"):
+            time.sleep(0.5)
+            job = client.get(f"/imports/{job['id']}") or job
+            progress = int((job.get("progress") or 0) * 100)
+            bar.update(progress - done)
+            done = progress
+        bar.update(100 - done)
+    if job["status"] == "failed":
+        raise click.ClickException(f"Import failed: {job.get('error')}")
+    click.echo(f"✅ {job['inserted_rows']} inserted, {job['duplicate_rows']} duplicates, {job['error_rows']} errors")
+    for error in (job.get("errors") or [])[:10]:
+        click.echo(f"  row {error.get('row')}: {error.get('error')}")
+    return True
+
+def concurrent_import(endpoint, csv_file, to_payload, workers):
+    """POST one row per request from a pool of workers sharing the client's connection pool"""
+    payloads, errors = [], []
+    with open(csv_file, newline="", encoding="utf-8-sig") as file:
+        for line, row in enumerate(csv.DictReader(file), start=2):
+            try:
+                payloads.append((line, to_payload(row)))
+            except (KeyError, ValueError, AttributeError) as e:
+                errors.append((line, f"invalid row: {e}"))
+
+    inserted = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor, \
+            click.progressbar(length=len(payloads), label=f"Sending {os.path.basename(csv_file)}") as bar:
+        futures = {executor.submit(client.post, endpoint, payload): line for line, payload in payloads}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except requests.RequestException as e:
+                result, reason = None, str(e)
+            else:
+                reason = "rejected by the server"
+            if result is None:
+                errors.append((futures[future], reason))
+            else:
+                inserted += 1
+            bar.update(1)
+
+    click.echo(f"✅ {inserted} inserted, {len(errors)} errors")
+    for line, reason in sorted(errors)[:10]:
+        click.echo(f"  line {line}: {reason}")
+
+def csv_columns(csv_file):
+    with open(csv_file, newline="", encoding="utf-8-sig") as file:
+        return {name.strip().lower() for name in next(csv.reader(file), [])}
+
+def push_csv(kind, endpoint, csv_file, to_payload, workers, bulk, bulk_only_columns=()):
+    load_token()
+    if workers > client.pool_size:
+        client.configure_pool(workers)
+    if bulk and bulk_import(kind, csv_file):
+        return
+    # The per-row endpoint cannot store these columns; sending the rows anyway would silently drop them
+    dropped = sorted(csv_columns(csv_file) & set(bulk_only_columns))
+    if dropped:
+        reason = "Bulk import is not available on this server" if bulk else "--no-bulk was given"
+        raise click.ClickException(
+            f"{reason}, and the per-row endpoint cannot store {', '.join(dropped)}. "
+            f"Use a server with /imports, or remove the column to record the rows as of now."
+        )
+    if bulk:
+        click.echo("Bulk import is not available on this server; sending rows concurrently")
+    concurrent_import(endpoint, csv_file, to_payload, workers)
+
+@cli.command()
+@click.argument('csv_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--workers', default=8, help='Concurrent requests when not using the bulk endpoint')
+@click.option('--bulk/--no-bulk', default=True, help='Use the server bulk import endpoint when available')
+def import_readings(csv_file, workers, bulk):
+    """Load temperature readings from CSV (location, temperature, equipment_id, is_within_limits, recorded_at)"""
+    push_csv("temperature_logs", "/temperature-logs", csv_file, reading_payload, workers, bulk,
+             bulk_only_columns=READING_TIMESTAMP_COLUMNS)
+
+@cli.command()
+@click.argument('csv_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--workers', default=8, help='Concurrent requests when not using the bulk endpoint')
+@click.option('--bulk/--no-bulk', default=True, help='Use the server bulk import endpoint when available')
+def import_products(csv_file, workers, bulk):
+    """Load products from CSV (name, category, allergens, shelf_life_days, storage_temp_min, storage_temp_max)"""
+    push_csv("products", "/products", csv_file, product_payload, workers, bulk)
+
+EXPORTS = {
+    "temperature-logs": "/temperature-logs",
+    "products": "/products",
+    "incidents": "/incidents",
+}
+
+@cli.command()
+@click.argument('resource', type=click.Choice(sorted(EXPORTS)))
+@click.option('--output', '-o', required=True, type=click.Path(dir_okay=False, writable=True), help='Output file')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='Default: from the file extension, else csv')
+@click.option('--since', type=click.DateTime(), help='Only records created at or after this time')
+@click.option('--until', type=click.DateTime(), help='Only records created before this time (default: now)')
+@click.option('--page-size', default=500, help='Records fetched per request (max 1000)')
+def export(resource, output, fmt, since, until, page_size):
+    """Stream every page of a resource to a CSV or JSON Lines file"""
+    load_token()
+    fmt = fmt or ("jsonl" if output.lower().endswith((".jsonl", ".ndjson")) else "csv")
+    params = {}
+    if since and resource != "products":
+        params["since"] = since.isoformat()
+    if resource != "products":
+        # Pages are newest first: a fixed upper bound keeps rows added during the export from shifting them
+        params["until"] = (until or datetime.utcnow()).isoformat()
+
+    written = 0
+    writer = None
+    with open(output, "w", newline="", encoding="utf-8") as file:
+        for page in client.pages(EXPORTS[resource], params, page_size=min(page_size, 1000)):
+            if fmt == "jsonl":
+                file.writelines(json.dumps(record) + "\n" for record in page)
+            else:
+                if writer is None:
+                    writer = csv.DictWriter(file, fieldnames=list(page[0]), extrasaction="ignore")
+                    writer.writeheader()
+                writer.writerows({
+                    key: json.dumps(value) if isinstance(value, (list, dict)) else value
+                    for key, value in record.items()
+                } for record in page)
+            file.flush()
+            written += len(page)
+            click.echo(f"\r{written} {resource} written", nl=False)
+    click.echo(f"\r✅ {written} {resource} exported to {output}")
+
 def load_token():
     """Load saved token"""
     if os.path.exists('.haccp_token'):
         with open('.haccp_token', 'r') as f:
-            client.token = f.read().strip()
-            client.headers["Authorization"] = f"Bearer {client.token}"
+            client.set_token(f.read().strip())
 
 if __name__ == '__main__':
     cli()
\ No newline at end of file
@@ -38,177 +38,10 @@ export default function AIChat() {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   };
 
-  // Simple NLP processor for command parsing
-  const parseCommand = (input) => {
-    const tokens = input.toLowerCase().split(/\s+/);
-    const numbers = input.match(/-?\d+\.?\d*/g) || [];
-    
-    return {
-      tokens,
-      numbers: numbers.map(n => parseFloat(n)),
-      hasTemperature: /temperature|temp|degre|degree|°/.test(input),
-      hasAdd: /add|create|new|ajouter/.test(input),
-      hasLocation: /fridge|freezer|cooler|kitchen|room|frigo|congélateur/.test(input),
-      locations: input.match(/(?:fridge\d*|freezer\d*|cooler\d*|kitchen\d*|room\d*|frigo\d*|congélateur\d*)/gi) || [],
-      intent: classifyIntent(input)
-    };
-  };
-
-  const classifyIntent = (input) => {
-    const patterns = {
-      temperature: /(?:add|log|record|note|ajouter).*(?:temperature|temp|degre)/i,
-      product: /(?:add|create|new|ajouter).*product/i,
-      clean: /clean.*room|nettoyer/i,
-      status: /status|compliance|how.*doing|statut/i,
-      list: /(?:list|show|lister).*products/i,
-      cost: /cost|usage|report|coût/i
-    };
-    
-    for (const [intent, pattern] of Object.entries(patterns)) {
-      if (pattern.test(input)) return intent;
-    }
-    return 'unknown';
-  };
-
+  // Commands are parsed and run server-side in one round trip
   const processAICommand = async (userInput) => {
-    const parsed = parseCommand(userInput);
-    const isFrench = language === 'fr';
-    
-    // Enhanced temperature logging with NLP
-    if (parsed.intent === 'temperature' || parsed.hasTemperature) {
-      const temperature = parsed.numbers[0];
-      let location = parsed.locations[0] || 'unknown location';
-      
-      // Extract location from natural language
-      const locationPatterns = [
-        /(?:of|in|at|for|du|de|dans)\s+([^\s]+(?:\d+)?)/i,
-        /(fridge\d*|freezer\d*|cooler\d*|frigo\d*|congélateur\d*)/i
-      ];
-      
-      for (const pattern of locationPatterns) {
-        const match = userInput.match(pattern);
-        if (match) {
-          location = match[1] || match[0];
-          break;
-        }
-      }
-      
-      if (temperature !== undefined && location !== 'unknown location') {
-        try {
-          const isWithinLimits = temperature >= -18 && temperature <= 4;
-          const result = await api.post('/temperature-logs', {
-            location: location.trim(),
-            temperature: temperature,
-            is_within_limits: isWithinLimits
-          });
-          
-          const status = isWithinLimits ? `✅ ${t('normal', language)}` : `⚠️ ${t('alert', language)}`;
-          return isFrench ? 
-            `🌡️ Température enregistrée:\n• ${location.trim()}: ${temperature}°C\n• Statut: ${status}` :
-            `🌡️ Temperature logged:\n• ${location.trim()}: ${temperature}°C\n• Status: ${status}`;
-        } catch (error) {
-          return '❌ Failed to log temperature.';
-        }
-      }
-      return isFrench ? 
-        'Veuillez spécifier la température et l\'emplacement. Ex: "ajouter température de frigo1 à 10 degrés"' :
-        'Please specify temperature and location. Ex: "add temperature of fridge1 to 10 degrees"';
-    }
-
-    // Enhanced product management
-    if (parsed.intent === 'product') {
-      const nameMatch = userInput.match(/(?:add|create|new|ajouter)\s+(?:product\s+)?([^,.\n]+?)(?:\s+with|\s*$)/i);
-      if (nameMatch) {
-        try {
-          const productData = { name: nameMatch[1].trim() };
-          const result = await api.post('/products', productData);
-          return `✅ Product "${result.name}" added successfully.`;
-        } catch (error) {
-          return '❌ Failed to add product.';
-        }
-      }
-    }
-
-    // Enhanced room cleaning
-    if (parsed.intent === 'clean') {
-      const roomMatch = userInput.match(/(?:clean|cleaned|nettoyer)\s+(?:room\s+)?([^,.\n]+?)(?:\s+room|\s*$)/i);
-      if (roomMatch) {
-        try {
-          const result = await api.post('/room-cleaning', {
-            room_name: roomMatch[1].trim(),
-            cleaning_plan_id: 1,
-            notes: 'Cleaned via AI chat'
-          });
-          return `🧹 Room "${result.room_name}" marked as cleaned.`;
-        } catch (error) {
-          return '❌ Failed to mark room as cleaned.';
-        }
-      }
-    }
-
-    // Enhanced status checking
-    if (parsed.intent === 'status') {
-      try {
-        const [tempLogs, usageReport] = await Promise.all([
-          api.get('/temperature-logs'),
-          api.get('/usage-report')
-        ]);
-        
-        const recentAlerts = tempLogs.filter(log => !log.is_within_limits).length;
-        const status = recentAlerts === 0 ? '🟢 Compliant' : '🟡 Attention Required';
-        
-        return `📊 HACCP Status: ${status}\n\n• Alerts: ${recentAlerts}\n• Cost: $${usageReport.monthly_cost.toFixed(4)}\n• Logs: ${tempLogs.length}\n\n${recentAlerts > 0 ? '⚠️ Address alerts' : '✅ All normal'}`;
-      } catch (error) {
-        return '❌ Failed to get status.';
-      }
-    }
-
-    // Enhanced product listing
-    if (parsed.intent === 'list') {
-      try {
-        const products = await api.get('/products');
-        if (products.length === 0) return 'No products found.';
-        
-        let response = '📦 Products:\n\n';
-        products.slice(0, 10).forEach(product => {
-          response += `• ${product.name}`;
-          if (product.category) response += ` (${product.category})`;
-          if (product.allergens?.length) response += ` ⚠️ ${product.allergens.join(', ')}`;
-          response += '\n';
-        });
-        if (products.length > 10) response += `\n... and ${products.length - 10} more`;
-        return response;
-      } catch (error) {
-        return '❌ Failed to fetch products.';
-      }
-    }
-
-    // Enhanced usage reporting
-    if (parsed.intent === 'cost') {
-      try {
-        const report = await api.get('/usage-report');
-        return `💰 Usage Report:\n\n• Total: $${report.total_cost.toFixed(4)}\n• Monthly: $${report.monthly_cost.toFixed(4)}\n• Savings: ~85%\n\n💡 Serverless efficiency!`;
-      } catch (error) {
-        return '❌ Failed to get report.';
-      }
-    }
-
-    // Help and fallback
-    if (/help|aide|what.*do/i.test(userInput)) {
-      return isFrench ?
-        `🤖 Commandes disponibles:\n\n🌡️ "ajouter température de frigo1 à 10 degrés"\n🥘 "ajouter produit saumon frais"\n🧹 "nettoyer cuisine"\n📊 "statut de conformité"\n📦 "lister les produits"\n💰 "rapport d'utilisation"` :
-        `🤖 Available commands:\n\n🌡️ "add temperature of fridge1 to 10 degrees"\n🥘 "add product fresh salmon"\n🧹 "clean kitchen room"\n📊 "compliance status"\n📦 "list products"\n💰 "usage report"`;
-    }
-
-    // Smart fallback with intent recognition
-    const suggestions = {
-      temperature: 'Try: "add temperature of [location] to [number] degrees"',
-      product: 'Try: "add product [name]"',
-      clean: 'Try: "clean [room name]"',
-      unknown: 'I can help with temperatures, products, cleaning, and reports. Say "help" for examples.'
-    };
-    
-    return `🤔 ${suggestions[parsed.intent] || suggestions.unknown}`;
+    const response = await api.post('/chat/command', { message: userInput, language });
+    return response.data.reply;
   };
 
   const handleSend = async () => {
@@ -30,7 +30,7 @@ export default function CleaningPlan() {
   const [selectedPlan, setSelectedPlan] = useState(null);
   const [open, setOpen] = useState(false);
   const [archiveOpen, setArchiveOpen] = useState(false);
-  const [roomCleanings, setRoomCleanings] = useState([]);
+  const [roomStatus, setRoomStatus] = useState({});
   const canvasRef = useRef(null);
   const dialogCanvasRef = useRef(null);
   const [formData, setFormData] = useState({
@@ -50,7 +50,7 @@ export default function CleaningPlan() {
 
   useEffect(() => {
     if (selectedPlan) {
-      fetchRoomCleanings(selectedPlan.id);
+      fetchRoomStatus(selectedPlan.id);
       drawPlan(selectedPlan);
     }
   }, [selectedPlan]);
@@ -59,7 +59,7 @@ export default function CleaningPlan() {
     if (selectedPlan) {
       drawPlan(selectedPlan);
     }
-  }, [roomCleanings]);
+  }, [roomStatus]);
 
   useEffect(() => {
     if (open) {
@@ -108,12 +108,16 @@ export default function CleaningPlan() {
     }
   };
 
-  const fetchRoomCleanings = async (planId) => {
+  const fetchRoomStatus = async (planId) => {
     try {
-      const response = await api.get(`/room-cleanings/${planId}`);
-      setRoomCleanings(response.data);
+      const response = await api.get(`/cleaning-plans/${planId}/status`);
+      const statusByRoom = {};
+      response.data.rooms.forEach(room => {
+        statusByRoom[room.room_name] = room;
+      });
+      setRoomStatus(statusByRoom);
     } catch (error) {
-      console.error('Error fetching room cleanings:', error);
+      console.error('Error fetching room status:', error);
     }
   };
 
@@ -130,10 +134,7 @@ export default function CleaningPlan() {
 
     // Draw rooms
     plan.rooms.forEach(room => {
-      const isRecentlyCleaned = roomCleanings.some(cleaning => 
-        cleaning.room_name === room.name && 
-        new Date(cleaning.cleaned_at) > new Date(Date.now() - 24 * 60 * 60 * 1000)
-      );
+      const isRecentlyCleaned = roomStatus[room.name]?.state === 'ok';
 
       // Room background
       ctx.fillStyle = isRecentlyCleaned ? '#c8e6c9' : '#ffcdd2';
@@ -180,7 +181,7 @@ export default function CleaningPlan() {
           notes: `Room cleaned via interactive plan`
         });
         
-        fetchRoomCleanings(selectedPlan.id);
+        fetchRoomStatus(selectedPlan.id);
       } catch (error) {
         console.error('Error marking room as cleaned:', error);
       }
@@ -298,11 +299,10 @@ export default function CleaningPlan() {
   };
 
   const getRoomStatus = (roomName) => {
-    const lastCleaning = roomCleanings.find(c => c.room_name === roomName);
-    if (!lastCleaning) return { status: t('neverCleaned', language), color: 'error' };
+    const status = roomStatus[roomName];
+    if (!status || !status.last_cleaned_at) return { status: t('neverCleaned', language), color: 'error' };
     
-    const cleanedAt = new Date(lastCleaning.cleaned_at);
-    const hoursAgo = (Date.now() - cleanedAt.getTime()) / (1000 * 60 * 60);
+    const cleanedAt = new Date(status.last_cleaned_at);
     
     const dateTime = cleanedAt.toLocaleString(language === 'fr' ? 'fr-FR' : 'en-US', {
       day: '2-digit',
@@ -315,8 +315,8 @@ export default function CleaningPlan() {
     const prefix = language === 'fr' ? 'Nettoyé' : 'Cleaned';
     
     let color = 'success';
-    if (hoursAgo >= 48) color = 'error';
-    else if (hoursAgo >= 24) color = 'warning';
+    if (status.state === 'overdue') color = 'error';
+    else if (status.state === 'due') color = 'warning';
     
     return { status: `${prefix} ${dateTime}`, color };
   };
@@ -50,8 +50,8 @@ export default function Dashboard() {
       // Try to get incidents, but don't fail if endpoint doesn't exist
       let incidentsCount = 0;
       try {
-        const incidents = await api.get('/incidents');
-        incidentsCount = incidents.data.filter(i => i.status === 'open').length;
+        const incidentStats = await api.get('/incidents/stats');
+        incidentsCount = incidentStats.data.open;
       } catch (error) {
         console.log('Incidents endpoint not available yet');
       }
@@ -193,25 +193,23 @@ export default function MaterialReception() {
     const barcode = event.target.value;
     setFormData({ ...formData, barcode });
     
-    // Mock barcode lookup - in production, integrate with barcode database
-    if (barcode.length >= 8) {
-      // Simulate barcode recognition
-      setTimeout(() => {
-        const mockProducts = {
-          '1234567890123': { name: 'Fresh Chicken Breast', category: 'poultry' },
-          '9876543210987': { name: 'Organic Salmon Fillet', category: 'seafood' },
-          '5555666677778': { name: 'Mixed Vegetables', category: 'vegetables' }
-        };
-        
-        const product = mockProducts[barcode];
-        if (product) {
+    // Autofill from the organization's barcode index once a full GTIN is entered
+    if ([8, 12, 13, 14].includes(barcode.length)) {
+      api.get(`/gtin/${barcode}`)
+        .then(response => {
+          const entry = response.data;
           setFormData(prev => ({
             ...prev,
-            product_name: product.name,
-            category: product.category
+            product_name: entry.product_name || prev.product_name,
+            category: entry.category || prev.category,
+            unit: entry.unit || prev.unit,
+            supplier_id: entry.supplier_id || prev.supplier_id,
+            quantity: entry.typical_quantity != null ? String(entry.typical_quantity) : prev.quantity
           }));
-        }
-      }, 500);
+        })
+        .catch(() => {
+          // Unknown or invalid barcode: leave the form for manual entry
+        });
     }
   };
 
@@ -0,0 +1,21 @@
+"""
+AI-HACCP Python SDK
+Async client for the AI-HACCP REST API with typed models generated from the server schemas.
+"""
+
+from .client import HACCPClient, Paginator, BatchResult
+from .exceptions import HACCPError, AuthenticationError, NotFoundError, InvalidRequestError
+from . import models
+
+__version__ = "1.0.0"
+
+__all__ = [
+    "HACCPClient",
+    "Paginator",
+    "BatchResult",
+    "HACCPError",
+    "AuthenticationError",
+    "NotFoundError",
+    "InvalidRequestError",
+    "models",
+]
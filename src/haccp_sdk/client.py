@@ -0,0 +1,343 @@
+"""
+AI-HACCP async client
+One pooled httpx connection set per client, tokens renewed before they expire,
+list endpoints exposed as async iterators and writes batched with bounded
+concurrency.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Generic, Iterable, List, Optional, Tuple, Type, TypeVar, Union
+
+import httpx
+from pydantic import BaseModel, ValidationError
+
+from . import models
+from .exceptions import HACCPError, AuthenticationError, NotFoundError, InvalidRequestError
+
+T = TypeVar("T", bound=BaseModel)
+
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# Only these are retried after the request may have reached the server
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Log in again this long before the token expires
+REFRESH_MARGIN_SECONDS = 60
+MAX_PAGE_SIZE = 1000
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """The exp claim of a JWT (not verified; the server does that)"""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class Paginator(Generic[T]):
+    """
+    Every record of a limit/offset list endpoint, fetched page by page as you iterate.
+    The next page is requested while the current one is being consumed.
+    """
+
+    def __init__(self, client: "HACCPClient", path: str, model: Type[T], params: Dict[str, Any], page_size: int):
+        self.client = client
+        self.path = path
+        self.model = model
+        self.params = {key: value for key, value in params.items() if value is not None}
+        self.page_size = min(max(page_size, 1), MAX_PAGE_SIZE)
+
+    def __aiter__(self) -> AsyncIterator[T]:
+        return self._iterate()
+
+    async def to_list(self) -> List[T]:
+        return [item async for item in self]
+
+    async def _fetch(self, offset: int) -> List[Dict[str, Any]]:
+        params = dict(self.params, limit=self.page_size, offset=offset)
+        return (await self.client.request("GET", self.path, params=params)).json()
+
+    async def _iterate(self) -> AsyncIterator[T]:
+        offset = 0
+        pending = asyncio.ensure_future(self._fetch(offset))
+        try:
+            while pending is not None:
+                page = await pending
+                pending = None
+                if len(page) == self.page_size:
+                    pending = asyncio.ensure_future(self._fetch(offset + len(page)))
+                offset += len(page)
+                for item in page:
+                    yield self.model.model_validate(item)
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+
+
+class BatchResult(Generic[T]):
+    """Outcome of a batched write: results[i] is None when item i failed"""
+
+    def __init__(self, size: int):
+        self.results: List[Optional[T]] = [None] * size
+        self.errors: List[Tuple[int, HACCPError]] = []
+
+    @property
+    def created(self) -> List[T]:
+        return [result for result in self.results if result is not None]
+
+    def __repr__(self):
+        return f"BatchResult(created={len(self.created)}, errors={len(self.errors)})"
+
+
+class HACCPClient:
+    """
+    async with HACCPClient("http://localhost:9001", email=..., password=...) as client:
+        await client.log_temperature("Walk-in Cooler", 2.5)
+        async for log in client.temperature_logs(since=...):
+            ...
+    """
+
+    def __init__(self, base_url: Optional[str] = None, email: Optional[str] = None, password: Optional[str] = None,
+                 token: Optional[str] = None, max_connections: int = 20, timeout: float = 30.0, retries: int = 3):
+        self.base_url = (base_url or os.getenv("HACCP_API_URL", "http://localhost:9001")).rstrip("/")
+        self._credentials = (email, password) if email and password else None
+        self._token = token
+        self._token_expiry = token_expiry(token) if token else None
+        self._login_lock = asyncio.Lock()
+        self.max_connections = max_connections
+        self.retries = retries
+        # Connection failures are retried by the transport; status retries are handled in request()
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout,
+            transport=httpx.AsyncHTTPTransport(retries=retries, limits=limits)
+        )
+        self.user: Optional[Dict[str, Any]] = None
+
+    async def __aenter__(self) -> "HACCPClient":
+        if self._credentials and not self._token:
+            await self.login(*self._credentials)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self._http.aclose()
+
+    # Authentication
+
+    async def login(self, email: str, password: str) -> Dict[str, Any]:
+        """Log in and keep the credentials so the token can be renewed"""
+        response = await self._http.post("/auth/login", json={"email": email, "password": password})
+        if response.status_code != 200:
+            raise self._error(response)
+        data = response.json()
+        self._credentials = (email, password)
+        self._token = data["access_token"]
+        self._token_expiry = token_expiry(self._token)
+        self.user = data.get("user")
+        return data
+
+    async def _ensure_token(self, force: bool = False):
+        if not self._credentials:
+            return
+        stale = self._token is None or (
+            self._token_expiry is not None and self._token_expiry - REFRESH_MARGIN_SECONDS < time.time()
+        )
+        if not (stale or force):
+            return
+        token = self._token
+        async with self._login_lock:
+            # Concurrent requests wait for one login instead of each logging in
+            if self._token == token:
+                await self.login(*self._credentials)
+
+    # Transport
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send an authenticated request; raises HACCPError on any non-2xx response"""
+        await self._ensure_token()
+        refreshed = False
+        attempt = 0
+        # Popped once: every attempt sends the caller's headers plus the current token
+        extra_headers = kwargs.pop("headers", None) or {}
+        while True:
+            headers = dict(extra_headers)
+            if self._token:
+                headers["Authorization"] = f"Bearer {self._token}"
+            response = await self._http.request(method, path, headers=headers, **kwargs)
+
+            if response.status_code == 401 and self._credentials and not refreshed:
+                refreshed = True
+                await self._ensure_token(force=True)
+                continue
+            if response.status_code in RETRY_STATUSES and method in IDEMPOTENT_METHODS and attempt < self.retries:
+                attempt += 1
+                await asyncio.sleep(self._retry_delay(response, attempt))
+                continue
+            if response.is_success:
+                return response
+            raise self._error(response)
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        retry_after = response.headers.get("retry-after")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return 0.5 * 2 ** (attempt - 1)
+
+    def _error(self, response: httpx.Response) -> HACCPError:
+        try:
+            detail = response.json().get("detail")
+        except (ValueError, AttributeError):
+            detail = response.text or None
+        message = f"{response.request.method} {response.request.url.path} failed with {response.status_code}: {detail}"
+        if response.status_code in (401, 403):
+            return AuthenticationError(message, response.status_code, detail)
+        if response.status_code == 404:
+            return NotFoundError(message, response.status_code, detail)
+        if response.status_code in (400, 422):
+            return InvalidRequestError(message, response.status_code, detail)
+        return HACCPError(message, response.status_code, detail)
+
+    async def _create(self, path: str, payload: Union[BaseModel, Dict[str, Any]], request_model: Type[BaseModel],
+                      response_model: Type[T]) -> T:
+        if not isinstance(payload, BaseModel):
+            # Validated client-side first, so bad input fails before a round trip
+            try:
+                payload = request_model(**payload)
+            except ValidationError as e:
+                raise InvalidRequestError(f"Invalid {request_model.__name__}: {e}", detail=e.errors()) from e
+        body = payload.model_dump(mode="json", exclude_none=True)
+        return response_model.model_validate((await self.request("POST", path, json=body)).json())
+
+    async def _batch(self, path: str, items: Iterable[Union[BaseModel, Dict[str, Any]]], request_model: Type[BaseModel],
+                     response_model: Type[T], concurrency: Optional[int]) -> BatchResult[T]:
+        items = list(items)
+        result: BatchResult[T] = BatchResult(len(items))
+        semaphore = asyncio.Semaphore(concurrency or self.max_connections)
+
+        async def send(index: int, item):
+            async with semaphore:
+                try:
+                    result.results[index] = await self._create(path, item, request_model, response_model)
+                except HACCPError as e:
+                    result.errors.append((index, e))
+                except httpx.HTTPError as e:
+                    result.errors.append((index, HACCPError(str(e))))
+
+        await asyncio.gather(*(send(index, item) for index, item in enumerate(items)))
+        result.errors.sort(key=lambda error: error[0])
+        return result
+
+    # Temperature logs
+
+    async def log_temperature(self, location: str, temperature: float, equipment_id: Optional[str] = None,
+                              is_within_limits: Optional[bool] = None) -> models.TemperatureLogResponse:
+        return await self._create("/temperature-logs", {
+            "location": location,
+            "temperature": temperature,
+            "equipment_id": equipment_id,
+            "is_within_limits": is_within_limits,
+        }, models.TemperatureLogCreate, models.TemperatureLogResponse)
+
+    async def log_temperatures(self, readings: Iterable[Union[models.TemperatureLogCreate, Dict[str, Any]]],
+                               concurrency: Optional[int] = None) -> BatchResult[models.TemperatureLogResponse]:
+        """Log many readings, at most `concurrency` requests in flight"""
+        return await self._batch("/temperature-logs", readings, models.TemperatureLogCreate,
+                                 models.TemperatureLogResponse, concurrency)
+
+    def temperature_logs(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                         page_size: int = 500) -> Paginator[models.TemperatureLogResponse]:
+        """Newest first. until defaults to now, so logs added while iterating do not shift the pages"""
+        return Paginator(self, "/temperature-logs", models.TemperatureLogResponse, {
+            "since": since.isoformat() if since else None,
+            "until": (until or datetime.utcnow()).isoformat(),
+        }, page_size)
+
+    # Products
+
+    async def create_product(self, name: str, **fields) -> models.ProductResponse:
+        return await self._create("/products", dict(fields, name=name), models.ProductCreate, models.ProductResponse)
+
+    async def create_products(self, products: Iterable[Union[models.ProductCreate, Dict[str, Any]]],
+                              concurrency: Optional[int] = None) -> BatchResult[models.ProductResponse]:
+        return await self._batch("/products", products, models.ProductCreate, models.ProductResponse, concurrency)
+
+    def products(self, page_size: int = 500) -> Paginator[models.ProductResponse]:
+        return Paginator(self, "/products", models.ProductResponse, {}, page_size)
+
+    # Incidents
+
+    async def report_incident(self, title: str, severity: str, description: Optional[str] = None,
+                              category: Optional[str] = None) -> models.IncidentResponse:
+        return await self._create("/incidents", {
+            "title": title,
+            "severity": severity,
+            "description": description,
+            "category": category,
+        }, models.IncidentCreate, models.IncidentResponse)
+
+    def incidents(self, status: Optional[str] = None, severity: Optional[str] = None, category: Optional[str] = None,
+                  since: Optional[datetime] = None, until: Optional[datetime] = None,
+                  page_size: int = 500) -> Paginator[models.IncidentResponse]:
+        """Newest first; until defaults to now"""
+        return Paginator(self, "/incidents", models.IncidentResponse, {
+            "status": status,
+            "severity": severity,
+            "category": category,
+            "since": since.isoformat() if since else None,
+            "until": (until or datetime.utcnow()).isoformat(),
+        }, page_size)
+
+    async def incident_stats(self) -> models.IncidentStatsResponse:
+        return models.IncidentStatsResponse.model_validate((await self.request("GET", "/incidents/stats")).json())
+
+    # Cleaning
+
+    async def create_cleaning_plan(self, name: str, rooms: List[Dict[str, Any]], cleaning_frequency: str = "daily",
+                                   **fields) -> models.CleaningPlanResponse:
+        return await self._create("/cleaning-plans", dict(fields, name=name, rooms=rooms, cleaning_frequency=cleaning_frequency),
+                                  models.CleaningPlanCreate, models.CleaningPlanResponse)
+
+    async def mark_room_cleaned(self, room_name: str, cleaning_plan_id: int,
+                                notes: Optional[str] = None) -> models.RoomCleaningResponse:
+        return await self._create("/room-cleaning", {
+            "room_name": room_name,
+            "cleaning_plan_id": cleaning_plan_id,
+            "notes": notes,
+        }, models.RoomCleaningCreate, models.RoomCleaningResponse)
+
+    # Status and reports
+
+    async def compliance_status(self, refresh: bool = False) -> models.ComplianceStatusResponse:
+        response = await self.request("GET", "/compliance/status", params={"refresh": "true"} if refresh else None)
+        return models.ComplianceStatusResponse.model_validate(response.json())
+
+    async def chat(self, message: str, language: Optional[str] = None) -> models.ChatCommandResponse:
+        return await self._create("/chat/command", {"message": message, "language": language},
+                                  models.ChatCommandRequest, models.ChatCommandResponse)
+
+    async def usage_report(self) -> Dict[str, Any]:
+        return (await self.request("GET", "/usage-report")).json()
+
+    # Bulk import
+
+    async def import_file(self, kind: str, path: str, wait: bool = True,
+                          poll_interval: float = 0.5) -> models.ImportJobResponse:
+        """Upload a CSV/XLSX of products, suppliers or temperature_logs to the server import pipeline"""
+        # Sent as bytes, not the open file, so a retried or re-authenticated request resends the whole upload
+        with open(path, "rb") as file:
+            content = file.read()
+        response = await self.request("POST", f"/imports/{kind}", files={"file": (os.path.basename(path), content)})
+        job = models.ImportJobResponse.model_validate(response.json())
+        while wait and job.status in ("queued", "running"):
+            await asyncio.sleep(poll_interval)
+            job = models.ImportJobResponse.model_validate((await self.request("GET", f"/imports/{job.id}")).json())
+        return job
@@ -0,0 +1,25 @@
+"""
+AI-HACCP SDK errors
+Every failed request raises; nothing is returned as None.
+"""
+
+from typing import Any, Optional
+
+
+class HACCPError(Exception):
+    def __init__(self, message: str, status_code: Optional[int] = None, detail: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class AuthenticationError(HACCPError):
+    """Bad credentials, an expired token that could not be refreshed, or a forbidden action"""
+
+
+class NotFoundError(HACCPError):
+    pass
+
+
+class InvalidRequestError(HACCPError):
+    """The server rejected the request body or parameters (400/422)"""
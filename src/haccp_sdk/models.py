@@ -0,0 +1,478 @@
+"""
+Typed models for the AI-HACCP API
+Generated from src/backend/schemas.py by scripts/generate_sdk_models.py; do not edit.
+"""
+
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel
+
+
+class OrganizationCreate(BaseModel):
+    name: str
+    type: str
+
+
+class OrganizationResponse(BaseModel):
+    id: int
+    name: str
+    type: str
+    created_at: datetime
+
+
+class UserCreate(BaseModel):
+    email: str
+    password: str
+    name: str
+    role: str
+    organization_id: int
+
+
+class UserLogin(BaseModel):
+    email: str
+    password: str
+
+
+class UserResponse(BaseModel):
+    id: int
+    email: str
+    name: str
+    role: str
+    organization_id: int
+    is_active: bool
+    created_at: datetime
+
+
+class ProductCreate(BaseModel):
+    name: str
+    category: Optional[str] = None
+    allergens: Optional[List[str]] = None
+    shelf_life_days: Optional[int] = None
+    storage_temp_min: Optional[Decimal] = None
+    storage_temp_max: Optional[Decimal] = None
+
+
+class ProductResponse(BaseModel):
+    id: int
+    name: str
+    category: Optional[str]
+    allergens: Optional[List[str]]
+    shelf_life_days: Optional[int]
+    storage_temp_min: Optional[Decimal]
+    storage_temp_max: Optional[Decimal]
+    created_at: datetime
+
+
+class TemperatureLogCreate(BaseModel):
+    location: str
+    temperature: Decimal
+    equipment_id: Optional[str] = None
+    is_within_limits: Optional[bool] = None
+
+
+class TemperatureLogResponse(BaseModel):
+    id: int
+    location: str
+    temperature: Decimal
+    equipment_id: Optional[str]
+    is_within_limits: Optional[bool]
+    created_at: datetime
+
+
+class SupplierCreate(BaseModel):
+    name: str
+    contact_info: Optional[dict] = None
+    certification_status: Optional[str] = None
+    risk_level: Optional[int] = 1
+
+
+class SupplierResponse(BaseModel):
+    id: int
+    name: str
+    contact_info: Optional[dict]
+    certification_status: Optional[str]
+    risk_level: int
+    created_at: datetime
+
+
+class BatchTrackingCreate(BaseModel):
+    batch_number: str
+    product_id: int
+    supplier_id: Optional[int] = None
+    production_date: Optional[date] = None
+    expiry_date: Optional[date] = None
+    location: Optional[str] = None
+    status: Optional[str] = 'received'
+
+
+class BatchTrackingResponse(BaseModel):
+    id: int
+    batch_number: str
+    product_id: int
+    supplier_id: Optional[int]
+    production_date: Optional[date]
+    expiry_date: Optional[date]
+    location: Optional[str]
+    status: str
+    created_at: datetime
+
+
+class ExpiringItemResponse(BaseModel):
+    source_type: str
+    id: int
+    product_name: Optional[str]
+    batch_number: Optional[str]
+    expiry_date: date
+    days_left: int
+    location: Optional[str]
+    status: Optional[str]
+
+
+class ExpiryAlertResponse(BaseModel):
+    id: int
+    source_type: str
+    source_id: int
+    product_name: Optional[str]
+    batch_number: Optional[str]
+    expiry_date: date
+    level: str
+    acknowledged_at: Optional[datetime]
+    created_at: datetime
+
+
+class CleaningRecordCreate(BaseModel):
+    area: str
+    cleaning_type: Optional[str] = None
+    products_used: Optional[List[str]] = None
+    notes: Optional[str] = None
+
+
+class CleaningRecordResponse(BaseModel):
+    id: int
+    area: str
+    cleaning_type: Optional[str]
+    products_used: Optional[List[str]]
+    performed_by: int
+    verified_by: Optional[int]
+    notes: Optional[str]
+    created_at: datetime
+
+
+class IncidentCreate(BaseModel):
+    title: str
+    description: Optional[str] = None
+    severity: str
+    category: Optional[str] = None
+
+
+class IncidentUpdate(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    severity: Optional[str] = None
+    category: Optional[str] = None
+    status: Optional[str] = None
+    root_cause: Optional[str] = None
+    corrective_actions: Optional[str] = None
+
+
+class IncidentResponse(BaseModel):
+    id: int
+    title: str
+    description: Optional[str]
+    severity: str
+    category: Optional[str]
+    reported_by: int
+    status: str
+    root_cause: Optional[str]
+    corrective_actions: Optional[str]
+    created_at: datetime
+    resolved_at: Optional[datetime]
+
+
+class IncidentGroupStats(BaseModel):
+    total: int
+    open: int
+    resolved: int
+    mttr_hours: Optional[float]
+
+
+class IncidentStatsResponse(BaseModel):
+    total: int
+    open: int
+    resolved: int
+    mttr_hours: Optional[float]
+    by_severity: Dict[str, IncidentGroupStats]
+    by_category: Dict[str, IncidentGroupStats]
+    top_categories: List[dict]
+
+
+class ComplianceLocation(BaseModel):
+    location: Optional[str]
+    breaches: int
+    last_breach_at: Optional[datetime]
+
+
+class ComplianceTemperature(BaseModel):
+    readings: int
+    breaches: int
+    breach_rate: float
+    locations: List[ComplianceLocation]
+
+
+class ComplianceIncidents(BaseModel):
+    open: int
+    critical: int
+    open_by_severity: Dict[str, int]
+
+
+class ComplianceCleaning(BaseModel):
+    rooms: int
+    due: int
+    overdue: int
+
+
+class ComplianceExpiry(BaseModel):
+    expired: int
+    expiring_soon: int
+    warning_days: int
+
+
+class ComplianceStatusResponse(BaseModel):
+    organization_id: int
+    status: str
+    score: int
+    generated_at: datetime
+    window_hours: int
+    temperature: ComplianceTemperature
+    incidents: ComplianceIncidents
+    cleaning: ComplianceCleaning
+    expiry: ComplianceExpiry
+    alerts: List[str]
+
+
+class ChatCommandRequest(BaseModel):
+    message: str
+    language: Optional[str] = None
+
+
+class ChatCommandResponse(BaseModel):
+    intent: str
+    language: str
+    slots: Dict[str, str]
+    reply: str
+    data: Optional[dict] = None
+
+
+class CleaningPlanCreate(BaseModel):
+    name: str
+    description: Optional[str] = None
+    rooms: List[dict]
+    cleaning_frequency: str
+    estimated_duration: Optional[int] = None
+
+
+class CleaningPlanResponse(BaseModel):
+    id: int
+    name: str
+    description: Optional[str]
+    rooms: List[dict]
+    cleaning_frequency: str
+    estimated_duration: Optional[int]
+    archived_at: Optional[datetime] = None
+    created_at: datetime
+
+
+class RoomCleaningCreate(BaseModel):
+    room_name: str
+    cleaning_plan_id: int
+    notes: Optional[str] = None
+
+
+class RoomCleaningResponse(BaseModel):
+    id: int
+    room_name: str
+    cleaning_plan_id: int
+    cleaned_by: int
+    notes: Optional[str]
+    cleaned_at: datetime
+
+
+class ArchivedRoomCleaningResponse(BaseModel):
+    id: int
+    room_name: str
+    cleaning_plan_id: int
+    cleaned_by: Optional[int]
+    notes: Optional[str]
+    cleaned_at: datetime
+    archived: bool
+
+
+class RegionCleaningCreate(BaseModel):
+    x: float
+    y: float
+    width: float = 0
+    height: float = 0
+    notes: Optional[str] = None
+
+
+class RoomStatusResponse(BaseModel):
+    room_name: str
+    state: str
+    last_cleaned_at: Optional[datetime]
+    due_at: Optional[datetime]
+
+
+class CleaningPlanStatusResponse(BaseModel):
+    cleaning_plan_id: int
+    cleaning_frequency: str
+    generated_at: datetime
+    rooms: List[RoomStatusResponse]
+
+
+class CleaningTaskResponse(BaseModel):
+    cleaning_plan_id: int
+    plan_name: str
+    room_name: str
+    due_at: datetime
+    estimated_duration: Optional[int]
+
+
+class MaterialReceptionCreate(BaseModel):
+    supplier_id: int
+    product_name: str
+    category: str
+    barcode: Optional[str] = None
+    quantity: float
+    unit: str
+    expiry_date: Optional[date] = None
+    batch_number: Optional[str] = None
+    temperature_on_arrival: Optional[float] = None
+    quality_notes: Optional[str] = None
+    image_data: Optional[str] = None
+
+
+class MaterialReceptionResponse(BaseModel):
+    id: int
+    supplier_id: int
+    product_name: str
+    category: str
+    barcode: Optional[str]
+    quantity: float
+    unit: str
+    expiry_date: Optional[date]
+    batch_number: Optional[str]
+    temperature_on_arrival: Optional[float]
+    quality_notes: Optional[str]
+    image_path: Optional[str] = None
+    ai_analysis: Optional[dict]
+    received_by: int
+    received_at: datetime
+
+
+class BatchImageAnalysisRequest(BaseModel):
+    images: List[str]
+    batch_size: int = 8
+
+
+class ConfigurationUpdate(BaseModel):
+    value: str
+
+
+class ConfigurationResponse(BaseModel):
+    id: int
+    parameter: str
+    value: str
+    parent_parameter: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+
+class UserTemperatureRangeCreate(BaseModel):
+    refrigerated_min: Optional[Decimal] = 0.0
+    refrigerated_max: Optional[Decimal] = 4.0
+    frozen_min: Optional[Decimal] = -25.0
+    frozen_max: Optional[Decimal] = -18.0
+    ambient_min: Optional[Decimal] = 15.0
+    ambient_max: Optional[Decimal] = 25.0
+
+
+class UserTemperatureRangeResponse(BaseModel):
+    id: int
+    user_id: int
+    refrigerated_min: Decimal
+    refrigerated_max: Decimal
+    frozen_min: Decimal
+    frozen_max: Decimal
+    ambient_min: Decimal
+    ambient_max: Decimal
+    created_at: datetime
+    updated_at: datetime
+
+
+class ReportCreate(BaseModel):
+    format: str = 'csv'
+    start_date: date
+    end_date: date
+    sections: Optional[List[str]] = None
+
+
+class ReportJobResponse(BaseModel):
+    id: int
+    format: str
+    start_date: date
+    end_date: date
+    sections: Optional[List[str]]
+    status: str
+    progress: Optional[float]
+    row_count: Optional[int]
+    size_bytes: Optional[int]
+    error: Optional[str]
+    created_at: datetime
+    finished_at: Optional[datetime]
+
+
+class ImportJobResponse(BaseModel):
+    id: int
+    kind: str
+    filename: Optional[str]
+    status: str
+    progress: Optional[float]
+    processed_rows: Optional[int]
+    inserted_rows: Optional[int]
+    duplicate_rows: Optional[int]
+    error_rows: Optional[int]
+    errors: Optional[List[dict]]
+    error: Optional[str]
+    created_at: datetime
+    finished_at: Optional[datetime]
+
+
+class ColdArchiveFileResponse(BaseModel):
+    id: int
+    table_name: str
+    period_start: date
+    period_end: date
+    record_count: int
+    size_bytes: int
+    checksum: str
+    created_at: datetime
+
+
+class ApiKeyCreate(BaseModel):
+    name: str
+
+
+class ApiKeyResponse(BaseModel):
+    id: int
+    name: str
+    key_prefix: str
+    user_id: int
+    created_at: datetime
+    last_used_at: Optional[datetime]
+    revoked_at: Optional[datetime]
+
+
+class ApiKeyCreated(ApiKeyResponse):
+    key: str